@@ -0,0 +1 @@
+"""Benchmarks for the conversion and preview paths; see benchmarks.run."""
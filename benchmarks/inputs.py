@@ -0,0 +1,115 @@
+"""Synthetic benchmark inputs, generated locally and reused between runs.
+
+Files are written under a work directory with their parameters in the
+name, so a second run with the same settings skips generation.
+"""
+import io
+import os
+import random
+from typing import List, Tuple
+
+from PIL import Image, ImageDraw
+
+# (width, height) of generated photos; cycled through for N images
+IMAGE_SIZES: List[Tuple[int, int]] = [(640, 480), (1920, 1080), (3000, 4000), (4032, 3024)]
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+         "tempor incididunt ut labore et dolore magna aliqua").split()
+
+
+def _photo(size: Tuple[int, int], seed: int) -> Image.Image:
+    """A noisy gradient with shapes; compresses roughly like a real photo."""
+    rnd = random.Random(seed)
+    small = Image.effect_noise((max(1, size[0] // 8), max(1, size[1] // 8)), 64).convert("RGB")
+    img = small.resize(size, Image.BILINEAR)
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rnd.randrange(size[0]), rnd.randrange(size[1])
+        r = rnd.randrange(20, max(21, min(size) // 3))
+        color = tuple(rnd.randrange(256) for _ in range(3))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+    return img
+
+
+def make_images(directory: str, count: int) -> List[str]:
+    """count JPEG/PNG files of various sizes; every fourth one is a PNG."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        size = IMAGE_SIZES[i % len(IMAGE_SIZES)]
+        ext = "png" if i % 4 == 3 else "jpg"
+        path = os.path.join(directory, f"img-{i:04d}-{size[0]}x{size[1]}.{ext}")
+        if not os.path.exists(path):
+            img = _photo(size, i)
+            if ext == "png":
+                img.save(path, optimize=False)
+            else:
+                img.save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def _sentence(rnd: random.Random, words: int) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_docx(path: str, paragraphs: int) -> str:
+    """A .docx with headings, lists, a table every 50 and an image every 100 paragraphs."""
+    if os.path.exists(path):
+        return path
+    from docx import Document
+    from docx.shared import Inches
+
+    rnd = random.Random(paragraphs)
+    picture = io.BytesIO()
+    _photo((800, 600), 0).save(picture, "JPEG", quality=85)
+    doc = Document()
+    doc.add_heading("Benchmark document", 0)
+    for i in range(paragraphs):
+        if i % 25 == 0:
+            doc.add_heading(f"Section {i // 25 + 1}", 1)
+        if i % 10 in (7, 8):
+            doc.add_paragraph(_sentence(rnd, 8), style="List Bullet")
+        else:
+            para = doc.add_paragraph(_sentence(rnd, rnd.randrange(20, 80)) + " ")
+            para.add_run(_sentence(rnd, 6)).bold = True
+        if i % 50 == 49:
+            table = doc.add_table(rows=6, cols=3)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = _sentence(rnd, rnd.randrange(1, 6))
+        if i % 100 == 99:
+            picture.seek(0)
+            doc.add_picture(picture, width=Inches(4))
+    doc.save(path)
+    return path
+
+
+def make_pdf(path: str, pages: int, image_every: int = 1) -> str:
+    """A PDF with K pages of text and an embedded JPEG on every image_every-th page."""
+    if os.path.exists(path):
+        return path
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    rnd = random.Random(pages)
+    photos = []
+    for i in range(4):
+        buffer = io.BytesIO()
+        _photo((1200, 900), i).save(buffer, "JPEG", quality=85)
+        buffer.seek(0)
+        photos.append(ImageReader(buffer))
+    c = canvas.Canvas(path, pagesize=(595, 842))
+    for page in range(pages):
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(40, 800, f"Page {page + 1}")
+        c.setFont("Helvetica", 10)
+        y = 770
+        for _ in range(20):
+            c.drawString(40, y, _sentence(rnd, 14))
+            y -= 14
+        if image_every and page % image_every == 0:
+            c.drawImage(photos[page % len(photos)], 40, 60, width=515, height=386)
+        c.showPage()
+    c.save()
+    return path
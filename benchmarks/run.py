@@ -0,0 +1,344 @@
+"""Benchmark every conversion and preview path.
+
+    python -m benchmarks.run                      # default sizes, writes results JSON
+    python -m benchmarks.run --images 40 --paragraphs 2000 --pages 1000
+    python -m benchmarks.run --only crop,split --compare old.json
+
+Inputs are generated once under --work. Every operation runs in its own
+subprocess so its peak RSS is not polluted by the others; the results
+(wall time, peak RSS, pages per second) are written as JSON and can be
+compared against an earlier run with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import inputs  # noqa: E402
+
+DEFAULTS = {"images": 24, "paragraphs": 600, "pages": 300, "preview_pages": 20}
+# A metric counts as a regression when it is this much worse than the baseline
+THRESHOLD = 0.2
+
+
+def _inputs(work: str, params: dict) -> dict:
+    return {
+        "images": inputs.make_images(os.path.join(work, f"images-{params['images']}"),
+                                     params["images"]),
+        "docx": inputs.make_docx(os.path.join(work, f"doc-{params['paragraphs']}.docx"),
+                                 params["paragraphs"]),
+        "pdf": inputs.make_pdf(os.path.join(work, f"pages-{params['pages']}.pdf"),
+                               params["pages"]),
+    }
+
+
+# Operations ------------------------------------------------------------------
+# Each takes (files, out_dir, params) and returns the number of pages handled
+
+def op_images_to_pdf(files, out, params):
+    from mypdf import engine
+    return engine.convert_images_to_pdf(files["images"], os.path.join(out, "images.pdf"),
+                                        workers=1, cache=False)
+
+
+def op_images_to_pdf_parallel(files, out, params):
+    from mypdf import engine
+    return engine.convert_images_to_pdf(files["images"], os.path.join(out, "images.pdf"),
+                                        cache=False)
+
+
+def op_images_to_pdf_render(files, out, params):
+    from mypdf import engine
+    return engine.convert_images_to_pdf(files["images"], os.path.join(out, "images.pdf"),
+                                        passthrough=False, cache=False)
+
+
+def op_word_to_pdf(files, out, params):
+    from mypdf import engine
+    return engine.convert_word_to_pdf(files["docx"], os.path.join(out, "word.pdf"), cache=False)
+
+
+def op_crop(files, out, params):
+    from mypdf import engine
+    last = max(1, params["pages"] - 1)
+    return engine.crop_pdf_pages(files["pdf"], os.path.join(out, "crop.pdf"),
+                                 min(2, last), last)
+
+
+def op_split(files, out, params):
+    from mypdf import engine
+    parts = engine.split_pdf(files["pdf"], os.path.join(out, "split-{n:03d}.pdf"), every=10)
+    return params["pages"] if parts else 0
+
+
+def op_merge(files, out, params):
+    """The generated PDF four times over; its images are shared between copies."""
+    from mypdf import engine
+    return engine.merge_pdfs([files["pdf"]] * 4, os.path.join(out, "merged.pdf"))
+
+
+def op_pages(files, out, params):
+    """Rotate, delete, move and 2-up the generated PDF in one write."""
+    from mypdf import engine
+    edits = [["rotate", "1-", 90], ["delete", "2"], ["move", "10-", 1], ["nup", 2]]
+    return engine.edit_pages(files["pdf"], os.path.join(out, "edited.pdf"), edits)
+
+
+def op_optimize(files, out, params):
+    from mypdf import engine
+    return engine.optimize_pdf(files["pdf"], os.path.join(out, "optimized.pdf"), dpi=72).pages
+
+
+def op_extract_images(files, out, params):
+    from mypdf import engine
+    engine.extract_images(files["pdf"], os.path.join(out, "images"))
+    return params["pages"]
+
+
+def op_preview_pdf(files, out, params):
+    """The work update_preview hands to the render thread, page by page."""
+    from mypdf.render import PageRenderer
+
+    renderer = PageRenderer(files["pdf"], prefetch=0)
+    try:
+        count = min(params["preview_pages"], renderer.page_count)
+        for index in range(count):
+            renderer.render(index)
+    finally:
+        renderer.close()
+    return count
+
+
+def op_preview_images(files, out, params):
+    from mypdf.preview import load_preview
+    for path in files["images"]:
+        load_preview(path)
+    return len(files["images"])
+
+
+def op_thumbnails(files, out, params):
+    """Every page of the PDF through the grid's loader, one screenful at a time."""
+    import time
+    from mypdf.thumbnails import ThumbnailLoader, page_key
+
+    loader = ThumbnailLoader()
+    try:
+        keys = [page_key(files["pdf"], index) for index in range(params["pages"])]
+        for start in range(0, len(keys), 20):
+            screen = keys[start:start + 20]
+            loader.want(screen)
+            while any(loader.get(key) is None for key in screen):
+                time.sleep(0.005)
+    finally:
+        loader.close()
+    return len(keys)
+
+
+def op_preview_word(files, out, params):
+    from mypdf import layout
+    doc = layout.get_layout(files["docx"])
+    count = 0
+    while count < params["preview_pages"] and doc.page(count) is not None:
+        for placement in doc.page(count):
+            layout.preview_items(placement)
+        count += 1
+    return count
+
+
+OPERATIONS: Dict[str, Callable] = {
+    "images_to_pdf": op_images_to_pdf,
+    "images_to_pdf_parallel": op_images_to_pdf_parallel,
+    "images_to_pdf_render": op_images_to_pdf_render,
+    "word_to_pdf": op_word_to_pdf,
+    "crop": op_crop,
+    "split": op_split,
+    "merge": op_merge,
+    "pages": op_pages,
+    "optimize": op_optimize,
+    "extract_images": op_extract_images,
+    "preview_pdf": op_preview_pdf,
+    "preview_images": op_preview_images,
+    "thumbnails": op_thumbnails,
+    "preview_word": op_preview_word,
+}
+
+
+# Measuring -------------------------------------------------------------------
+
+def _high_water_mb() -> Optional[float]:
+    # ru_maxrss survives fork+exec on Linux, so a child would report the
+    # parent's peak; VmHWM belongs to the new address space only
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (
+        1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak RSS of this process or of any worker process it waited for."""
+    peak = _high_water_mb()
+    if peak is None:
+        return None
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss if resource else 0
+    return max(peak, children / (1024 * 1024 if sys.platform == "darwin" else 1024))
+
+
+def run_child(name: str, work: str, params: dict) -> dict:
+    """Run one operation in this process and return its measurements."""
+    files = _inputs(work, params)
+    out = tempfile.mkdtemp(prefix=f"{name}-", dir=work)
+    rss_before = _high_water_mb()
+    started = time.perf_counter()
+    pages = OPERATIONS[name](files, out, params)
+    wall = time.perf_counter() - started
+    return {
+        "wall_s": round(wall, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1) if rss_before is not None else None,
+        "startup_rss_mb": round(rss_before, 1) if rss_before is not None else None,
+        "pages": pages,
+        "pages_per_s": round(pages / wall, 2) if wall > 0 else None,
+    }
+
+
+def run_operation(name: str, work: str, params: dict, repeat: int) -> dict:
+    """Run an operation `repeat` times in fresh subprocesses; keep the best time."""
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--child", name,
+             "--work", work, "--params", json.dumps(params)],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else
+                    f"exit status {proc.returncode}"}
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r["wall_s"])
+    if best.get("peak_rss_mb") is not None:
+        best["peak_rss_mb"] = max(r["peak_rss_mb"] for r in runs)
+    best["runs"] = [r["wall_s"] for r in runs]
+    return best
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> List[str]:
+    """Return a line per metric that got worse than baseline by more than threshold."""
+    regressions = []
+    for name, current in results["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or "error" in old or "error" in current:
+            continue
+        for metric in ("wall_s", "peak_rss_mb"):
+            if old.get(metric) and current.get(metric) is not None:
+                change = current[metric] / old[metric] - 1
+                line = f"{name:24} {metric:12} {old[metric]:>10} -> {current[metric]:>10} ({change:+.0%})"
+                print(line)
+                if change > threshold:
+                    regressions.append(line)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Benchmark the PDF tool's conversion paths.")
+    parser.add_argument("--images", type=int, default=DEFAULTS["images"],
+                        help="number of input images")
+    parser.add_argument("--paragraphs", type=int, default=DEFAULTS["paragraphs"],
+                        help="paragraphs in the generated .docx")
+    parser.add_argument("--pages", type=int, default=DEFAULTS["pages"],
+                        help="pages in the generated PDF")
+    parser.add_argument("--preview-pages", type=int, default=DEFAULTS["preview_pages"],
+                        help="pages rendered by the preview benchmarks")
+    parser.add_argument("--only", help="comma separated operations to run")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per operation")
+    parser.add_argument("--work", default=os.path.join(tempfile.gettempdir(), "mypdf-bench"),
+                        help="directory for generated inputs and outputs")
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="relative slowdown that counts as a regression (default: 0.2)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--params", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.work, json.loads(args.params))))
+        return 0
+
+    params = {"images": args.images, "paragraphs": args.paragraphs, "pages": args.pages,
+              "preview_pages": args.preview_pages}
+    names = args.only.split(",") if args.only else list(OPERATIONS)
+    unknown = [name for name in names if name not in OPERATIONS]
+    if unknown:
+        parser.error(f"unknown operation(s): {', '.join(unknown)}")
+
+    os.makedirs(args.work, exist_ok=True)
+    print(f"Generating inputs in {args.work}...")
+    _inputs(args.work, params)
+
+    results = {
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "results": {},
+    }
+    for name in names:
+        result = run_operation(name, args.work, params, max(1, args.repeat))
+        results["results"][name] = result
+        if "error" in result:
+            print(f"{name:24} FAILED: {result['error']}")
+        else:
+            print(f"{name:24} {result['wall_s']:8.2f}s {result['pages']:6} pages "
+                  f"{result['pages_per_s'] or 0:8.1f} pages/s "
+                  f"peak {result['peak_rss_mb'] or 0:7.1f} MB")
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results",
+                                         time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Cold-start benchmark for the GUI.
+
+    python -m benchmarks.startup                       # measure, write results JSON
+    python -m benchmarks.startup --compare old.json    # exit 1 on a regression
+    python -m benchmarks.startup --budget-ms 600       # exit 1 above a fixed budget
+
+Each run is a fresh interpreter that imports the GUI and, when a display
+is available, builds the main window and draws it once. The median of
+--repeat runs is reported for:
+
+    process_ms  interpreter start to window drawn (or to GUI imported)
+    import_ms   `import mypdf.gui`
+    window_ms   ModernPDFTool() plus the first update(); null without a display
+
+Startup also fails outright if any library in HEAVY_MODULES was imported:
+those belong to the modes that use them, not to opening the window.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported on first use of a mode; none may be loaded when the window opens
+HEAVY_MODULES = ("PyPDF2", "reportlab", "docx", "numpy", "mypdf.engine", "mypdf.jobs",
+                 "mypdf.layout", "mypdf.reader", "mypdf.render")
+METRICS = ("process_ms", "import_ms", "window_ms")
+THRESHOLD = 0.2
+# Differences smaller than this are noise, whatever the percentage
+MIN_DELTA_MS = 15
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+import mypdf.gui
+imported = time.perf_counter()
+window_ms = None
+try:
+    app = mypdf.gui.ModernPDFTool()
+    app.root.update()
+    window_ms = (time.perf_counter() - imported) * 1000
+    app.on_close()
+except Exception as e:  # No display
+    if "display" not in str(e).lower():
+        raise
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "window_ms": window_ms,
+    "modules": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure_once() -> dict:
+    script = CHILD.format(root=ROOT, heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else
+                           f"exit status {proc.returncode}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_ms"] = elapsed
+    return result
+
+
+def measure(repeat: int) -> dict:
+    """Median of `repeat` cold starts."""
+    runs = [measure_once() for _ in range(repeat)]
+    result = {"modules": sorted({name for run in runs for name in run["modules"]}),
+              "runs": len(runs)}
+    for metric in METRICS:
+        values = [run[metric] for run in runs if run[metric] is not None]
+        result[metric] = round(statistics.median(values), 1) if values else None
+    return result
+
+
+def compare(result: dict, baseline: dict, threshold: float = THRESHOLD) -> List[str]:
+    """Return a line per metric that got slower than baseline by more than threshold."""
+    regressions = []
+    for metric in METRICS:
+        old, new = baseline.get(metric), result.get(metric)
+        if not old or new is None:
+            continue
+        change = new / old - 1
+        line = f"{metric:12} {old:>8} -> {new:>8} ms ({change:+.0%})"
+        print(line)
+        if change > threshold and new - old > MIN_DELTA_MS:
+            regressions.append(line)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup",
+                                     description="Measure and check GUI cold start.")
+    parser.add_argument("--repeat", type=int, default=5, help="cold starts to run (default: 5)")
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/"
+                                               "startup-<time>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="relative slowdown that counts as a regression (default: 0.2)")
+    parser.add_argument("--budget-ms", type=float,
+                        help="fail if process_ms is above this, whatever the baseline")
+    args = parser.parse_args(argv)
+
+    result = measure(max(1, args.repeat))
+    window = f"{result['window_ms']:.0f} ms" if result["window_ms"] is not None else "n/a (no display)"
+    print(f"startup {result['process_ms']:.0f} ms: import {result['import_ms']:.0f} ms, "
+          f"window {window}")
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results",
+                                         time.strftime("startup-%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+    failed = False
+    if result["modules"]:
+        print(f"Imported at startup: {', '.join(result['modules'])}")
+        failed = True
+    if args.budget_ms is not None and result["process_ms"] > args.budget_ms:
+        print(f"Startup {result['process_ms']:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""PDF Manager - conversion engine, batch CLI and Tk GUI.
+
+The GUI lives in mypdf.gui and is only imported when the app is launched;
+mypdf.engine can be used on its own without tkinter.
+"""
@@ -0,0 +1,134 @@
+"""`pdf.py batch` - run a manifest of conversions without the GUI.
+
+A manifest is either a JSON file holding a list of jobs (or {"jobs": [...]})
+or a JSON Lines file with one job per line. Jobs look like:
+
+    {"op": "images", "inputs": ["a.jpg", "b.png"], "output": "out/ab.pdf"}
+    {"op": "images", "inputs": ["scan1.jpg", "scan2.jpg"], "ocr": "eng", "output": "out/scan.pdf"}
+    {"op": "word", "input": "report.docx", "output": "out/report.pdf"}
+    {"op": "crop", "input": "big.pdf", "start": 3, "end": 9, "output": "out/part.pdf"}
+    {"op": "split", "input": "big.pdf", "every": 10, "output": "out/big-{n:03d}.pdf"}
+    {"op": "merge", "inputs": ["a.pdf", {"input": "b.pdf", "pages": "1-3"}], "output": "out/ab.pdf"}
+    {"op": "pages", "input": "big.pdf", "edits": [["rotate", "1-3", 90], ["delete", "7"], ["nup", 2]], "output": "out/edited.pdf"}
+    {"op": "optimize", "input": "scan.pdf", "dpi": 150, "quality": 75, "output": "out/small.pdf"}
+    {"op": "extract_images", "input": "big.pdf", "pages": "1-5", "output": "out/images"}
+
+Relative paths are resolved against the manifest's directory.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Iterator, List, Optional, Tuple
+
+from . import engine
+from .workers import process_pool
+
+PATH_KEYS = ("input", "output")
+
+
+def _resolve(job: dict, base_dir: str) -> dict:
+    job = dict(job)
+    for key in PATH_KEYS:
+        if isinstance(job.get(key), str):
+            job[key] = os.path.join(base_dir, job[key])
+    if isinstance(job.get("inputs"), list):
+        job["inputs"] = [_resolve(p, base_dir) if isinstance(p, dict) else os.path.join(base_dir, p)
+                         for p in job["inputs"]]
+    return job
+
+
+def read_manifest(path: str) -> Iterator[dict]:
+    """Yield jobs from a manifest, streaming JSON Lines files line by line."""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    job = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line_no}: {e}") from None
+                yield _resolve(job, base_dir)
+        return
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("jobs", [])
+    for job in data:
+        yield _resolve(job, base_dir)
+
+
+def _run(job: dict) -> Tuple[int, float]:
+    started = time.perf_counter()
+    pages = engine.run_job(job)
+    return pages, time.perf_counter() - started
+
+
+def run_manifest(jobs: Iterator[dict], workers: int, stop_on_error: bool = False) -> List[dict]:
+    """Run jobs across a process pool and return the failures.
+
+    Only a few jobs per worker are in flight at once, so a manifest with
+    thousands of entries is never fully materialised.
+    """
+    failures: List[dict] = []
+    done = 0
+    pages_total = 0
+    started = time.perf_counter()
+
+    def report(future, job):
+        nonlocal done, pages_total
+        done += 1
+        try:
+            pages, elapsed = future.result()
+        except Exception as e:
+            failures.append({"job": job, "error": str(e)})
+            print(f"[{done}] FAILED {job.get('output')}: {e}", file=sys.stderr)
+        else:
+            pages_total += pages
+            print(f"[{done}] ok {job.get('output')} ({pages} pages, {elapsed:.2f}s)")
+
+    with process_pool(workers) as pool:
+        pending = {}
+        for job in jobs:
+            if stop_on_error and failures:
+                break
+            pending[pool.submit(_run, job)] = job
+            if len(pending) >= workers * 2:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    report(future, pending.pop(future))
+        for future in list(pending):
+            report(future, pending.pop(future))
+
+    elapsed = time.perf_counter() - started
+    print(f"{done} jobs, {pages_total} pages, {len(failures)} failed in {elapsed:.1f}s")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="pdf.py batch",
+        description="Run a manifest of PDF conversions without the GUI."
+    )
+    parser.add_argument("manifest", help="JSON or JSON Lines (.jsonl) job manifest")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--stop-on-error", action="store_true",
+                        help="stop submitting jobs after the first failure")
+    parser.add_argument("--failures", metavar="PATH",
+                        help="write failed jobs to this JSON Lines file")
+    args = parser.parse_args(argv)
+
+    failures = run_manifest(read_manifest(args.manifest), max(1, args.workers),
+                            args.stop_on_error)
+    if args.failures and failures:
+        with open(args.failures, "w", encoding="utf-8") as f:
+            for failure in failures:
+                f.write(json.dumps(failure) + "\n")
+    return 1 if failures else 0
@@ -0,0 +1,269 @@
+"""Caches shared by the previews and the conversion engine."""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """Thread-safe LRU mapping bounded by item count and optionally by cost.
+
+    cost(value) returns a size for each entry (bytes, pixels...); when the
+    summed cost exceeds max_cost the least recently used entries are dropped.
+    """
+
+    def __init__(self, max_items: int = 128, max_cost: Optional[int] = None,
+                 cost: Optional[Callable[[Any], int]] = None):
+        self.max_items = max_items
+        self.max_cost = max_cost
+        self._cost = cost or (lambda value: 1)
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._costs = {}
+        self.total_cost = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            cost = self._cost(value)
+            self._items[key] = value
+            self._costs[key] = cost
+            self.total_cost += cost
+            while self._items and (
+                len(self._items) > self.max_items
+                or (self.max_cost is not None and self.total_cost > self.max_cost)
+            ):
+                oldest = next(iter(self._items))
+                if oldest == key and len(self._items) == 1:
+                    break  # A single oversized entry is still worth keeping
+                self._remove(oldest)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._items:
+                return default
+            return self._remove(key)
+
+    def cost_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Summed cost of the entries whose key matches predicate."""
+        with self._lock:
+            return sum(cost for key, cost in self._costs.items() if predicate(key))
+
+    def remove_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop the entries whose key matches predicate; returns the cost freed."""
+        with self._lock:
+            freed = 0
+            for key in [key for key in self._items if predicate(key)]:
+                freed += self._costs[key]
+                self._remove(key)
+            return freed
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._costs.clear()
+            self.total_cost = 0
+
+    def _remove(self, key: Hashable) -> Any:
+        self.total_cost -= self._costs.pop(key)
+        return self._items.pop(key)
+
+
+def image_cost(img) -> int:
+    """Approximate memory used by a decoded PIL image, in bytes."""
+    return img.width * img.height * len(img.getbands())
+
+
+CACHE_ENV = "MYPDF_CACHE_DIR"
+CACHE_SIZE_ENV = "MYPDF_CACHE_MB"
+DISK_CACHE_MB = 1024
+
+_digests = LRUCache(max_items=256)
+
+
+def cache_root(*parts: str) -> str:
+    """Per-user cache directory (MYPDF_CACHE_DIR overrides), created on demand."""
+    root = os.environ.get(CACHE_ENV)
+    if not root:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        root = os.path.join(base, "mypdf")
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, remembered per (path, size, mtime)."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _digests.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        _digests.put(key, digest)
+    return digest
+
+
+class DiskCache:
+    """Content-addressed file cache bounded by total size, evicting LRU.
+
+    Keys are built from content digests and options with key(), so a
+    changed input simply misses. Entries are written atomically and reads
+    touch the file's mtime, which is what eviction orders by; several
+    processes can share one directory.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or cache_root("objects")
+        if max_bytes is None:
+            max_bytes = int(os.environ.get(CACHE_SIZE_ENV, DISK_CACHE_MB)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None  # Computed on the first write
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Digest of JSON-serialisable parts, e.g. ("page", file_digest(p), 90)."""
+        data = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def path(self, key: str) -> Optional[str]:
+        """File holding key's data, or None; counts as a use for eviction."""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None  # Evicted by another process in between
+
+    def put(self, key: str, data: bytes):
+        self._store(key, len(data), lambda f: f.write(data))
+
+    def put_file(self, key: str, source: str):
+        """Copy a finished file (e.g. a whole output PDF) into the cache."""
+        def copy(f):
+            with open(source, "rb") as src:
+                shutil.copyfileobj(src, f, 1024 * 1024)
+        self._store(key, os.path.getsize(source), copy)
+
+    def copy_to(self, key: str, target: str) -> bool:
+        """Copy key's data to target; False if it is not cached."""
+        path = self.path(key)
+        if path is None:
+            return False
+        tmp = f"{target}.{os.getpid()}.tmp"
+        try:
+            shutil.copyfile(path, tmp)
+        except OSError:
+            return False
+        os.replace(tmp, target)
+        return True
+
+    def _store(self, key: str, size: int, write: Callable):
+        if size > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+        try:
+            replaced = os.path.getsize(path)  # Rewriting a key frees its old data
+        except OSError:
+            replaced = 0
+        os.replace(tmp, path)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += size - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if not entry.name.endswith(".tmp"):
+                        yield entry
+
+    def _scan_size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _evict(self):
+        """Drop least recently used entries down to 90% of max_bytes."""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+    def clear(self):
+        with self._lock:
+            for entry in list(self._entries()):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            self._size = 0
+
+
+_disk_cache: Optional[DiskCache] = None
+
+
+def disk_cache() -> DiskCache:
+    """The process-wide DiskCache in the user cache directory."""
+    global _disk_cache
+    if _disk_cache is None:
+        _disk_cache = DiskCache()
+    return _disk_cache
@@ -0,0 +1,239 @@
+"""GUI-free conversion engine.
+
+Everything the Tk app can do lives here as plain functions that take paths
+and raise exceptions, so the same code runs from the GUI, the batch CLI and
+worker processes. Nothing in this module may import tkinter, customtkinter
+or ImageTk.
+
+The optional progress(done, total) callbacks are called from the thread
+doing the work; total is 0 when it is not known yet.
+"""
+import os
+from typing import List, Optional, Sequence, Union
+
+from PyPDF2 import PdfReader
+
+from . import extract, imagepdf, pdfimages, trace
+from .extract import ProgressCallback
+
+
+@trace.traced("engine.word")
+def convert_word_to_pdf(docx_path: str, output_path: str, cache: bool = True,
+                        progress: Optional[ProgressCallback] = None) -> int:
+    """Convert a .docx file to PDF and return the number of pages written.
+
+    Text is wrapped and paginated, and headings, lists, tables and inline
+    images are kept; see wordlayout and layout. Unchanged documents are
+    copied from the disk cache.
+    """
+    from . import layout
+    return layout.convert_docx(docx_path, output_path, cache=cache, progress=progress)
+
+
+@trace.traced("engine.images")
+def convert_images_to_pdf(image_paths: Sequence[str], output_path: str,
+                          workers: Optional[int] = None, passthrough: bool = True,
+                          cache: bool = True,
+                          progress: Optional[ProgressCallback] = None,
+                          ocr: Optional[str] = None) -> int:
+    """Place each image centred on an A4 page and return the page count.
+
+    JPEGs and plain PNGs are embedded at full quality without decoding
+    (passthrough=False renders every image instead); other images are
+    rendered in a process pool, reusing pages from the disk cache. Pages
+    are streamed to disk; see imagepdf. ocr="eng" (a Tesseract language)
+    adds a searchable text layer; see ocr.
+    """
+    return imagepdf.convert_images_to_pdf(image_paths, output_path, workers, progress,
+                                          passthrough=passthrough, cache=cache,
+                                          ocr_language=ocr)
+
+
+@trace.traced("engine.crop")
+def crop_pdf_pages(source: Union[str, PdfReader], output_path: str,
+                   start_page: int, end_page: int,
+                   progress: Optional[ProgressCallback] = None) -> int:
+    """Copy pages start_page..end_page (1-based, inclusive) to output_path."""
+    with extract.reader_for(source) as reader:
+        total_pages = len(reader.pages)
+        if start_page < 1 or end_page > total_pages or start_page > end_page:
+            raise ValueError(
+                f"Invalid page range {start_page}-{end_page} (document has {total_pages} pages)"
+            )
+        return extract.extract_pages(reader, output_path, range(start_page - 1, end_page),
+                                     progress)
+
+
+@trace.traced("engine.split")
+def split_pdf(source: Union[str, PdfReader], output_pattern: str,
+              every: Optional[int] = None, ranges: Optional[str] = None,
+              progress: Optional[ProgressCallback] = None) -> List[str]:
+    """Split source into several files in one pass over the input.
+
+    Give either every=N pages per part or ranges="1-3,4-10,11-".
+    output_pattern may use {n}, {start} and {end}, e.g. "part-{n:03d}.pdf".
+    """
+    if (every is None) == (ranges is None):
+        raise ValueError("Give either 'every' or 'ranges'")
+    with extract.reader_for(source) as reader:
+        total_pages = len(reader.pages)
+        if every is not None:
+            parts = extract.every_n_pages(int(every), total_pages)
+        else:
+            parts = extract.parse_page_ranges(ranges, total_pages)
+        if len(parts) > 1 and output_pattern.format(n=1, start=1, end=1) == \
+                output_pattern.format(n=2, start=2, end=2):
+            raise ValueError("Output pattern needs {n}, {start} or {end} to name each part")
+        return extract.split_pdf(reader, parts, output_pattern, progress)
+
+
+@trace.traced("engine.merge")
+def merge_pdfs(inputs: Sequence[Union[str, dict]], output_path: str,
+               progress: Optional[ProgressCallback] = None) -> int:
+    """Concatenate PDFs into output_path and return the page count.
+
+    Each input is a path or {"input": path, "pages": "1-3,7"}. Identical
+    fonts and images are stored once, and an interrupted merge resumes
+    where it stopped; see merge.
+    """
+    from . import merge
+    specs = [item if isinstance(item, str) else
+             merge.MergeInput(_require(item, "input"), item.get("pages"))
+             for item in inputs]
+    return merge.merge_pdfs(specs, output_path, progress)
+
+
+@trace.traced("engine.pages")
+def edit_pages(source: Union[str, PdfReader], output_path: str, edits: Sequence[Sequence],
+               progress: Optional[ProgressCallback] = None) -> int:
+    """Apply page edits to source in one write and return the pages written.
+
+    edits is a list like [["rotate", "1-3", 90], ["delete", "7"],
+    ["move", "10-", 1], ["keep", "1-3,7,10-"], ["nup", 2]]; see pageops.
+    """
+    from . import pageops
+    with extract.reader_for(source) as reader:
+        page_edits = pageops.PageEdits(len(reader.pages), edits)
+        return pageops.write_pages(reader, output_path, page_edits, progress)
+
+
+@trace.traced("engine.optimize")
+def optimize_pdf(input_path: str, output_path: str, dpi: int = 150, quality: int = 75,
+                 workers: Optional[int] = None,
+                 progress: Optional[ProgressCallback] = None):
+    """Write a smaller copy of a PDF and return an optimize.OptimizeReport.
+
+    Images shown above dpi are downsampled and saved as JPEGs of the
+    given quality, uncompressed streams are compressed and unused
+    objects dropped; see optimize.
+    """
+    from . import optimize
+    return optimize.optimize_pdf(input_path, output_path, dpi, quality, workers, progress)
+
+
+@trace.traced("engine.extract_images")
+def extract_images(source: Union[str, PdfReader], output_dir: str,
+                   pages: Optional[str] = None,
+                   progress: Optional[ProgressCallback] = None) -> List[str]:
+    """Save every embedded image of source into output_dir; return the files.
+
+    JPEG and JPEG 2000 images are copied as is, others saved as PNG.
+    pages limits the export, e.g. "1-3,7".
+    """
+    with extract.reader_for(source) as reader:
+        indexes = None
+        if pages is not None:
+            ranges = extract.parse_page_ranges(pages, len(reader.pages))
+            indexes = [index for part in ranges for index in part]
+        return pdfimages.extract_all(reader, output_dir, indexes, progress)
+
+
+def _require(job: dict, key: str):
+    if key not in job:
+        raise ValueError(f"Job is missing '{key}'")
+    return job[key]
+
+
+def _run_word(job: dict, progress: Optional[ProgressCallback] = None) -> int:
+    return convert_word_to_pdf(_require(job, "input"), _require(job, "output"),
+                               job.get("cache", True), progress)
+
+
+def _run_images(job: dict, progress: Optional[ProgressCallback] = None) -> int:
+    inputs: List[str] = _require(job, "inputs")
+    # Batch jobs already run in worker processes, so render in-process
+    # unless the manifest asks for a pool of its own
+    return convert_images_to_pdf(inputs, _require(job, "output"), job.get("workers", 1),
+                                 job.get("passthrough", True), job.get("cache", True), progress,
+                                 job.get("ocr"))
+
+
+def _run_crop(job: dict, progress: Optional[ProgressCallback] = None) -> int:
+    return crop_pdf_pages(
+        _require(job, "input"),
+        _require(job, "output"),
+        int(_require(job, "start")),
+        int(_require(job, "end")),
+        progress
+    )
+
+
+def _run_split(job: dict, progress: Optional[ProgressCallback] = None) -> int:
+    outputs = split_pdf(
+        _require(job, "input"),
+        _require(job, "output"),
+        every=job.get("every"),
+        ranges=job.get("ranges"),
+        progress=progress
+    )
+    return len(outputs)
+
+
+def _run_merge(job: dict, progress: Optional[ProgressCallback] = None) -> int:
+    return merge_pdfs(_require(job, "inputs"), _require(job, "output"), progress)
+
+
+def _run_pages(job: dict, progress: Optional[ProgressCallback] = None) -> int:
+    return edit_pages(_require(job, "input"), _require(job, "output"), _require(job, "edits"),
+                      progress)
+
+
+def _run_optimize(job: dict, progress: Optional[ProgressCallback] = None) -> int:
+    report = optimize_pdf(_require(job, "input"), _require(job, "output"),
+                          int(job.get("dpi", 150)), int(job.get("quality", 75)),
+                          job.get("workers", 1), progress)
+    return report.pages
+
+
+def _run_extract_images(job: dict, progress: Optional[ProgressCallback] = None) -> int:
+    return len(extract_images(_require(job, "input"), _require(job, "output"),
+                              job.get("pages"), progress))
+
+
+# Job "op" name -> runner. Runners take the job dict and return the number
+# of pages (or, for split and extract_images, files) written.
+OPERATIONS = {
+    "word": _run_word,
+    "images": _run_images,
+    "crop": _run_crop,
+    "split": _run_split,
+    "merge": _run_merge,
+    "pages": _run_pages,
+    "optimize": _run_optimize,
+    "extract_images": _run_extract_images,
+}
+
+
+def run_job(job: dict, progress: Optional[ProgressCallback] = None) -> int:
+    """Run one manifest job and return the number of pages written."""
+    op = job.get("op")
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {op!r}")
+    output = _require(job, "output")
+    out_dir = os.path.dirname(os.path.abspath(output))
+    os.makedirs(out_dir, exist_ok=True)
+    with trace.span("job", op=op, output=output) as span:
+        pages = OPERATIONS[op](job, progress)
+        span.set(pages=pages)
+    trace.count(f"job.{op}")
+    return pages
@@ -0,0 +1,334 @@
+"""Fast page extraction and splitting.
+
+Instead of PdfWriter.add_page, which clones whole page trees and writes a
+fresh copy of shared resources for every page, we walk only the objects
+reachable from the chosen pages and write each one exactly once through a
+StreamingPdfWriter. Streams are written with their original (still
+compressed) bytes, and streams with identical bytes are merged, so shared
+fonts and images are never decoded, re-encoded or duplicated.
+"""
+import hashlib
+import io
+import itertools
+import re
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    StreamObject,
+)
+
+from . import trace
+from .pdfstream import StreamingPdfWriter, ref
+from .reader import LazyPdfReader
+
+Source = Union[str, PdfReader]
+ProgressCallback = Callable[[int, int], None]
+StreamTransform = Callable[["ObjectCopier", int, StreamObject], Optional[bytes]]
+
+# Keys a page object must not carry over: the parent is rewritten and
+# thread beads point into the source document's structure
+SKIPPED_PAGE_KEYS = {"/Parent", "/B"}
+# Catalog entries a whole-document copy carries over besides the page tree
+CATALOG_KEYS = ("/Outlines", "/AcroForm", "/Names", "/PageLabels", "/Metadata",
+                "/ViewerPreferences", "/PageLayout", "/PageMode", "/OpenAction",
+                "/Lang", "/MarkInfo", "/StructTreeRoot", "/OCProperties")
+# An outline item's links to its siblings and parent, rewritten when outlines are merged
+OUTLINE_LINKS = {"/Parent", "/Prev", "/Next"}
+
+
+@contextmanager
+def reader_for(source: Source) -> Iterator[PdfReader]:
+    """Use an open reader as is, or open a path lazily and close it after."""
+    if isinstance(source, PdfReader):
+        yield source
+    else:
+        with LazyPdfReader(source) as reader:
+            yield reader
+
+
+class ObjectCopier:
+    """Copies objects reachable from pages of one reader into a writer.
+
+    dedup maps stream digests to output object ids; pass the same dict to
+    several copiers to share identical streams across input files.
+    transform(copier, source id, stream) may return the serialized body
+    to write instead of a stream (see stream_body), or None to copy it.
+    """
+
+    def __init__(self, reader: PdfReader, writer: StreamingPdfWriter,
+                 dedup: Optional[Dict[bytes, int]] = None,
+                 transform: Optional[StreamTransform] = None):
+        self.reader = reader
+        self.writer = writer
+        self.dedup = dedup if dedup is not None else {}
+        self.transform = transform
+        self._ids: Dict[int, int] = {}
+        self._pending: List[IndirectObject] = []
+        self._in_progress: Set[int] = set()
+        self._referenced_early: Set[int] = set()
+
+    def id_pairs(self, start: int = 0) -> List[Tuple[int, int]]:
+        """(source id, output id) pairs mapped so far, from the start-th on.
+
+        With restore_ids() this lets a journal carry a copy over a restart.
+        """
+        return list(itertools.islice(self._ids.items(), start, None))
+
+    def restore_ids(self, pairs: Iterable[Sequence[int]]):
+        for source_id, output_id in pairs:
+            self._ids[source_id] = output_id
+
+    def reserve_pages(self, pages: Iterable[DictionaryObject]):
+        """Allocate ids for pages up front so links between them survive."""
+        for page in pages:
+            source_ref = page.indirect_reference
+            if source_ref is not None and source_ref.idnum not in self._ids:
+                self._ids[source_ref.idnum] = self.writer.reserve()
+
+    def add_page(self, page: DictionaryObject, extra: Optional[Dict[str, str]] = None) -> int:
+        """Copy a page (and everything it uses) and return its output id.
+
+        extra holds raw PDF values to set on the copied page, e.g.
+        {"/Rotate": "90"}.
+        """
+        source_ref = page.indirect_reference
+        if source_ref is not None and source_ref.idnum in self._ids:
+            page_id = self._ids[source_ref.idnum]
+        else:
+            page_id = self.writer.reserve()
+            if source_ref is not None:
+                # Annotations point back at their page through /P
+                self._ids[source_ref.idnum] = page_id
+
+        entries = [f"/Parent {ref(self.writer.pages_id)}".encode("latin-1")]
+        for key, value in page.items():
+            if key in SKIPPED_PAGE_KEYS or (extra and key in extra):
+                continue
+            entries.append(self._key(key) + b" " + self.serialize(value))
+        for key, value in (extra or {}).items():
+            entries.append(f"{key} {value}".encode("latin-1"))
+        self.writer.write_object(b"<< " + b" ".join(entries) + b" >>", page_id)
+        self.writer.page_ids.append(page_id)
+        self.flush()
+        return page_id
+
+    def copy_entries(self, source: DictionaryObject, keys: Iterable[str]) -> Dict[str, str]:
+        """Copy source's values for keys, and everything they use.
+
+        Returns raw PDF values by key, for StreamingPdfWriter.catalog or
+        trailer. Copy the pages first so links to them resolve.
+        """
+        entries = {}
+        for key in keys:
+            if key in source:
+                entries[key] = self.serialize(source.raw_get(key)).decode("latin-1")
+        self.flush()
+        return entries
+
+    def copy_outline(self) -> List[Tuple[int, str, int]]:
+        """Copy the reader's outline, except the top-level items themselves.
+
+        Returns (output id, entries, open descendants) for each top-level
+        item in order, where entries is its dictionary without /Parent,
+        /Prev and /Next: the caller writes it once it knows its siblings,
+        which may come from other documents. Everything below them is
+        written here. Copy the pages first so destinations resolve.
+        """
+        root = self.reader.trailer["/Root"]
+        outlines = root["/Outlines"] if "/Outlines" in root else None
+        if not isinstance(outlines, DictionaryObject):
+            return []
+        items = []
+        current = outlines.raw_get("/First") if "/First" in outlines else None
+        seen = set()
+        while isinstance(current, IndirectObject) and current.idnum not in seen:
+            seen.add(current.idnum)
+            item = current.get_object()
+            # Children point back at their item through /Parent
+            if current.idnum not in self._ids:
+                self._ids[current.idnum] = self.writer.reserve()
+            obj_id = self._ids[current.idnum]
+            entries = b" ".join(self._key(k) + b" " + self.serialize(v)
+                                for k, v in item.items() if k not in OUTLINE_LINKS)
+            items.append((obj_id, entries.decode("latin-1"), max(int(item["/Count"]) if "/Count" in item else 0, 0)))
+            current = item.raw_get("/Next") if "/Next" in item else None
+        self.flush()
+        return items
+
+    def copy_form(self, entries: bool = True) -> Tuple[List[int], Dict[str, str]]:
+        """Map the reader's interactive form onto what has been copied.
+
+        Returns the output ids of the top-level /AcroForm /Fields that came
+        along with the copied pages' widgets, in order, and (with entries)
+        the form's other entries such as /DR and /DA as raw PDF values.
+        Fields that only live on pages left out are dropped. Copy the pages
+        first.
+        """
+        root = self.reader.trailer["/Root"]
+        form = root["/AcroForm"] if "/AcroForm" in root else None
+        if not isinstance(form, DictionaryObject):
+            return [], {}
+        fields = form["/Fields"] if "/Fields" in form else []
+        ids = [self._ids[field.idnum] for field in fields
+               if isinstance(field, IndirectObject) and field.idnum in self._ids]
+        if not entries:
+            return ids, {}
+        return ids, self.copy_entries(form, [key for key in form if key != "/Fields"])
+
+    def flush(self):
+        """Write every object that has been referenced but not written yet."""
+        while self._pending:
+            indirect = self._pending.pop()
+            self.writer.write_object(self.serialize(indirect.get_object()),
+                                     self._ids[indirect.idnum])
+
+    def serialize(self, obj) -> bytes:
+        if obj is None:
+            return b"null"
+        if isinstance(obj, IndirectObject):
+            return ref(self._resolve(obj)).encode("latin-1")
+        if isinstance(obj, StreamObject):
+            data = obj._data if isinstance(obj._data, bytes) else obj._data.encode("latin-1")
+            return self.stream_body(obj, data)
+        if isinstance(obj, DictionaryObject):
+            return b"<< " + b" ".join(self._key(k) + b" " + self.serialize(v)
+                                      for k, v in obj.items()) + b" >>"
+        if isinstance(obj, ArrayObject):
+            return b"[" + b" ".join(self.serialize(v) for v in obj) + b"]"
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer, None)
+        return buffer.getvalue()
+
+    def stream_body(self, obj: StreamObject, data: bytes,
+                    changes: Optional[Dict[str, Optional[str]]] = None) -> bytes:
+        """Serialize obj's dictionary around data.
+
+        changes maps keys to raw PDF values to set, or to None to drop them.
+        """
+        changes = changes or {}
+        entries = [self._key(k) + b" " + self.serialize(v)
+                   for k, v in obj.items() if k != "/Length" and k not in changes]
+        entries += [f"{k} {v}".encode("latin-1") for k, v in changes.items() if v is not None]
+        head = b"<< " + b" ".join(entries) + b" /Length %d >>\nstream\n" % len(data)
+        return head + data + b"\nendstream"
+
+    def _key(self, key) -> bytes:
+        buffer = io.BytesIO()
+        NameObject(key).write_to_stream(buffer, None)
+        return buffer.getvalue()
+
+    def _resolve(self, indirect: IndirectObject) -> int:
+        idnum = indirect.idnum
+        if idnum in self._ids:
+            if idnum in self._in_progress:
+                self._referenced_early.add(idnum)
+            return self._ids[idnum]
+
+        obj = indirect.get_object()
+        if isinstance(obj, DictionaryObject) and obj.get("/Type") in ("/Page", "/Pages"):
+            # A link to a page we are not copying: do not drag in the
+            # source's page tree, point at an empty dictionary instead
+            obj_id = self.writer.write_object("<< >>")
+            self._ids[idnum] = obj_id
+            return obj_id
+
+        obj_id = self.writer.reserve()
+        self._ids[idnum] = obj_id
+        if not isinstance(obj, StreamObject):
+            self._pending.append(indirect)
+            return obj_id
+
+        # Streams are written straight away so identical ones can be merged
+        self._in_progress.add(idnum)
+        body = self.transform(self, idnum, obj) if self.transform else None
+        if body is None:
+            body = self.serialize(obj)
+        self._in_progress.discard(idnum)
+        digest = hashlib.sha1(body).digest()
+        existing = self.dedup.get(digest)
+        if existing is not None and idnum not in self._referenced_early:
+            trace.count("pdf.streams_deduplicated")
+            self._ids[idnum] = existing
+            return existing
+        self.writer.write_object(body, obj_id)
+        self.dedup.setdefault(digest, obj_id)
+        return obj_id
+
+
+def parse_page_ranges(spec: str, page_count: int) -> List[range]:
+    """Parse "1-3,7,10-" into 0-based ranges; an open end means the last page."""
+    ranges = []
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        match = re.fullmatch(r"(\d*)(-?)(\d*)", part)
+        if not match or not (match.group(1) or match.group(3)):
+            raise ValueError(f"Invalid page range: {part!r}")
+        start = int(match.group(1)) if match.group(1) else 1
+        if match.group(2):
+            end = int(match.group(3)) if match.group(3) else page_count
+        else:
+            end = start
+        if start < 1 or end > page_count or start > end:
+            raise ValueError(f"Invalid page range {part!r} (document has {page_count} pages)")
+        ranges.append(range(start - 1, end))
+    if not ranges:
+        raise ValueError("No pages selected")
+    return ranges
+
+
+def every_n_pages(n: int, page_count: int) -> List[range]:
+    if n < 1:
+        raise ValueError("Pages per part must be at least 1")
+    return [range(i, min(i + n, page_count)) for i in range(0, page_count, n)]
+
+
+def extract_pages(source: Source, output_path: str, pages: Iterable[int],
+                  progress: Optional[ProgressCallback] = None) -> int:
+    """Write the given 0-based pages of source to output_path.
+
+    progress(done, total) is called after each page.
+    """
+    count = 0
+    with trace.span("pdf.write", output=output_path) as span, \
+            reader_for(source) as reader, StreamingPdfWriter(output_path) as writer:
+        copier = ObjectCopier(reader, writer)
+        pages = [reader.pages[index] for index in pages]
+        copier.reserve_pages(pages)
+        for page in pages:
+            copier.add_page(page)
+            count += 1
+            if progress:
+                progress(count, len(pages))
+        span.set(pages=count)
+    return count
+
+
+def split_pdf(source: Source, ranges: Sequence[Sequence[int]],
+              output_pattern: str, progress: Optional[ProgressCallback] = None) -> List[str]:
+    """Write each range of pages to its own file, reading source once.
+
+    output_pattern may use {n} (1-based part number), {start} and {end}
+    (1-based page numbers), e.g. "out/part-{n:03d}.pdf". progress gets
+    pages written over all parts.
+    """
+    outputs = []
+    total = sum(len(pages) for pages in ranges)
+    written = 0
+    with reader_for(source) as reader:
+        for n, pages in enumerate(ranges, 1):
+            pages = list(pages)
+            if not pages:
+                continue
+            output_path = output_pattern.format(n=n, start=pages[0] + 1, end=pages[-1] + 1)
+            part_progress = (lambda done, _, before=written: progress(before + done, total)) \
+                if progress else None
+            written += extract_pages(reader, output_path, pages, part_progress)
+            outputs.append(output_path)
+    return outputs
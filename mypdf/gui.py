@@ -0,0 +1,1133 @@
+import os
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import customtkinter as ctk
+from typing import TYPE_CHECKING, List, Optional
+
+from . import trace
+from .cache import LRUCache, image_cost
+from .preview import PREVIEW_SIZE
+from .session import Document, MissingDependency, ResourceManager
+
+# PyPDF2, PIL, reportlab and the modules built on them are imported by the
+# mode that first needs them, so the window comes up without them; see
+# benchmarks/startup.py
+if TYPE_CHECKING:
+    from .jobs import JobQueue
+    from .thumbgrid import ThumbnailGrid
+    from .thumbnails import ThumbnailLoader
+
+# Conversions that may run at the same time; each can use a process pool
+JOB_WORKERS = 2
+JOB_POLL_MS = 150
+TAB_TITLE = 24  # Longer file names are shortened on their tab
+NUP_CHOICES = ["1", "2", "4", "6", "9", "16"]
+WORD_POLL_MS = 250  # Page count updates while Word pages are laid out
+
+
+def _document_field(name, default=None):
+    """A view attribute that lives on the document in the active tab."""
+    def get(self):
+        return default if self.doc is None else getattr(self.doc, name)
+
+    def set(self, value):
+        setattr(self.doc, name, value)
+    return property(get, set)
+
+
+class ModernPDFTool:
+    # What the views show comes from the active tab's Document
+    current_mode = _document_field("mode")
+    current_file = _document_field("path")
+    current_pdf = _document_field("reader")
+    total_pages = _document_field("page_count", 0)
+    current_page = _document_field("position", 0)
+    current_page_index = _document_field("position", 0)
+    current_image_index = _document_field("position", 0)
+    page_order = _document_field("order", ())
+    page_edits = _document_field("edits")
+    image_order = _document_field("order", ())
+    image_files = _document_field("files", ())
+    merge_files = _document_field("files", ())
+    page_renderer = _document_field("page_renderer")
+    text_index = _document_field("text_index")
+    word_layout = _document_field("word_layout")
+
+    def __init__(self):
+        self.root = ctk.CTk()
+        self.root.title("PDF Manager")
+        self.root.geometry("1000x700")
+        ctk.set_appearance_mode("light")
+        ctk.set_default_color_theme("blue")
+        
+        # Decoded previews and their PhotoImages, keyed by file path so
+        # reordering never triggers a re-decode
+        self.preview_images = LRUCache(max_items=256, max_cost=256 * 1024 * 1024,
+                                       cost=image_cost)
+        self.preview_photos = LRUCache(max_items=32)
+        # Open tabs; the least recently used are unloaded past the memory
+        # budget and reloaded when shown again
+        self.doc: Optional[Document] = None
+        self.documents: List[Document] = []
+        self.tab_rows = {}
+        self.resources = ResourceManager(caches=[
+            (self.preview_images, os.path.abspath),
+            (self.preview_photos, os.path.abspath),
+        ])
+        self.word_photos = []  # PhotoImages on the Word preview
+        self.render_poll = None
+        self.word_poll = None
+        self.thumb_loader: Optional["ThumbnailLoader"] = None
+        self.thumb_grid: Optional["ThumbnailGrid"] = None
+        self.grid_visible = False
+        # Mode controls and the preview panel are built on first use
+        self.crop_frame = None
+        self.image_controls_frame = None
+        self.preview_frame = None
+        # Conversions run in the background, on a queue started by the
+        # first one; see poll_jobs, which runs while any job is active
+        self.jobs: Optional["JobQueue"] = None
+        self.job_rows = {}
+        self.jobs_poll = None
+        
+        self.filename_label = ttk.Label(
+            self.root,
+            text="No PDF selected",
+            font=("Helvetica", 10)
+        )
+        self.filename_label.pack(pady=5)
+        
+        self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+    def setup_ui(self):
+        # Main container
+        self.main_frame = ctk.CTkFrame(self.root)
+        self.main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Left panel for controls
+        self.left_panel = ctk.CTkFrame(self.main_frame, width=250)
+        self.left_panel.pack(side="left", fill="y", padx=(0, 10))
+        self.left_panel.pack_propagate(False)  # Prevent shrinking
+        
+        # Right panel for preview
+        self.right_panel = ctk.CTkFrame(self.main_frame)
+        self.right_panel.pack(side="right", fill="both", expand=True)
+        
+        self.setup_left_panel()
+        
+    def setup_left_panel(self):
+        # Title
+        ctk.CTkLabel(
+            self.left_panel,
+            text="PDF Manager",
+            font=("Helvetica", 20, "bold")
+        ).pack(pady=(20, 30))
+        
+        # Conversion buttons
+        conversion_frame = ctk.CTkFrame(self.left_panel)
+        conversion_frame.pack(fill="x", padx=20)
+        
+        buttons = [
+            ("Word → PDF", lambda: self.start_conversion("word")),
+            ("Images → PDF", lambda: self.start_conversion("images")),
+            ("Crop PDF", lambda: self.start_conversion("crop")),
+            ("Merge PDFs", lambda: self.start_conversion("merge"))
+        ]
+        
+        for text, command in buttons:
+            ctk.CTkButton(
+                conversion_frame,
+                text=text,
+                command=command,
+                width=200,
+                height=40,
+                corner_radius=8
+            ).pack(pady=10)
+        
+        # Job queue
+        self.jobs_frame = ctk.CTkFrame(self.left_panel)
+        self.jobs_frame.pack(side="bottom", fill="x", padx=10, pady=10)
+        ctk.CTkLabel(self.jobs_frame, text="Jobs", font=("Helvetica", 14, "bold")).pack(pady=(5, 0))
+        self.job_list = ctk.CTkScrollableFrame(self.jobs_frame, height=120)
+        self.job_list.pack(fill="x", padx=5)
+        ctk.CTkButton(
+            self.jobs_frame,
+            text="Clear Finished",
+            command=self.clear_finished_jobs,
+            width=200
+        ).pack(pady=5)
+
+    def setup_crop_frame(self):
+        # Crop controls, built when a PDF is first opened
+        self.crop_frame = ctk.CTkFrame(self.left_panel)
+        
+        ctk.CTkLabel(self.crop_frame, text="Page Range").pack(pady=(10, 5))
+        range_frame = ctk.CTkFrame(self.crop_frame)
+        range_frame.pack(fill="x", padx=10)
+        
+        ctk.CTkLabel(range_frame, text="Start:").pack(side="left", padx=5)
+        self.crop_start = ctk.CTkEntry(range_frame, width=50)
+        self.crop_start.pack(side="left", padx=5)
+        
+        ctk.CTkLabel(range_frame, text="End:").pack(side="left", padx=5)
+        self.crop_end = ctk.CTkEntry(range_frame, width=50)
+        self.crop_end.pack(side="left", padx=5)
+        
+        # Text search over the whole document
+        ctk.CTkLabel(self.crop_frame, text="Find Text").pack(pady=(15, 5))
+        self.search_entry = ctk.CTkEntry(self.crop_frame, width=200)
+        self.search_entry.pack(padx=10)
+        self.search_entry.bind("<Return>", lambda event: self.find_next())
+        
+        search_buttons = ctk.CTkFrame(self.crop_frame)
+        search_buttons.pack(fill="x", padx=10, pady=5)
+        ctk.CTkButton(
+            search_buttons,
+            text="Find Next",
+            command=self.find_next,
+            width=95
+        ).pack(side="left", padx=2)
+        ctk.CTkButton(
+            search_buttons,
+            text="Use as Range",
+            command=self.range_from_matches,
+            width=95
+        ).pack(side="left", padx=2)
+        
+        self.search_status = ctk.CTkLabel(self.crop_frame, text="", wraplength=200)
+        self.search_status.pack(pady=(0, 10))
+        
+        ctk.CTkButton(
+            self.crop_frame,
+            text="Extract Images",
+            command=self.extract_images,
+            width=200
+        ).pack(pady=(0, 10))
+        
+        # Optimize: downsample images to DPI, recompress at JPEG quality
+        optimize_frame = ctk.CTkFrame(self.crop_frame)
+        optimize_frame.pack(fill="x", padx=10)
+        ctk.CTkLabel(optimize_frame, text="DPI:").pack(side="left", padx=5)
+        self.optimize_dpi = ctk.CTkEntry(optimize_frame, width=50)
+        self.optimize_dpi.insert(0, "150")
+        self.optimize_dpi.pack(side="left", padx=5)
+        ctk.CTkLabel(optimize_frame, text="Quality:").pack(side="left", padx=5)
+        self.optimize_quality = ctk.CTkEntry(optimize_frame, width=40)
+        self.optimize_quality.insert(0, "75")
+        self.optimize_quality.pack(side="left", padx=5)
+        ctk.CTkButton(
+            self.crop_frame,
+            text="Optimize PDF",
+            command=self.optimize_pdf,
+            width=200
+        ).pack(pady=(5, 10))
+        
+        # Page edits are only recorded here and written on save
+        ctk.CTkLabel(self.crop_frame, text="Edit Pages").pack(pady=(5, 5))
+        self.edit_pages_entry = ctk.CTkEntry(
+            self.crop_frame,
+            width=200,
+            placeholder_text="Pages, e.g. 1-3,7,10-"
+        )
+        self.edit_pages_entry.pack(padx=10)
+        
+        for row in (
+            (("⟲ Rotate", lambda: self.edit_pages("rotate", -90)),
+             ("⟳ Rotate", lambda: self.edit_pages("rotate", 90))),
+            (("Delete", lambda: self.edit_pages("delete")),
+             ("Keep Only", lambda: self.edit_pages("keep"))),
+        ):
+            row_frame = ctk.CTkFrame(self.crop_frame)
+            row_frame.pack(fill="x", padx=10, pady=(5, 0))
+            for text, command in row:
+                ctk.CTkButton(
+                    row_frame,
+                    text=text,
+                    command=command,
+                    width=95
+                ).pack(side="left", padx=2)
+        
+        nup_frame = ctk.CTkFrame(self.crop_frame)
+        nup_frame.pack(fill="x", padx=10, pady=5)
+        ctk.CTkLabel(nup_frame, text="Per sheet:").pack(side="left", padx=5)
+        self.nup_menu = ctk.CTkOptionMenu(
+            nup_frame,
+            values=NUP_CHOICES,
+            command=lambda value: self.edit_pages("nup", int(value)),
+            width=60
+        )
+        self.nup_menu.pack(side="left", padx=2)
+        ctk.CTkButton(
+            nup_frame,
+            text="Undo",
+            command=self.undo_page_edit,
+            width=60
+        ).pack(side="right", padx=2)
+        
+        self.edits_status = ctk.CTkLabel(self.crop_frame, text="", wraplength=200)
+        self.edits_status.pack()
+        ctk.CTkButton(
+            self.crop_frame,
+            text="Save Edited PDF",
+            command=self.save_page_edits,
+            width=200
+        ).pack(pady=(0, 10))
+
+    def setup_image_controls(self):
+        # Image order controls, built when images are first selected
+        self.image_controls_frame = ctk.CTkFrame(self.left_panel)
+        move_frame = ctk.CTkFrame(self.image_controls_frame)
+        move_frame.pack()
+        
+        ctk.CTkButton(
+            move_frame,
+            text="↑ Move Up",
+            command=self.move_image_up,
+            width=95
+        ).pack(side="left", padx=2)
+        
+        ctk.CTkButton(
+            move_frame,
+            text="↓ Move Down",
+            command=self.move_image_down,
+            width=95
+        ).pack(side="left", padx=2)
+        
+        # OCR adds invisible text so scans can be searched
+        self.ocr_checkbox = ctk.CTkCheckBox(
+            self.image_controls_frame,
+            text="Searchable text (OCR)"
+        )
+        self.ocr_checkbox.pack(pady=(5, 0))
+
+    def setup_right_panel(self):
+        # Built the first time a preview is shown
+        # Tabs, one per open document
+        tabs_bar = ctk.CTkFrame(self.right_panel)
+        tabs_bar.pack(fill="x", padx=10, pady=(10, 0))
+        self.memory_label = ctk.CTkLabel(tabs_bar, text="", font=("Helvetica", 10))
+        self.memory_label.pack(side="right", padx=5)
+        self.tabs_frame = ctk.CTkScrollableFrame(tabs_bar, orientation="horizontal", height=32)
+        self.tabs_frame.pack(side="left", fill="x", expand=True)
+        
+        # Preview label
+        self.preview_label = ctk.CTkLabel(
+            self.right_panel,
+            text="Preview",
+            font=("Helvetica", 16, "bold")
+        )
+        self.filename_label = ctk.CTkLabel(
+            self.right_panel,
+            text="",
+            font=("Helvetica", 12)
+        )
+        
+        # Preview canvas
+        self.preview_frame = ctk.CTkFrame(self.right_panel)
+        self.preview_canvas = ctk.CTkCanvas(
+            self.preview_frame,
+            width=600,
+            height=500,
+            bg="white"
+        )
+        self.preview_canvas.pack(pady=10, padx=10, fill="both", expand=True)
+
+        
+        # Navigation and convert frame
+        self.navigation_frame = ctk.CTkFrame(self.right_panel)
+        
+        # Previous button
+        self.prev_btn = ctk.CTkButton(
+            self.navigation_frame,
+            text="← Previous",
+            command=self.prev_page,
+            width=100
+        )
+        self.prev_btn.pack(side="left", padx=5)
+        
+        # Convert button (in the middle)
+        self.convert_btn = ctk.CTkButton(
+            self.navigation_frame,
+            text="Convert",
+            command=self.convert_files,
+            width=150,
+            height=40,
+            fg_color="#28a745",  # Green color
+            hover_color="#218838"  # Darker green for hover
+        )
+        self.convert_btn.pack(side="left", padx=20)
+        
+        self.grid_btn = ctk.CTkButton(
+            self.navigation_frame,
+            text="Grid",
+            command=self.toggle_grid,
+            width=70
+        )
+        self.grid_btn.pack(side="left", padx=5)
+        
+        # Page label
+        self.page_label = ctk.CTkLabel(self.navigation_frame, text="")
+        self.page_label.pack(side="left", padx=5)
+        
+        # Next button
+        self.next_btn = ctk.CTkButton(
+            self.navigation_frame,
+            text="Next →",
+            command=self.next_page,
+            width=100
+        )
+        self.next_btn.pack(side="right", padx=5)
+
+    def show_preview_elements(self):
+        if self.preview_frame is None:
+            self.setup_right_panel()
+        self.preview_label.pack(pady=(15, 5))
+        self.filename_label.pack(pady=(0, 5))
+        self.preview_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.navigation_frame.pack(fill="x", pady=10, padx=10)
+
+    def hide_preview_elements(self):
+        if self.preview_frame is None:
+            return
+        self.preview_label.pack_forget()
+        self.filename_label.pack_forget()
+        self.preview_frame.pack_forget()
+        self.navigation_frame.pack_forget()
+
+    def start_conversion(self, mode):
+        # Each file (or set of files) opens in a tab of its own
+        if mode == "word":
+            self.select_word_file()
+        elif mode == "images":
+            self.select_images()
+        elif mode == "crop":
+            self.select_pdf_for_crop()
+        elif mode == "merge":
+            self.select_pdfs_for_merge()
+
+    def select_word_file(self):
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Word Files", "*.docx")]
+        )
+        if file_path:
+            self.open_document(Document("word", path=file_path))
+
+    @trace.traced("ui.render.word")
+    def display_current_page(self):
+        from PIL import Image, ImageTk
+        from . import layout
+        self.preview_canvas.delete("all")
+        self.word_photos = []
+        page = self.word_layout.page(self.current_page_index) if self.word_layout else None
+        if page is not None:
+            page_w, page_h = self.word_layout.page_size
+            scale = min(PREVIEW_SIZE[0] / page_w, PREVIEW_SIZE[1] / page_h)
+            # Center the page on the canvas
+            left = 10 + (PREVIEW_SIZE[0] - page_w * scale) / 2
+            top = 10 + (PREVIEW_SIZE[1] - page_h * scale) / 2
+            
+            def to_canvas(x, y):
+                return left + x * scale, top + (page_h - y) * scale
+            
+            self.preview_canvas.create_rectangle(
+                left, top, left + page_w * scale, top + page_h * scale, outline="#cccccc"
+            )
+            for placement in page:
+                for item in layout.preview_items(placement):
+                    if isinstance(item, layout.TextLine):
+                        x, y = to_canvas(item.x, item.baseline)
+                        weight = "bold" if "Bold" in item.font else "normal"
+                        self.preview_canvas.create_text(
+                            x, y, text=item.text, anchor="sw",
+                            font=("Helvetica", -max(1, int(item.size * scale)), weight)
+                        )
+                    elif isinstance(item, layout.ImageBox):
+                        x, y = to_canvas(item.x, item.y + item.height)
+                        size = (max(1, int(item.width * scale)), max(1, int(item.height * scale)))
+                        try:
+                            if hasattr(item.source, "seek"):
+                                item.source.seek(0)
+                            img = Image.open(item.source)
+                            img.draft("RGB", size)
+                            photo = ImageTk.PhotoImage(img.convert("RGB").resize(size))
+                        except Exception:
+                            self.preview_canvas.create_rectangle(
+                                x, y, x + size[0], y + size[1], outline="#999999"
+                            )
+                            continue
+                        self.word_photos.append(photo)  # Keep a reference
+                        self.preview_canvas.create_image(x, y, image=photo, anchor="nw")
+                    elif isinstance(item, layout.Box):
+                        x0, y0 = to_canvas(item.x0, item.y1)
+                        x1, y1 = to_canvas(item.x1, item.y0)
+                        self.preview_canvas.create_rectangle(x0, y0, x1, y1, outline="#999999")
+        self.update_page_label()
+
+    def poll_word_layout(self):
+        self.word_poll = None
+        layout = self.word_layout
+        if self.current_mode != "word" or layout is None:
+            return
+        self.update_page_label()
+        if not layout.complete and layout.error is None:
+            self.word_poll = self.root.after(WORD_POLL_MS, self.poll_word_layout)
+
+    def select_images(self):
+        image_files = filedialog.askopenfilenames(
+            filetypes=[("Image Files", "*.jpg *.jpeg *.png")]
+        )
+        if image_files:
+            # Files are only decoded when they are first previewed
+            self.open_document(Document("images", files=image_files))
+
+    def select_pdfs_for_merge(self):
+        merge_files = filedialog.askopenfilenames(
+            filetypes=[("PDF Files", "*.pdf")]
+        )
+        if merge_files:
+            self.open_document(Document("merge", files=merge_files))
+
+    def select_pdf_for_crop(self):
+        file_path = filedialog.askopenfilename(
+            filetypes=[("PDF Files", "*.pdf")]
+        )
+        if file_path:
+            self.open_document(Document("crop", path=file_path))
+
+    def open_document(self, doc):
+        self.documents.append(doc)
+        self.resources.add(doc)
+        self.activate_document(doc)
+
+    def activate_document(self, doc):
+        if self.preview_frame is None:
+            self.setup_right_panel()
+        try:
+            released = self.resources.use(doc)
+        except MissingDependency as e:
+            messagebox.showerror("Error", str(e))
+            self.close_document(doc)
+            return
+        except Exception as e:
+            kind = {"word": "reading Word file", "crop": "opening PDF"}.get(doc.mode, "opening files")
+            messagebox.showerror(
+                "Error",
+                f"Error {kind}: {str(e)}"
+            )
+            self.close_document(doc)
+            return
+        
+        # Tear down the previous tab's controls
+        for frame in (self.crop_frame, self.image_controls_frame):
+            if frame is not None:
+                frame.pack_forget()
+        self.hide_grid()
+        self.doc = doc
+        self.show_preview_elements()
+        self.preview_canvas.delete("all")
+        self.filename_label.configure(text=f"File: {doc.title}")
+        
+        if doc.mode == "word":
+            self.display_current_page()
+            # The first page is up; lay out the rest while it is read
+            self.word_layout.start_background()
+            if self.word_poll is None:
+                self.poll_word_layout()
+        elif doc.mode == "images":
+            if self.image_controls_frame is None:
+                self.setup_image_controls()
+            self.image_controls_frame.pack(pady=5)
+            self.display_current_image()
+            self.update_page_label()
+        elif doc.mode == "crop":
+            if self.crop_frame is None:
+                self.setup_crop_frame()
+            self.crop_frame.pack(pady=5)
+            self.update_edits_status()
+            self.poll_text_index()
+            self.update_preview()
+        elif doc.mode == "merge":
+            self.filename_label.configure(text=f"{len(self.merge_files)} PDFs to merge")
+            self.page_label.configure(text="")
+            # Merged in the order they are listed
+            self.preview_canvas.create_text(
+                20, 20,
+                anchor="nw",
+                text="\n".join(f"{i}. {os.path.basename(path)}"
+                               for i, path in enumerate(self.merge_files, 1))
+            )
+        self.update_tabs(released)
+
+    def close_document(self, doc):
+        self.resources.close(doc)
+        if doc in self.documents:
+            self.documents.remove(doc)
+        row = self.tab_rows.pop(doc.id, None)
+        if row is not None:
+            row[0].destroy()
+        if doc is not self.doc:
+            self.update_tabs()
+            return
+        self.doc = None
+        remaining = list(self.resources.documents.values())
+        if remaining:
+            # Back to the most recently used tab
+            self.activate_document(remaining[-1])
+        else:
+            for frame in (self.crop_frame, self.image_controls_frame):
+                if frame is not None:
+                    frame.pack_forget()
+            self.hide_grid()
+            self.hide_preview_elements()
+            self.update_tabs()
+
+    def update_tabs(self, released=()):
+        for doc in self.documents:
+            row = self.tab_rows.get(doc.id)
+            if row is None:
+                frame = ctk.CTkFrame(self.tabs_frame)
+                frame.pack(side="left", padx=2)
+                title = doc.title if len(doc.title) <= TAB_TITLE else doc.title[:TAB_TITLE - 1] + "…"
+                button = ctk.CTkButton(frame, text=title, width=80, height=26,
+                                       command=lambda doc=doc: self.activate_document(doc))
+                button.pack(side="left")
+                close = ctk.CTkButton(frame, text="✕", width=26, height=26,
+                                      command=lambda doc=doc: self.close_document(doc))
+                close.pack(side="left", padx=(2, 0))
+                row = self.tab_rows[doc.id] = (frame, button, close)
+            _, button, _ = row
+            if doc is self.doc:
+                button.configure(fg_color="#1f6aa5", text_color="white")
+            else:
+                # Unloaded tabs are greyed out; they reopen when clicked
+                button.configure(fg_color="#e5e5e5",
+                                 text_color="black" if doc.loaded else "#888888")
+        usage = self.resources.usage() / 1048576
+        budget = self.resources.budget / 1048576
+        self.memory_label.configure(text=f"{usage:.0f}/{budget:.0f} MB")
+        if released:
+            trace.event("ui.tabs.released", documents=[doc.title for doc in released])
+
+    def poll_text_index(self):
+        index = self.text_index
+        if index is None:
+            return
+        if index.error:
+            self.search_status.configure(text=f"Text search unavailable: {index.error}")
+        elif index.complete:
+            self.search_status.configure(text=f"Text indexed ({index.page_count} pages)")
+        else:
+            self.search_status.configure(text=f"Indexing text: {index.done}/{index.page_count} pages")
+            self.root.after(250, self.poll_text_index)
+
+    def find_next(self):
+        if self.text_index is None:
+            return
+        matches = self.text_index.pages_matching(self.search_entry.get())
+        if not matches:
+            pending = "" if self.text_index.complete else " yet"
+            self.search_status.configure(text=f"No matches{pending}")
+            return
+        # Next match after the page on screen, wrapping around
+        following = [page for page in matches if page > self.current_page]
+        self.current_page = following[0] if following else matches[0]
+        self.search_status.configure(
+            text=f"Match {matches.index(self.current_page) + 1}/{len(matches)}: "
+                 f"page {self.current_page + 1}"
+        )
+        self.update_preview()
+
+    def range_from_matches(self):
+        if self.text_index is None:
+            return
+        matches = self.text_index.pages_matching(self.search_entry.get())
+        if not matches:
+            self.search_status.configure(text="No matches")
+            return
+        self.crop_start.delete(0, "end")
+        self.crop_start.insert(0, str(matches[0] + 1))
+        self.crop_end.delete(0, "end")
+        self.crop_end.insert(0, str(matches[-1] + 1))
+        self.search_status.configure(
+            text=f"Pages {matches[0] + 1}-{matches[-1] + 1} ({len(matches)} contain the text)"
+        )
+
+    def optimize_pdf(self):
+        try:
+            dpi = int(self.optimize_dpi.get())
+            quality = int(self.optimize_quality.get())
+            if dpi < 1 or not 1 <= quality <= 95:
+                raise ValueError("DPI must be positive and quality between 1 and 95")
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid optimize settings: {str(e)}")
+            return
+        output_file = self.ask_output_file()
+        if output_file:
+            self.queue_job(
+                f"Optimize {os.path.basename(self.current_file)}",
+                {"op": "optimize", "input": self.current_file, "output": output_file,
+                 "dpi": dpi, "quality": quality, "workers": None}
+            )
+
+    def extract_images(self):
+        output_dir = filedialog.askdirectory(title="Save images to")
+        if output_dir:
+            self.queue_job(
+                f"Images of {os.path.basename(self.current_file)}",
+                {"op": "extract_images", "input": self.current_file, "output": output_dir}
+            )
+
+    def move_image_up(self):
+        if self.current_image_index > 0:
+            # Swap positions in image_order
+            idx = self.current_image_index
+            self.image_order[idx], self.image_order[idx-1] = \
+                self.image_order[idx-1], self.image_order[idx]
+            self.current_image_index -= 1
+            self.display_current_image()
+            self.update_page_label()
+            self.refresh_grid()
+
+    def move_image_down(self):
+        if self.current_image_index < len(self.image_order) - 1:
+            # Swap positions in image_order
+            idx = self.current_image_index
+            self.image_order[idx], self.image_order[idx+1] = \
+                self.image_order[idx+1], self.image_order[idx]
+            self.current_image_index += 1
+            self.display_current_image()
+            self.update_page_label()
+            self.refresh_grid()
+
+    def toggle_grid(self):
+        if self.grid_visible:
+            self.hide_grid()
+        else:
+            self.show_grid()
+
+    def show_grid(self):
+        if self.current_mode not in ("images", "crop"):
+            return
+        if self.thumb_grid is None:
+            from .thumbgrid import ThumbnailGrid
+            from .thumbnails import ThumbnailLoader
+            self.thumb_loader = ThumbnailLoader()
+            # Shown instead of the canvas by the Grid button
+            self.thumb_grid = ThumbnailGrid(
+                self.preview_frame,
+                self.thumb_loader,
+                on_select=self.select_from_grid,
+                on_open=self.open_from_grid,
+                on_move=self.move_from_grid
+            )
+        self.preview_canvas.pack_forget()
+        self.thumb_grid.frame.pack(pady=10, padx=10, fill="both", expand=True)
+        self.grid_btn.configure(text="Single")
+        self.grid_visible = True
+        self.refresh_grid()
+
+    def hide_grid(self):
+        if not self.grid_visible:
+            return
+        self.thumb_grid.close()
+        self.thumb_grid.frame.pack_forget()
+        self.preview_canvas.pack(pady=10, padx=10, fill="both", expand=True)
+        self.grid_btn.configure(text="Grid")
+        self.grid_visible = False
+
+    def refresh_grid(self):
+        if not self.grid_visible:
+            return
+        from .thumbnails import image_key, page_key
+        if self.current_mode == "images":
+            paths = [self.image_files[i] for i in self.image_order]
+            self.thumb_grid.set_items(
+                [image_key(path) for path in paths],
+                [os.path.basename(path) for path in paths],
+                self.current_image_index
+            )
+        elif self.current_mode == "crop" and self.current_pdf is not None:
+            self.thumb_grid.set_items(
+                [page_key(self.current_file, i) for i in self.page_order],
+                [f"{i + 1} ⟳{self.page_edits.rotation[i]}" if self.page_edits.rotation.get(i)
+                 else str(i + 1) for i in self.page_order],
+                self.page_position()
+            )
+
+    def select_from_grid(self, index):
+        if self.current_mode == "images":
+            self.current_image_index = index
+        elif self.current_mode == "crop":
+            self.current_page = self.page_order[index]
+        self.update_page_label()
+
+    def open_from_grid(self, index):
+        self.select_from_grid(index)
+        self.hide_grid()
+        if self.current_mode == "images":
+            self.display_current_image()
+        elif self.current_mode == "crop":
+            self.update_preview()
+
+    def move_from_grid(self, source, target):
+        # The grid has already moved its own cell
+        if self.current_mode == "crop":
+            self.page_edits.move(str(source + 1), target + 1)
+            self.page_order = list(self.page_edits.pages)
+            self.update_edits_status()
+        else:
+            self.image_order.insert(target, self.image_order.pop(source))
+        self.select_from_grid(target)
+
+    def page_position(self):
+        """Where the page in view is among the pages as edited."""
+        try:
+            return self.page_order.index(self.current_page)
+        except ValueError:
+            return 0
+
+    def edit_pages(self, name, *args):
+        spec = self.edit_pages_entry.get().strip() or str(self.page_position() + 1)
+        self.record_page_edit([name] + ([] if name == "nup" else [spec]) + list(args))
+
+    def undo_page_edit(self):
+        if self.page_edits is not None and self.page_edits.changed:
+            self.record_page_edit(None)
+
+    def record_page_edit(self, op):
+        # Only the page list is replayed; the PDF is written on save
+        position = self.page_position()
+        try:
+            if op is None:
+                self.page_edits.undo()
+            else:
+                self.page_edits.apply(op)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid page edit: {str(e)}")
+            return
+        self.page_order = list(self.page_edits.pages)
+        if self.current_page not in self.page_order:
+            self.current_page = self.page_order[min(position, len(self.page_order) - 1)]
+        self.update_edits_status()
+        self.refresh_grid()
+        self.update_preview()
+
+    def update_edits_status(self):
+        edits = self.page_edits
+        if edits is None or self.crop_frame is None:
+            return
+        self.nup_menu.set(str(edits.nup))
+        if edits.changed:
+            text = f"{len(edits.ops)} edit(s): {len(edits)} of {edits.page_count} pages"
+            if edits.nup > 1:
+                text += f", {edits.nup} per sheet"
+        else:
+            text = ""
+        self.edits_status.configure(text=text)
+
+    def save_page_edits(self):
+        if not self.page_edits.changed:
+            messagebox.showinfo(
+                "Edit Pages",
+                "Rotate, delete, keep or move pages (drag them in the Grid view) first."
+            )
+            return
+        output_file = self.ask_output_file()
+        if output_file:
+            self.queue_job(
+                f"Edit {os.path.basename(self.current_file)}",
+                {"op": "pages", "input": self.current_file, "output": output_file,
+                 "edits": [list(op) for op in self.page_edits.ops]}
+            )
+
+    def get_preview_photo(self, path):
+        from PIL import ImageTk
+        from .preview import load_preview
+        photo = self.preview_photos.get(path)
+        if photo is None:
+            img = self.preview_images.get(path)
+            if img is None:
+                img = load_preview(path, PREVIEW_SIZE)
+                self.preview_images.put(path, img)
+            photo = ImageTk.PhotoImage(img)
+            self.preview_photos.put(path, photo)
+        return photo
+
+    @trace.traced("ui.render.image")
+    def display_current_image(self):
+        self.preview_canvas.delete("all")
+        if self.image_order:
+            path = self.image_files[self.image_order[self.current_image_index]]
+            try:
+                photo = self.get_preview_photo(path)
+            except Exception as e:
+                self.preview_canvas.create_text(
+                    10, 10,
+                    text=f"Cannot preview {path}: {e}",
+                    width=580,
+                    anchor="nw"
+                )
+                return
+            
+            # Center the image
+            canvas_width, canvas_height = PREVIEW_SIZE
+            x = (canvas_width - photo.width()) // 2 + 10
+            y = (canvas_height - photo.height()) // 2 + 10
+            
+            self.preview_canvas.create_image(
+                x, y,
+                image=photo,
+                anchor="nw"
+            )
+            self.preview_canvas.image = photo
+
+    @trace.traced("ui.render.pdf")
+    def update_preview(self):
+      if self.current_pdf is not None:
+        self.preview_canvas.delete("all")
+        try:
+            from PIL import ImageTk
+            # Bitmaps come from the background renderer; never render here
+            img = self.page_renderer.get(self.current_page)
+            self.page_renderer.prefetch(self.current_page)
+            
+            if img is None:
+                self.preview_canvas.create_text(
+                    10, 10,
+                    text=f"Rendering page {self.current_page + 1}...",
+                    font=("Helvetica", 10),
+                    anchor="nw"
+                )
+                if self.render_poll is None:
+                    self.render_poll = self.root.after(40, self.poll_page_render)
+            else:
+                rotation = self.page_edits.rotation.get(self.current_page, 0)
+                if rotation:
+                    # PIL turns counter-clockwise
+                    img = img.rotate(-rotation, expand=True)
+                    img.thumbnail(PREVIEW_SIZE)
+                photo = ImageTk.PhotoImage(img)
+                canvas_width, canvas_height = PREVIEW_SIZE
+                x = (canvas_width - photo.width()) // 2 + 10
+                y = (canvas_height - photo.height()) // 2 + 10
+                self.preview_canvas.create_image(
+                    x, y,
+                    image=photo,
+                    anchor="nw"
+                )
+                self.preview_canvas.image = photo
+            
+            # Update navigation
+            self.page_label.configure(
+                text=f"Page {self.current_page + 1}/{self.total_pages}"
+            )
+            
+            # Update navigation buttons
+            position = self.page_position()
+            self.prev_btn.pack_forget() if position == 0 else self.prev_btn.pack(side="left", padx=5)
+            self.next_btn.pack_forget() if position >= len(self.page_order) - 1 else self.next_btn.pack(side="right", padx=5)
+            
+        except Exception as e:
+            trace.error("ui.render.pdf", e, page=self.current_page + 1)
+            messagebox.showerror(
+                "Error",
+                f"Error displaying page: {str(e)}"
+            )
+
+    def poll_page_render(self):
+        self.render_poll = None
+        if self.current_mode == "crop":
+            self.update_preview()
+
+    def prev_page(self):
+      if self.current_mode == "crop":
+        position = self.page_position()
+        if position > 0:
+            self.current_page = self.page_order[position - 1]
+            self.update_preview()
+      elif self.current_mode == "word":
+        if self.current_page_index > 0:
+            self.current_page_index -= 1
+            self.display_current_page()
+      elif self.current_mode == "images":
+        if self.current_image_index > 0:
+            self.current_image_index -= 1
+            self.display_current_image()
+            self.update_page_label()
+
+    def next_page(self):
+      if self.current_mode == "crop":
+        position = self.page_position()
+        if position < len(self.page_order) - 1:
+            self.current_page = self.page_order[position + 1]
+            self.update_preview()
+      elif self.current_mode == "word":
+        if self.word_layout and self.word_layout.page(self.current_page_index + 1) is not None:
+            self.current_page_index += 1
+            self.display_current_page()
+      elif self.current_mode == "images":
+        if self.current_image_index < len(self.image_order) - 1:
+            self.current_image_index += 1
+            self.display_current_image()
+            self.update_page_label()
+
+    def update_page_label(self):
+        if self.current_mode == "word" and self.word_layout:
+            # "+" while pages past the laid out ones are still unknown
+            more = "" if self.word_layout.complete else "+"
+            self.page_label.configure(
+                text=f"Page {self.current_page_index + 1}/{len(self.word_layout.pages)}{more}"
+            )
+        elif self.current_mode == "images":
+            self.page_label.configure(
+                text=f"Image {self.current_image_index + 1}/{len(self.image_order)}"
+            )
+            # Show/hide navigation buttons based on current position
+            if self.current_image_index == 0:
+                self.prev_btn.pack_forget()
+            else:
+                self.prev_btn.pack(side="left", padx=5)
+                
+            if self.current_image_index == len(self.image_order) - 1:
+                self.next_btn.pack_forget()
+            else:
+                self.next_btn.pack(side="right", padx=5)
+                
+        elif self.current_pdf is not None:
+            self.page_label.configure(
+                text=f"Page {self.current_page + 1}/{self.total_pages}"
+            )
+            # Show/hide navigation buttons based on current position
+            position = self.page_position()
+            if position == 0:
+                self.prev_btn.pack_forget()
+            else:
+                self.prev_btn.pack(side="left", padx=5)
+                
+            if position == len(self.page_order) - 1:
+                self.next_btn.pack_forget()
+            else:
+                self.next_btn.pack(side="right", padx=5)
+
+    def convert_files(self):
+        if self.current_mode == "word":
+            self.convert_word_to_pdf()
+        elif self.current_mode == "images":
+            self.convert_images_to_pdf()
+        elif self.current_mode == "crop":
+            self.crop_pdf_pages()
+        elif self.current_mode == "merge":
+            self.merge_pdfs()
+
+    def ask_output_file(self):
+        return filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF Files", "*.pdf")]
+        )
+
+    def queue_job(self, title, spec):
+        if self.jobs is None:
+            from .jobs import JobQueue
+            self.jobs = JobQueue(JOB_WORKERS)
+        self.jobs.submit(title, spec)
+        self.poll_jobs()
+
+    def poll_jobs(self):
+        from .jobs import FAILED
+        if self.jobs_poll is not None:
+            self.root.after_cancel(self.jobs_poll)
+            self.jobs_poll = None
+        # Counted before draining: a job that finishes in between is shown next time
+        busy = self.jobs.active()
+        for job in self.jobs.poll():
+            row = self.job_rows.get(job.id)
+            if row is None:
+                row = ctk.CTkFrame(self.job_list)
+                row.pack(fill="x", pady=2)
+                label = ctk.CTkLabel(row, text="", wraplength=150, justify="left", anchor="w")
+                label.pack(side="left", fill="x", expand=True, padx=2)
+                cancel = ctk.CTkButton(row, text="✕", width=28,
+                                       command=lambda job_id=job.id: self.jobs.cancel(job_id))
+                cancel.pack(side="right", padx=2)
+                row = self.job_rows[job.id] = (row, label, cancel)
+            _, label, cancel = row
+            label.configure(text=f"{job.title}: {job.status()}")
+            if job.state == FAILED:
+                label.configure(text_color="red")
+            if job.finished:
+                cancel.configure(state="disabled")
+        # Only keep polling while something runs; queue_job starts it again
+        if busy:
+            self.jobs_poll = self.root.after(JOB_POLL_MS, self.poll_jobs)
+
+    def clear_finished_jobs(self):
+        if self.jobs is None:
+            return
+        for job in self.jobs.clear_finished():
+            frame, _, _ = self.job_rows.pop(job.id)
+            frame.destroy()
+
+    def on_close(self):
+        if self.thumb_grid is not None:
+            self.thumb_grid.close()
+            self.thumb_loader.close()
+        if self.jobs is not None:
+            self.jobs.shutdown()
+        self.resources.close_all()
+        self.root.destroy()
+
+    def convert_word_to_pdf(self):
+        output_file = self.ask_output_file()
+        if output_file:
+            self.queue_job(
+                f"Word → PDF {os.path.basename(output_file)}",
+                {"op": "word", "input": self.current_file, "output": output_file}
+            )
+
+    def convert_images_to_pdf(self):
+      if self.image_files:
+        output_file = self.ask_output_file()
+        if output_file:
+            ordered_files = [self.image_files[i] for i in self.image_order]
+            job = {"op": "images", "inputs": ordered_files, "output": output_file, "workers": None}
+            if self.ocr_checkbox.get():
+                from . import ocr
+                try:
+                    ocr.get_engine()
+                except (ValueError, ocr.OcrUnavailable) as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                job["ocr"] = ocr.default_language()
+            self.queue_job(f"Images → PDF {os.path.basename(output_file)}", job)
+
+    def merge_pdfs(self):
+        output_file = self.ask_output_file()
+        if output_file:
+            self.queue_job(
+                f"Merge {len(self.merge_files)} PDFs {os.path.basename(output_file)}",
+                {"op": "merge", "inputs": list(self.merge_files), "output": output_file}
+            )
+
+    def crop_pdf_pages(self):
+        try:
+            start_page = int(self.crop_start.get())
+            end_page = int(self.crop_end.get())
+            if start_page < 1 or end_page > self.total_pages or start_page > end_page:
+                raise ValueError("Invalid page range")
+            
+            output_file = self.ask_output_file()
+            if output_file:
+                self.queue_job(
+                    f"Crop {start_page}-{end_page} {os.path.basename(output_file)}",
+                    {"op": "crop", "input": self.current_file, "start": start_page,
+                     "end": end_page, "output": output_file}
+                )
+        except ValueError as e:
+            messagebox.showerror(
+                "Error",
+                f"Invalid page range: {str(e)}"
+            )
+
+    def run(self):
+        self.root.mainloop()
@@ -0,0 +1,283 @@
+"""Images -> PDF pipeline with bounded memory.
+
+JPEGs and plain PNGs are embedded as they are: the JPEG file becomes a
+DCTDecode stream and the PNG's IDAT data a FlateDecode stream with PNG
+predictors, scaled onto the page by the content stream's matrix. No pixel
+is decoded, so quality is untouched and the work is bound by I/O.
+
+Anything else (PNGs with alpha or interlacing, GIF, BMP, ...) is decoded,
+thumbnailed and composited onto an A4 page in a worker process. Pages are
+streamed into the output PDF in order, one at a time, so at most a few
+pages per worker are ever held in memory.
+
+With OCR on, each image is also read by the OCR engine in the same pool
+and its words are laid over the page as invisible text; see ocr.
+"""
+import io
+import os
+import struct
+from collections import deque
+from concurrent.futures import Future
+from contextlib import ExitStack
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from . import ocr, trace
+from .cache import disk_cache, file_digest
+from .pdfstream import A4_SIZE, StreamingPdfWriter, ref
+from .workers import process_pool
+
+JPEG_QUALITY = 90
+# Bump when render_page output changes so cached pages are not reused
+PAGE_VERSION = 1
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_COLOR_SPACES = {"L": "/DeviceGray", "RGB": "/DeviceRGB", "CMYK": "/DeviceCMYK"}
+PNG_COLORS = {0: 1, 2: 3, 3: 1}  # PNG colour type -> samples per pixel (no alpha types)
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def render_page(path: str, page_size: Tuple[int, int] = A4_SIZE,
+                quality: int = JPEG_QUALITY) -> bytes:
+    """Decode one image and return it centred on a white page as JPEG bytes."""
+    page_width, page_height = page_size
+    with trace.span("image.decode", path=path):
+        with Image.open(path) as img:
+            # Let the JPEG decoder skip detail we are about to throw away
+            img.draft("RGB", page_size)
+            img = img.convert("RGB")
+    with trace.span("image.resize", path=path):
+        img.thumbnail(page_size, Image.LANCZOS)
+        page = Image.new("RGB", page_size, (255, 255, 255))
+        page.paste(img, ((page_width - img.width) // 2, (page_height - img.height) // 2))
+
+    with trace.span("image.encode", path=path):
+        buffer = io.BytesIO()
+        page.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def cached_render_page(path: str, page_size: Tuple[int, int] = A4_SIZE,
+                       quality: int = JPEG_QUALITY) -> bytes:
+    """render_page through the disk cache, keyed by the image's content."""
+    cache = disk_cache()
+    key = cache.key("imagepdf.page", PAGE_VERSION, file_digest(path), page_size, quality)
+    jpeg = cache.get(key)
+    if jpeg is not None:
+        trace.count("cache.hits.page")
+        return jpeg
+    jpeg = render_page(path, page_size, quality)
+    cache.put(key, jpeg)
+    return jpeg
+
+
+def _write_page(writer: StreamingPdfWriter, jpeg: bytes, page_size: Tuple[int, int],
+                overlay: Tuple[str, str] = ("", "")):
+    width, height = page_size
+    trace.count("pdf.image_bytes", len(jpeg))
+    with trace.span("pdf.write"):
+        writer.add_image_page(
+            f"/Width {width} /Height {height} /ColorSpace /DeviceRGB "
+            f"/BitsPerComponent 8 /Filter /DCTDecode",
+            jpeg,
+            page_size,
+            page_size,
+            (0, 0),
+            *overlay
+        )
+
+
+class EmbeddedImage(NamedTuple):
+    """An image file that can go into the PDF without decoding it."""
+    path: str
+    width: int
+    height: int
+    entries: str  # Image XObject keys except /Type, /Subtype and /Length
+    # Byte ranges of the file that make up the stream; None means the whole file
+    chunks: Optional[List[Tuple[int, int]]] = None
+
+
+def _jpeg_image(path: str) -> Optional[EmbeddedImage]:
+    # Image.open only parses the headers; pixels are never decoded
+    with Image.open(path) as img:
+        if img.format != "JPEG" or img.mode not in JPEG_COLOR_SPACES:
+            return None
+        entries = (f"/Width {img.width} /Height {img.height} "
+                   f"/ColorSpace {JPEG_COLOR_SPACES[img.mode]} "
+                   f"/BitsPerComponent 8 /Filter /DCTDecode")
+        if img.mode == "CMYK" and "adobe" in img.info:
+            # Photoshop writes inverted CMYK
+            entries += " /Decode [1 0 1 0 1 0 1 0]"
+        return EmbeddedImage(path, img.width, img.height, entries)
+
+
+def _png_image(path: str) -> Optional[EmbeddedImage]:
+    """Read the PNG chunk table; None if it needs decoding to embed."""
+    with open(path, "rb") as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return None
+        header = None
+        palette = None
+        idat: List[Tuple[int, int]] = []
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                return None
+            length, kind = struct.unpack(">I4s", head)
+            if kind == b"IHDR":
+                header = struct.unpack(">IIBBBBB", f.read(13))
+                f.seek(length - 13 + 4, 1)
+            elif kind == b"PLTE":
+                palette = f.read(length)
+                f.seek(4, 1)
+            elif kind == b"tRNS":
+                return None  # Transparency needs a soft mask
+            elif kind == b"IDAT":
+                idat.append((f.tell(), length))
+                f.seek(length + 4, 1)
+            elif kind == b"IEND":
+                break
+            else:
+                f.seek(length + 4, 1)
+    if header is None or not idat:
+        return None
+    width, height, depth, color_type, _, _, interlace = header
+    if interlace or color_type not in PNG_COLORS or (color_type == 3 and not palette):
+        return None
+    colors = PNG_COLORS[color_type]
+    if color_type == 3:
+        color_space = f"[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{palette.hex()}>]"
+    else:
+        color_space = "/DeviceGray" if colors == 1 else "/DeviceRGB"
+    entries = (f"/Width {width} /Height {height} /ColorSpace {color_space} "
+               f"/BitsPerComponent {depth} /Filter /FlateDecode "
+               f"/DecodeParms << /Predictor 15 /Colors {colors} "
+               f"/BitsPerComponent {depth} /Columns {width} >>")
+    return EmbeddedImage(path, width, height, entries, idat)
+
+
+def embeddable_image(path: str) -> Optional[EmbeddedImage]:
+    """Describe path for pass-through embedding, or None if it must be rendered."""
+    try:
+        with open(path, "rb") as f:
+            signature = f.read(8)
+        if signature.startswith(b"\xff\xd8"):
+            return _jpeg_image(path)
+        if signature == PNG_SIGNATURE:
+            return _png_image(path)
+    except (OSError, SyntaxError, struct.error):
+        pass  # Let render_page report a proper error for broken files
+    return None
+
+
+def _read_image_data(image: EmbeddedImage) -> bytes:
+    with open(image.path, "rb") as f:
+        if image.chunks is None:
+            return f.read()
+        parts = []
+        for offset, length in image.chunks:
+            f.seek(offset)
+            parts.append(f.read(length))
+        return b"".join(parts)
+
+
+def fit_on_page(size: Tuple[int, int], page_size: Tuple[int, int]) -> Tuple[float, float, float, float]:
+    """(width, height, x, y) of an image centred on the page, one pixel per point.
+
+    Large images are shrunk to fit like Image.thumbnail; small ones are
+    never enlarged, matching the rendered pages.
+    """
+    scale = min(1.0, page_size[0] / size[0], page_size[1] / size[1])
+    width, height = size[0] * scale, size[1] * scale
+    return width, height, (page_size[0] - width) / 2, (page_size[1] - height) / 2
+
+
+def _write_embedded(writer: StreamingPdfWriter, image: EmbeddedImage,
+                    page_size: Tuple[int, int], overlay: Tuple[str, str] = ("", "")):
+    width, height, x, y = fit_on_page((image.width, image.height), page_size)
+    with trace.span("image.embed", path=image.path):
+        data = _read_image_data(image)
+    trace.count("pdf.image_bytes", len(data))
+    trace.count("images.embedded")
+    with trace.span("pdf.write"):
+        writer.add_image_page(image.entries, data, (width, height), page_size, (x, y),
+                              *overlay)
+
+
+def convert_images_to_pdf(image_paths: Sequence[str], output_path: str,
+                          workers: Optional[int] = None,
+                          progress: Optional[ProgressCallback] = None,
+                          passthrough: bool = True, cache: bool = True,
+                          ocr_language: Optional[str] = None) -> int:
+    """Convert images to an A4 PDF, one page per image.
+
+    With passthrough, JPEGs and plain PNGs are embedded as they are and
+    only the rest are rendered. With cache, rendered pages are kept in the
+    disk cache, so re-running a job only renders images that changed.
+    workers=None renders in a pool using every core; workers=1 renders in
+    this process, which is what callers that are already worker processes
+    should ask for. ocr_language (e.g. "eng" or "eng+ind") makes the text
+    of every page searchable; OCR results are cached along with pages.
+    """
+    if not image_paths:
+        raise ValueError("No images to convert")
+    total = len(image_paths)
+    workers = workers or os.cpu_count() or 1
+    render = cached_render_page if cache else render_page
+    # Fail before writing anything if the OCR engine is missing
+    ocr_engine = ocr.get_engine().name if ocr_language else None
+
+    with StreamingPdfWriter(output_path) as writer, ExitStack() as stack:
+        # The pool only starts processes once an image needs rendering
+        pool = stack.enter_context(process_pool(workers)) \
+            if workers > 1 else None
+
+        def page_for(path):
+            if passthrough:
+                image = embeddable_image(path)
+                if image is not None:
+                    return image
+            if pool is None:
+                return render(path)
+            return pool.submit(render, path)
+
+        def text_for(path):
+            if ocr_engine is None:
+                return None
+            if pool is None:
+                return ocr.recognize(path, ocr_language, ocr_engine, cache)
+            return pool.submit(ocr.recognize, path, ocr_language, ocr_engine, cache)
+
+        # One font serves every page's text layer
+        font = f"/Font << {ocr.FONT_NAME} {ref(writer.write_object(ocr.FONT_OBJECT))} >>" \
+            if ocr_engine else ""
+
+        # Keep a small window of pages in flight and write them in order
+        window = workers * 2
+        pending = deque()
+        done = 0
+
+        def write_next():
+            nonlocal done
+            item, text = pending.popleft()
+            overlay = ("", "")
+            result = text.result() if isinstance(text, Future) else text
+            if result is not None and all(result.size):
+                overlay = (ocr.text_layer(result, fit_on_page(result.size, A4_SIZE)), font)
+            if isinstance(item, EmbeddedImage):
+                _write_embedded(writer, item, A4_SIZE, overlay)
+            else:
+                _write_page(writer, item.result() if isinstance(item, Future) else item,
+                            A4_SIZE, overlay)
+            done += 1
+            if progress:
+                progress(done, total)
+
+        for path in image_paths:
+            pending.append((page_for(path), text_for(path)))
+            if len(pending) >= window:
+                write_next()
+        while pending:
+            write_next()
+    return total
@@ -0,0 +1,218 @@
+"""Background job queue for the GUI.
+
+Conversions are engine job dicts (see engine.run_job) scheduled by an
+asyncio loop on its own thread and executed on worker threads, so the Tk
+mainloop never waits for them. Heavy rendering and text extraction
+already run in process pools underneath.
+
+Nothing here touches Tk: workers post changed jobs to a thread-safe
+queue and the GUI drains it with poll() from a root.after loop, so all
+widget updates stay on the Tk thread. Cancelling a running job takes
+effect at its next progress callback. A failed or cancelled job's
+half-written output is removed. A merge never writes its output until it
+is complete: its .partial file and journal stay, so the same merge,
+queued again, carries on where it stopped.
+"""
+import asyncio
+import itertools
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from . import engine, trace
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised from a cancelled job's progress callback to stop it."""
+
+
+class Job:
+    """One queued conversion and its last known state."""
+
+    def __init__(self, job_id: int, title: str, spec: dict):
+        self.id = job_id
+        self.title = title
+        self.spec = spec
+        self.state = QUEUED
+        self.done = 0
+        self.total = 0  # 0 while unknown
+        self.result: Optional[int] = None
+        self.error: Optional[str] = None
+        self.input_bytes: Optional[int] = None
+        self.output_bytes: Optional[int] = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED
+
+    def status(self) -> str:
+        if self.state == RUNNING:
+            if self.total:
+                return f"{self.done}/{self.total} ({self.done * 100 // self.total}%)"
+            return f"{self.done} pages" if self.done else "running"
+        if self.state == DONE:
+            if self.output_bytes is None:
+                return f"done ({self.result} pages)"
+            size = f"{self.output_bytes / 1048576:.1f} MB"
+            if self.input_bytes is not None:
+                saved = 100 - self.output_bytes * 100 // max(1, self.input_bytes)
+                size = f"{self.input_bytes / 1048576:.1f} -> {size}, {saved}% saved"
+            return f"done ({self.result} pages, {size})"
+        if self.state == FAILED:
+            return f"failed: {self.error}"
+        return self.state
+
+
+class JobQueue:
+    """Runs submitted jobs in order, `workers` at a time, off the Tk thread."""
+
+    def __init__(self, workers: int = 1):
+        self.jobs: Dict[int, Job] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._updates: "queue.Queue[Job]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="jobs",
+                                        daemon=True)
+        self._thread.start()
+        self._pending = asyncio.run_coroutine_threadsafe(self._start(workers),
+                                                         self._loop).result()
+
+    async def _start(self, workers: int) -> "asyncio.Queue[Job]":
+        pending: "asyncio.Queue[Job]" = asyncio.Queue()
+        self._runners = [asyncio.create_task(self._runner(pending)) for _ in range(workers)]
+        return pending
+
+    def submit(self, title: str, spec: dict) -> Job:
+        """Queue an engine job dict; returns its Job right away."""
+        job = Job(next(self._ids), title, dict(spec))
+        self.jobs[job.id] = job
+        self._loop.call_soon_threadsafe(self._pending.put_nowait, job)
+        self._updates.put(job)
+        return job
+
+    def cancel(self, job_id: int):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        with self._lock:
+            if job.finished:
+                return
+            job._cancel.set()
+            if job.state == QUEUED:
+                # The runner skips it when its turn comes
+                job.state = CANCELLED
+        self._updates.put(job)
+
+    def clear_finished(self) -> List[Job]:
+        """Forget finished jobs and return them."""
+        removed = [job for job in self.jobs.values() if job.finished]
+        for job in removed:
+            del self.jobs[job.id]
+        return removed
+
+    def active(self) -> int:
+        """Unfinished jobs. Once this is 0, every job's last update is queued for poll()."""
+        with self._lock:
+            return sum(1 for job in self.jobs.values() if not job.finished)
+
+    def poll(self) -> List[Job]:
+        """Jobs changed since the last call; call from the Tk thread."""
+        changed: Dict[int, Job] = {}
+        while True:
+            try:
+                job = self._updates.get_nowait()
+            except queue.Empty:
+                break
+            changed[job.id] = job
+        return list(changed.values())
+
+    def shutdown(self):
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        # Running jobs stop at their next progress callback
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _stop(self):
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+
+    async def _runner(self, pending: "asyncio.Queue[Job]"):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await pending.get()
+            with self._lock:
+                if job._cancel.is_set():
+                    continue
+                job.state = RUNNING
+            self._updates.put(job)
+            await loop.run_in_executor(self._executor, self._execute, job)
+
+    def _execute(self, job: Job):
+        def progress(done: int, total: int):
+            if job._cancel.is_set():
+                raise JobCancelled()
+            job.done, job.total = done, total
+            self._updates.put(job)
+
+        before = _output_stamp(job)
+        try:
+            with trace.span("ui.job", op=job.spec.get("op"), title=job.title):
+                job.result = engine.run_job(job.spec, progress)
+            output = job.spec.get("output")
+            if isinstance(output, str) and os.path.isfile(output):
+                job.output_bytes = os.path.getsize(output)
+                if job.spec.get("op") == "optimize":
+                    job.input_bytes = os.path.getsize(job.spec["input"])
+            state = DONE
+        except JobCancelled:
+            state = CANCELLED
+            _discard_output(job, before)
+        except Exception as e:
+            job.error = str(e)
+            state = FAILED
+            trace.error("ui.job", e, op=job.spec.get("op"))
+            _discard_output(job, before)
+        # Finish and post together, so active() never counts a job out
+        # before its last update can be polled
+        with self._lock:
+            job.state = state
+            self._updates.put(job)
+
+
+def _output_stamp(job: Job):
+    output = job.spec.get("output")
+    try:
+        stat = os.stat(output)
+    except (OSError, TypeError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _discard_output(job: Job, before):
+    # Remove a half-written PDF, but never a file the job did not touch;
+    # directories and split patterns are left alone
+    output = job.spec.get("output")
+    if not isinstance(output, str) or not os.path.isfile(output):
+        return
+    if _output_stamp(job) != before:
+        try:
+            os.remove(output)
+        except OSError:
+            pass
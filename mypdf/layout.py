@@ -0,0 +1,371 @@
+"""Shared pagination for Word documents.
+
+A DocumentLayout turns a .docx into pages of placed flowables once. The PDF
+writer draws those placements and the Tk preview draws simplified versions
+of the same placements, so the preview always matches the output page for
+page and line for line.
+
+Pages are laid out on demand: asking for page 3 only lays out pages 1-3,
+and layouts are cached per file so going back and forth is free. The
+preview shows the first page as soon as it is laid out and then calls
+start_background() to lay out the rest on a thread while the user reads.
+"""
+import io
+import os
+import threading
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Flowable, Image, PageBreak, Paragraph, Table
+
+from . import trace
+from .cache import LRUCache, disk_cache, file_digest
+from .pdfstream import A4_SIZE
+from .reader import LazyPdfReader
+from .wordlayout import MARGIN, DocxStream, install_width_cache, iter_flowables
+
+FUZZ = 1e-6
+# Bump when layout output changes so cached PDFs are not reused
+LAYOUT_VERSION = 1
+
+
+class Placement(NamedTuple):
+    flowable: Flowable
+    x: float
+    y: float  # Bottom edge, PDF coordinates
+    width: float
+    height: float
+
+
+Page = List[Placement]
+
+
+class PageFrame:
+    """The part of reportlab's Frame we need, without drawing anything."""
+
+    def __init__(self, x: float, y: float, width: float, height: float, measure):
+        self.x = x
+        self.bottom = y
+        self.width = width
+        self.y = y + height
+        self.measure = measure  # Canvas flowables may use for string widths
+        self.at_top = True
+        self.prev_space_after = 0.0
+
+    def _space_before(self, flowable) -> float:
+        if self.at_top:
+            return 0.0
+        return max(flowable.getSpaceBefore() - self.prev_space_after, 0.0)
+
+    def place(self, flowable) -> Optional[Placement]:
+        space = self._space_before(flowable)
+        available = self.y - self.bottom - space
+        if available <= 0:
+            return None
+        w, h = flowable.wrapOn(self.measure, self.width, available)
+        if h > available + FUZZ:
+            return None
+        x = flowable._hAlignAdjust(self.x, self.width - w)
+        y = self.y - space - h
+        space_after = flowable.getSpaceAfter()
+        self.y = y - space_after
+        self.prev_space_after = space_after
+        self.at_top = False
+        return Placement(flowable, x, y, w, h)
+
+    def split(self, flowable) -> List[Flowable]:
+        available = self.y - self.bottom - self._space_before(flowable)
+        if available <= 0:
+            return []
+        return flowable.splitOn(self.measure, self.width, available)
+
+
+class DocumentLayout:
+    """Page breaks for one .docx, computed incrementally.
+
+    keep_pages=False lays pages out without remembering them, for one-off
+    conversions that should not hold the whole document in memory. Pages
+    are laid out under a lock, so a background thread, the preview and a
+    conversion can all use one layout.
+    """
+
+    def __init__(self, docx_path: str, page_size: Tuple[float, float] = A4_SIZE,
+                 margin: float = MARGIN, keep_pages: bool = True):
+        install_width_cache()
+        self.path = docx_path
+        self.page_size = page_size
+        self.margin = margin
+        self.frame_size = (page_size[0] - 2 * margin, page_size[1] - 2 * margin)
+        self.keep_pages = keep_pages
+        self.pages: List[Page] = []
+        self.laid_out = 0  # Pages produced so far, remembered or not
+        self.complete = False
+        self.error: Optional[Exception] = None  # What stopped background layout
+        self._measure = canvas.Canvas(io.BytesIO(), pagesize=page_size)
+        # The body is parsed as pages need it, not up front
+        self._flowables = iter_flowables(DocxStream(docx_path), self.frame_size)
+        self._generator = self._layout()
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def _new_frame(self) -> PageFrame:
+        return PageFrame(self.margin, self.margin, self.frame_size[0], self.frame_size[1],
+                         self._measure)
+
+    def _layout(self) -> Iterator[Page]:
+        frame = self._new_frame()
+        page: Page = []
+        pending: List[Flowable] = []
+        for flowable in self._flowables:
+            pending.append(flowable)
+            while pending:
+                item = pending.pop(0)
+                if isinstance(item, PageBreak):
+                    if page:
+                        yield page
+                        frame, page = self._new_frame(), []
+                    continue
+                placed = frame.place(item)
+                if placed:
+                    page.append(placed)
+                    continue
+                # Fill the rest of the page with the part that fits
+                parts = frame.split(item)
+                placed = frame.place(parts[0]) if parts else None
+                if placed:
+                    page.append(placed)
+                    pending[:0] = parts[1:]
+                elif not page:
+                    # Taller than a whole page and not splittable: clip it
+                    w, h = item.wrapOn(self._measure, *self.frame_size)
+                    page.append(Placement(item, self.margin,
+                                          self.page_size[1] - self.margin - h, w, h))
+                    frame.at_top = False
+                    frame.y = frame.bottom
+                else:
+                    yield page
+                    frame, page = self._new_frame(), []
+                    pending.insert(0, item)
+        if page or not self.laid_out:
+            yield page
+
+    def _advance(self) -> Optional[Page]:
+        with self._lock:
+            if self.complete:
+                return None
+            with trace.span("layout.page", page=self.laid_out + 1):
+                page = next(self._generator, None)
+            if page is None:
+                self.complete = True
+                return None
+            self.laid_out += 1
+            if self.keep_pages:
+                self.pages.append(page)
+            return page
+
+    def page(self, index: int) -> Optional[Page]:
+        """Return page index (0-based), laying out pages up to it as needed."""
+        if index < len(self.pages):
+            return self.pages[index]  # No need to wait for the background thread
+        with self._lock:
+            while len(self.pages) <= index and self._advance() is not None:
+                pass
+            return self.pages[index] if index < len(self.pages) else None
+
+    def page_count(self) -> int:
+        """Total number of pages; lays out the rest of the document."""
+        while self._advance() is not None:
+            pass
+        return self.laid_out
+
+    def start_background(self):
+        """Lay out the remaining pages on a daemon thread; see stop()."""
+        if self._thread is None and not self.complete:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._background, name="layout",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop background layout after the page in progress."""
+        self._stopped = True
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _background(self):
+        with trace.span("layout.background", path=self.path) as span:
+            try:
+                # One page per lock, so the preview waits for at most a page
+                while not self._stopped and self._advance() is not None:
+                    pass
+            except Exception as e:
+                self.error = e
+                trace.error("layout.background", e, path=self.path)
+            span.set(pages=self.laid_out)
+
+    def __iter__(self) -> Iterator[Page]:
+        """Pages in order: remembered ones first, then newly laid out ones."""
+        index = 0
+        while True:
+            # Check and advance together, or a page laid out by another
+            # thread in between would be skipped
+            with self._lock:
+                if index < len(self.pages):
+                    page = self.pages[index]
+                else:
+                    page = self._advance()
+            if page is None:
+                return
+            yield page
+            index += 1
+
+
+# Layouts for previews, keyed by file identity and page geometry
+_LAYOUTS = LRUCache(max_items=8)
+
+
+def get_layout(docx_path: str, page_size: Tuple[float, float] = A4_SIZE,
+               margin: float = MARGIN) -> DocumentLayout:
+    """Cached layout for docx_path; a changed file gets a fresh layout."""
+    stat = os.stat(docx_path)
+    key = (os.path.abspath(docx_path), stat.st_mtime, stat.st_size, page_size, margin)
+    layout = _LAYOUTS.get(key)
+    if layout is None:
+        layout = DocumentLayout(docx_path, page_size, margin)
+        _LAYOUTS.put(key, layout)
+    return layout
+
+
+def cached_layout(docx_path: str, page_size: Tuple[float, float] = A4_SIZE,
+                  margin: float = MARGIN) -> Optional[DocumentLayout]:
+    stat = os.stat(docx_path)
+    return _LAYOUTS.get((os.path.abspath(docx_path), stat.st_mtime, stat.st_size,
+                         page_size, margin))
+
+
+def write_pdf(layout: DocumentLayout, output_path: str,
+              progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Draw every page of layout to output_path and return the page count.
+
+    progress(done, total) is called after each page; total is 0 while the
+    page count is not known yet.
+    """
+    c = canvas.Canvas(output_path, pagesize=layout.page_size)
+    pages = 0
+    for page in layout:
+        if pages:
+            c.showPage()
+        with trace.span("pdf.write", page=pages + 1):
+            for placement in page:
+                placement.flowable.drawOn(c, placement.x, placement.y)
+        pages += 1
+        if progress:
+            progress(pages, layout.laid_out if layout.complete else 0)
+    with trace.span("pdf.save"):
+        c.save()
+    return pages
+
+
+def convert_docx(docx_path: str, output_path: str,
+                 page_size: Tuple[float, float] = A4_SIZE, margin: float = MARGIN,
+                 cache: bool = True,
+                 progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Lay out a .docx file onto PDF pages and return the page count.
+
+    Reuses the preview's layout when there is one, so both always agree.
+    With cache, a document converted before (same content and options)
+    is copied from the disk cache instead of being laid out again.
+    """
+    if cache:
+        store = disk_cache()
+        key = store.key("layout.pdf", LAYOUT_VERSION, file_digest(docx_path), page_size, margin)
+        if store.copy_to(key, output_path):
+            trace.count("cache.hits.word")
+            with LazyPdfReader(output_path) as reader:
+                pages = len(reader.pages)
+            if progress:
+                progress(pages, pages)
+            return pages
+    layout = cached_layout(docx_path, page_size, margin)
+    if layout is None:
+        layout = DocumentLayout(docx_path, page_size, margin, keep_pages=False)
+    pages = write_pdf(layout, output_path, progress)
+    if cache:
+        store.put_file(key, output_path)
+    return pages
+
+
+# Preview drawing ------------------------------------------------------------
+
+class TextLine(NamedTuple):
+    x: float
+    baseline: float
+    text: str
+    font: str
+    size: float
+
+
+class ImageBox(NamedTuple):
+    x: float
+    y: float
+    width: float
+    height: float
+    source: object  # File name or file-like object holding the image
+
+
+class Box(NamedTuple):
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+
+def _paragraph_lines(para: Paragraph, x: float, y: float, height: float) -> List[TextLine]:
+    bl = getattr(para, "blPara", None)
+    if bl is None:
+        return []
+    style = para.style
+    lines = []
+    baseline = y + height - style.fontSize
+    for number, line in enumerate(bl.lines):
+        if bl.kind == 0:
+            extra, words = line
+            text = " ".join(words)
+            font, size = bl.fontName, bl.fontSize
+        else:
+            extra = line.extraSpace
+            text = "".join(getattr(frag, "text", "") for frag in line.words)
+            first = line.words[0] if line.words else style
+            font, size = getattr(first, "fontName", style.fontName), \
+                getattr(first, "fontSize", style.fontSize)
+        indent = style.firstLineIndent if number == 0 else 0
+        shift = {1: extra / 2, 2: extra}.get(style.alignment, 0)
+        lines.append(TextLine(x + style.leftIndent + indent + shift, baseline, text, font, size))
+        baseline -= style.leading
+    return lines
+
+
+def preview_items(placement: Placement) -> list:
+    """Simplified drawing commands for one placement, in PDF coordinates."""
+    flowable, x, y, width, height = placement
+    if isinstance(flowable, Paragraph):
+        return _paragraph_lines(flowable, x, y, height)
+    if isinstance(flowable, Image):
+        return [ImageBox(x, y, width, height, flowable.filename)]
+    if isinstance(flowable, Table):
+        items = []
+        cols = flowable._colpositions
+        rows = flowable._rowpositions
+        for r, row in enumerate(flowable._cellvalues):
+            top, bottom = y + rows[r], y + rows[r + 1]
+            for c, cell in enumerate(row):
+                left, right = x + cols[c], x + cols[c + 1]
+                items.append(Box(left, bottom, right, top))
+                if isinstance(cell, Paragraph) and getattr(cell, "blPara", None) is not None:
+                    cell_height = cell.height
+                    items.extend(_paragraph_lines(cell, left + 6, top - 3 - cell_height,
+                                                  cell_height))
+        return items
+    return []
@@ -0,0 +1,287 @@
+"""Concatenate many PDFs, or page ranges of them, into one file.
+
+Inputs are opened one at a time and their pages copied straight into a
+StreamingPdfWriter, so memory stays flat however many files and pages go
+in. One stream digest table is shared by all inputs; a font or image
+that appears in several files is written once. The inputs' outlines
+(bookmarks) are joined into one, in input order; bookmarks that point at
+pages left out of the merge lead nowhere. Form fields on the merged pages
+are gathered into one form, and the document info (title, author...)
+is the first input's.
+
+The output is written to <output>.partial and only renamed to <output>
+when complete. Progress is checkpointed to <output>.journal (JSON Lines):
+each record holds what the writer produced since the previous one. When
+a merge is interrupted, running it again with the same inputs truncates
+the partial file to the last checkpoint and carries on from there. The
+journal is deleted when the merge completes.
+"""
+import itertools
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+from . import trace
+from .extract import ObjectCopier, ProgressCallback, parse_page_ranges
+from .pdfstream import StreamingPdfWriter, ref
+from .reader import LazyPdfReader
+
+JOURNAL_VERSION = 3
+CHECKPOINT_PAGES = 200
+
+
+class MergeInput(NamedTuple):
+    path: str
+    pages: Optional[str] = None  # e.g. "1-3,7,10-"; None means every page
+
+
+InputSpec = Union[str, MergeInput]
+
+
+class OutlineItem(NamedTuple):
+    """A top-level bookmark, written once its neighbours are known."""
+    obj_id: int
+    entries: str  # Its dictionary entries except /Parent, /Prev and /Next
+    open_count: int  # Visible descendants, for the root's /Count
+
+
+def journal_path(output_path: str) -> str:
+    return output_path + ".journal"
+
+
+def partial_path(output_path: str) -> str:
+    return output_path + ".partial"
+
+
+def _header(inputs: List[MergeInput]) -> dict:
+    files = []
+    for item in inputs:
+        stat = os.stat(item.path)
+        files.append([os.path.abspath(item.path), item.pages, stat.st_size, stat.st_mtime_ns])
+    return {"version": JOURNAL_VERSION, "inputs": files}
+
+
+class _Checkpoint:
+    """State replayed from a journal: enough to rebuild writer and copier."""
+
+    def __init__(self):
+        self.offset = 0
+        self.size = 0
+        self.written: List[List[int]] = []
+        self.page_ids: List[int] = []
+        self.dedup: Dict[bytes, int] = {}
+        self.source = 0  # index of the input being copied
+        self.done = 0  # pages of that input already written
+        self.ids: List[List[int]] = []  # copier id pairs for that input
+        self.outline: List[OutlineItem] = []  # top-level outline items so far
+        self.fields: List[int] = []  # top-level form fields so far
+        self.form: Dict[str, str] = {}  # the form's other entries
+        self.info: Optional[str] = None
+
+    def apply(self, record: dict):
+        if record["source"] != self.source:
+            self.ids = []
+        self.offset = record["offset"]
+        self.size = record["size"]
+        self.written.extend(record["written"])
+        self.page_ids.extend(record["pages"])
+        self.dedup.update((bytes.fromhex(k), v) for k, v in record["dedup"])
+        self.source = record["source"]
+        self.done = record["done"]
+        self.ids.extend(record["ids"])
+        self.outline.extend(OutlineItem(*item) for item in record["outline"])
+        self.fields.extend(record["fields"])
+        self.form = record["form"]
+        self.info = record["info"]
+
+
+def _load_journal(path: str, partial: str, header: dict) -> Optional[_Checkpoint]:
+    """The last checkpoint of a matching journal, or None to start over."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            if json.loads(f.readline()) != header:
+                return None
+            checkpoint = _Checkpoint()
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # A record cut short by the interruption
+                checkpoint.apply(record)
+    except (OSError, ValueError):
+        return None
+    if not checkpoint.size or not os.path.exists(partial) \
+            or os.path.getsize(partial) < checkpoint.offset:
+        return None
+    return checkpoint
+
+
+class _Document:
+    """What the merge collects besides pages, written at the end."""
+
+    def __init__(self, checkpoint: Optional[_Checkpoint] = None):
+        self.outline: List[OutlineItem] = list(checkpoint.outline) if checkpoint else []
+        self.fields: List[int] = list(checkpoint.fields) if checkpoint else []
+        self.form: Dict[str, str] = dict(checkpoint.form) if checkpoint else {}
+        self.info: Optional[str] = checkpoint.info if checkpoint else None
+
+    def add(self, source: int, reader, copier: ObjectCopier):
+        """Collect an input's outline, form fields and, for the first, info."""
+        self.outline.extend(OutlineItem(*item) for item in copier.copy_outline())
+        fields, form = copier.copy_form(entries=not self.form)
+        self.fields.extend(fields)
+        self.form = self.form or form
+        if source == 0:
+            self.info = copier.copy_entries(reader.trailer, ("/Info",)).get("/Info")
+
+    def write(self, writer: StreamingPdfWriter):
+        if self.outline:
+            _write_outline(writer, self.outline)
+        if self.fields:
+            entries = " ".join(f"{k} {v}" for k, v in self.form.items())
+            fields = " ".join(ref(obj_id) for obj_id in self.fields)
+            writer.catalog["/AcroForm"] = ref(
+                writer.write_object(f"<< {entries} /Fields [{fields}] >>"))
+        if self.info is not None:
+            writer.trailer["/Info"] = self.info
+
+
+class _Journal:
+    def __init__(self, path: str, writer: StreamingPdfWriter, dedup: Dict[bytes, int],
+                 document: _Document, header: Optional[dict],
+                 checkpoint: Optional[_Checkpoint] = None):
+        self.path = path
+        self.writer = writer
+        self.dedup = dedup
+        self.document = document
+        self.pages_logged = len(writer.page_ids)
+        self.dedup_logged = len(dedup)
+        self.outline_logged = len(document.outline)
+        self.fields_logged = len(document.fields)
+        self.source = checkpoint.source if checkpoint else 0
+        self.ids_logged = len(checkpoint.ids) if checkpoint else 0
+        writer.written = []
+        if header is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(header) + "\n")
+        self._file = open(path, "a", encoding="utf-8")
+
+    def checkpoint(self, source: int, done: int, copier: ObjectCopier):
+        if source != self.source:
+            # Moving on to the next input: its copier starts empty
+            self.source = source
+            self.ids_logged = 0
+            ids = []
+        else:
+            ids = copier.id_pairs(self.ids_logged)
+        writer = self.writer
+        dedup = [(digest.hex(), obj_id)
+                 for digest, obj_id in itertools.islice(self.dedup.items(), self.dedup_logged, None)]
+        record = {
+            "offset": writer.tell(), "size": writer.size, "written": writer.written,
+            "pages": writer.page_ids[self.pages_logged:], "dedup": dedup,
+            "source": source, "done": done, "ids": ids,
+            "outline": self.document.outline[self.outline_logged:],
+            "fields": self.document.fields[self.fields_logged:],
+            "form": self.document.form, "info": self.document.info,
+        }
+        # The output must be on disk before the journal says it is
+        writer.sync()
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        writer.written = []
+        self.pages_logged = len(writer.page_ids)
+        self.dedup_logged = len(self.dedup)
+        self.outline_logged = len(self.document.outline)
+        self.fields_logged = len(self.document.fields)
+        self.ids_logged += len(ids)
+
+    def close(self):
+        self._file.close()
+
+
+def _write_outline(writer: StreamingPdfWriter, items: List[OutlineItem]):
+    """Chain the inputs' top-level outline items under one outline root."""
+    root_id = writer.reserve()
+    for index, item in enumerate(items):
+        links = f"/Parent {ref(root_id)}"
+        if index:
+            links += f" /Prev {ref(items[index - 1].obj_id)}"
+        if index + 1 < len(items):
+            links += f" /Next {ref(items[index + 1].obj_id)}"
+        writer.write_object(f"<< {item.entries} {links} >>", item.obj_id)
+    count = len(items) + sum(item.open_count for item in items)
+    writer.write_object(f"<< /Type /Outlines /First {ref(items[0].obj_id)} "
+                        f"/Last {ref(items[-1].obj_id)} /Count {count} >>", root_id)
+    writer.catalog["/Outlines"] = ref(root_id)
+
+
+def merge_pdfs(inputs: Sequence[InputSpec], output_path: str,
+               progress: Optional[ProgressCallback] = None, resume: bool = True) -> int:
+    """Merge inputs (paths or MergeInputs) into output_path; return the page count.
+
+    With resume, a journal left by an interrupted merge of the same inputs
+    into the same output is picked up where it stopped.
+    """
+    inputs = [MergeInput(item) if isinstance(item, str) else MergeInput(*item)
+              for item in inputs]
+    if not inputs:
+        raise ValueError("No PDFs to merge")
+
+    # Check every range before writing anything
+    selections: List[List[int]] = []
+    for item in inputs:
+        with LazyPdfReader(item.path) as reader:
+            count = len(reader.pages)
+        ranges = parse_page_ranges(item.pages, count) if item.pages else [range(count)]
+        selections.append([index for part in ranges for index in part])
+    total = sum(len(pages) for pages in selections)
+
+    header = _header(inputs)
+    journal_file = journal_path(output_path)
+    partial = partial_path(output_path)
+    checkpoint = _load_journal(journal_file, partial, header) if resume else None
+    dedup: Dict[bytes, int] = {}
+    document = _Document(checkpoint)
+    with trace.span("pdf.merge", inputs=len(inputs), pages=total) as span:
+        if checkpoint is None:
+            writer = StreamingPdfWriter(output_path, partial)
+            journal = _Journal(journal_file, writer, dedup, document, header)
+            start_source, start_page = 0, 0
+        else:
+            writer = StreamingPdfWriter.resume(output_path, partial, checkpoint.offset,
+                                               checkpoint.size, checkpoint.written,
+                                               checkpoint.page_ids)
+            dedup.update(checkpoint.dedup)
+            journal = _Journal(journal_file, writer, dedup, document, None, checkpoint)
+            start_source, start_page = checkpoint.source, checkpoint.done
+            span.set(resumed_at=len(checkpoint.page_ids))
+            trace.count("merge.resumed")
+
+        written = len(writer.page_ids)
+        try:
+            with writer:
+                for source in range(start_source, len(inputs)):
+                    pages = selections[source]
+                    first = start_page if source == start_source else 0
+                    with LazyPdfReader(inputs[source].path) as reader:
+                        copier = ObjectCopier(reader, writer, dedup)
+                        if checkpoint is not None and source == start_source:
+                            copier.restore_ids(checkpoint.ids)
+                        page_objects = [reader.pages[index] for index in pages]
+                        copier.reserve_pages(page_objects)
+                        for done in range(first, len(pages)):
+                            copier.add_page(page_objects[done])
+                            written += 1
+                            if progress:
+                                progress(written, total)
+                            if (done + 1) % CHECKPOINT_PAGES == 0 and done + 1 < len(pages):
+                                journal.checkpoint(source, done + 1, copier)
+                        document.add(source, reader, copier)
+                        journal.checkpoint(source + 1, 0, copier)
+                document.write(writer)
+        finally:
+            journal.close()
+    os.remove(journal_file)
+    return written
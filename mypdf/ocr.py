@@ -0,0 +1,164 @@
+"""OCR for scanned pages: recognised words become an invisible text layer.
+
+An engine turns an image file into words with pixel boxes. Engines are
+looked up by name in ENGINES (MYPDF_OCR_ENGINE picks one, "tesseract" by
+default), so another local engine only needs a class with available()
+and recognize(). Results are kept in the disk cache under the image's
+content digest, so a re-run only reads images that changed.
+
+text_layer() turns the words into content stream operators drawn in
+render mode 3 (neither filled nor stroked) over the page image: viewers
+show the scan, while search, selection and extract_text() find the words.
+"""
+import csv
+import io
+import json
+import os
+import shutil
+import subprocess
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from . import trace
+from .cache import disk_cache, file_digest
+from .pdfstream import pdf_number, pdf_string
+
+OCR_ENGINE_ENV = "MYPDF_OCR_ENGINE"
+TESSERACT_ENV = "MYPDF_TESSERACT"
+OCR_LANGUAGE_ENV = "MYPDF_OCR_LANG"
+OCR_LANGUAGE = "eng"
+# Bump when recognize output changes so cached results are not reused
+OCR_VERSION = 1
+OCR_TIMEOUT = 300
+FONT_NAME = "/OCR"
+FONT_OBJECT = "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+FONT_ENCODING = "cp1252"  # Python's name for WinAnsiEncoding
+
+
+class OcrUnavailable(RuntimeError):
+    """The OCR engine is not installed."""
+
+
+class Word(NamedTuple):
+    text: str
+    left: int
+    top: int
+    width: int
+    height: int
+
+
+class OcrResult(NamedTuple):
+    size: Tuple[int, int]  # Pixel size of the image the boxes refer to
+    words: List[Word]
+
+    def to_json(self) -> bytes:
+        return json.dumps({"size": self.size, "words": self.words}).encode("utf-8")
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "OcrResult":
+        value = json.loads(data)
+        return cls(tuple(value["size"]), [Word(*word) for word in value["words"]])
+
+
+class TesseractEngine:
+    """The tesseract command line program (MYPDF_TESSERACT sets its path)."""
+
+    name = "tesseract"
+
+    def __init__(self):
+        self.binary = os.environ.get(TESSERACT_ENV) or shutil.which("tesseract")
+
+    def available(self) -> bool:
+        return bool(self.binary)
+
+    def recognize(self, path: str, language: str = OCR_LANGUAGE) -> OcrResult:
+        try:
+            proc = subprocess.run(
+                [self.binary, path, "stdout", "-l", language, "tsv"],
+                check=True, capture_output=True, timeout=OCR_TIMEOUT
+            )
+        except subprocess.CalledProcessError as e:
+            message = e.stderr.decode("utf-8", "replace").strip().splitlines()
+            raise RuntimeError(f"tesseract failed on {os.path.basename(path)}: "
+                               f"{message[-1] if message else e}") from None
+        size = (0, 0)
+        words = []
+        rows = csv.DictReader(io.StringIO(proc.stdout.decode("utf-8", "replace")),
+                              delimiter="\t", quoting=csv.QUOTE_NONE)
+        for row in rows:
+            box = [int(row[key]) for key in ("left", "top", "width", "height")]
+            if row["level"] == "1":
+                size = (box[2], box[3])  # The page row covers the whole image
+            elif row["level"] == "5" and (row.get("text") or "").strip() \
+                    and float(row["conf"]) >= 0:
+                words.append(Word(row["text"].strip(), *box))
+        return OcrResult(size, words)
+
+
+# Engine name -> factory; the engine must be importable in worker processes
+ENGINES: Dict[str, Callable[[], object]] = {
+    "tesseract": TesseractEngine,
+}
+
+
+def default_language() -> str:
+    """MYPDF_OCR_LANG, e.g. "ind" or "eng+ind", or English."""
+    return os.environ.get(OCR_LANGUAGE_ENV) or OCR_LANGUAGE
+
+
+def get_engine(name: Optional[str] = None):
+    """The named (or configured) engine; raises OcrUnavailable if it is not installed."""
+    name = name or os.environ.get(OCR_ENGINE_ENV) or "tesseract"
+    if name not in ENGINES:
+        raise ValueError(f"Unknown OCR engine: {name!r} (known: {', '.join(ENGINES)})")
+    engine = ENGINES[name]()
+    if not engine.available():
+        raise OcrUnavailable(f"OCR needs the {name} program; install it or turn OCR off")
+    return engine
+
+
+def recognize(path: str, language: str = OCR_LANGUAGE, engine: Optional[str] = None,
+              cache: bool = True) -> OcrResult:
+    """Words in the image at path, through the disk cache keyed by its content."""
+    ocr_engine = get_engine(engine)
+    store = disk_cache() if cache else None
+    key = None
+    if store is not None:
+        key = store.key("ocr", OCR_VERSION, ocr_engine.name, file_digest(path), language)
+        data = store.get(key)
+        if data is not None:
+            trace.count("cache.hits.ocr")
+            return OcrResult.from_json(data)
+    with trace.span("ocr.page", path=path, engine=ocr_engine.name) as span:
+        result = ocr_engine.recognize(path, language)
+        span.set(words=len(result.words))
+    if store is not None:
+        store.put(key, result.to_json())
+    return result
+
+
+def text_layer(result: OcrResult, placement: Tuple[float, float, float, float]) -> str:
+    """Invisible text operators for result, with the image drawn at placement.
+
+    placement is (width, height, x, y) on the page in points, as returned
+    by imagepdf.fit_on_page. Each word is stretched to its box with Tz so
+    selections line up with the scan. Uses the font FONT_NAME.
+    """
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    if not result.words or not all(result.size):
+        return ""
+    width, height, x, y = placement
+    scale_x, scale_y = width / result.size[0], height / result.size[1]
+    ops = ["BT 3 Tr"]
+    for word in result.words:
+        size = max(1.0, word.height * scale_y)
+        natural = stringWidth(word.text, "Helvetica", size)
+        stretch = 100 * word.width * scale_x / natural if natural else 100
+        left = x + word.left * scale_x
+        bottom = y + height - (word.top + word.height) * scale_y
+        # The trailing space keeps words apart in extracted text
+        ops.append(f"{FONT_NAME} {pdf_number(size)} Tf {pdf_number(stretch)} Tz "
+                   f"1 0 0 1 {pdf_number(left)} {pdf_number(bottom)} Tm "
+                   f"{pdf_string(word.text + ' ', FONT_ENCODING)} Tj")
+    ops.append("ET")
+    return "\n".join(ops)
@@ -0,0 +1,235 @@
+"""Shrink PDFs: downsample and recompress images, compress streams.
+
+optimize_pdf() works in three passes:
+
+1. Every page's content is scanned (in a process pool, in chunks of
+   pages) for the largest size each image is drawn at.
+2. Images shown above the target DPI are downsampled to it and saved as
+   JPEG; lossless photos are converted to JPEG when that makes them at
+   least PHOTO_RATIO times smaller. Each image is one pool task.
+   Stencil masks, colour-keyed, indexed and 1-bit images are left alone.
+3. Pages are copied through ObjectCopier into a StreamingPdfWriter. Only
+   objects reachable from the pages are written, so unused objects drop
+   out, identical streams are stored once, and uncompressed streams are
+   Flate-compressed on the way. The outline, forms, metadata and other
+   catalog entries (CATALOG_KEYS) and the document info follow the pages.
+
+A replacement is only used when it is smaller than the original.
+"""
+import io
+import os
+import zlib
+from math import ceil, hypot
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from PIL import Image
+from PyPDF2.generic import IndirectObject, StreamObject
+
+from . import pdfimages, trace
+from .extract import CATALOG_KEYS, ObjectCopier, ProgressCallback
+from .pdfstream import StreamingPdfWriter
+from .reader import LazyPdfReader
+from .workers import process_pool
+
+TARGET_DPI = 150
+JPEG_QUALITY = 75
+# Only downsample images this much above the target, to avoid pointless
+# resampling of images that are just a little over
+DPI_TOLERANCE = 1.25
+# A lossless image becomes a JPEG only if that is this many times smaller,
+# which photos and scans are and text or line art usually is not
+PHOTO_RATIO = 3
+MIN_STREAM = 64  # Smaller uncompressed streams are left as they are
+SCAN_CHUNK = 50
+JPEG_COLOR_SPACES = {"/DeviceGray", "/DeviceRGB", "/DeviceCMYK", "/CalGray", "/CalRGB"}
+
+Size = Tuple[float, float]
+Reference = Tuple[int, int]  # (object number, generation)
+
+
+class OptimizeReport(NamedTuple):
+    pages: int
+    input_bytes: int
+    output_bytes: int
+    images_recompressed: int
+    streams_compressed: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.input_bytes - self.output_bytes
+
+    def summary(self) -> str:
+        saved = self.saved_bytes / self.input_bytes * 100 if self.input_bytes else 0
+        return (f"{self.input_bytes / 1048576:.1f} MB -> {self.output_bytes / 1048576:.1f} MB "
+                f"({saved:.0f}% saved; {self.images_recompressed} images recompressed, "
+                f"{self.streams_compressed} streams compressed)")
+
+
+# Worker side -----------------------------------------------------------------
+# Each worker process opens the input once
+
+_reader: Optional[LazyPdfReader] = None
+
+
+def _open_worker(path: str):
+    global _reader
+    _reader = LazyPdfReader(path)
+
+
+def scan_image_sizes(reader, start: int, stop: int) -> Dict[Reference, Size]:
+    """Largest drawn size in points of each image on pages start..stop-1."""
+    from .render import _placed_images
+
+    sizes: Dict[Reference, Size] = {}
+    for index in range(start, stop):
+        try:
+            placed = _placed_images(reader.pages[index])
+        except Exception as e:
+            trace.error("optimize.scan", e, page=index + 1)
+            continue
+        for _, obj, (a, b, c, d, _, _) in placed:
+            reference = getattr(obj, "indirect_reference", None)
+            if reference is None:
+                continue
+            key = (reference.idnum, reference.generation)
+            old = sizes.get(key, (0, 0))
+            sizes[key] = (max(old[0], hypot(a, b)), max(old[1], hypot(c, d)))
+    return sizes
+
+
+def _scan_chunk(start: int, stop: int) -> Dict[Reference, Size]:
+    return scan_image_sizes(_reader, start, stop)
+
+
+def recompress_image(obj, shown: Size, dpi: int = TARGET_DPI,
+                     quality: int = JPEG_QUALITY) -> Optional[Tuple[Dict[str, Optional[str]], bytes]]:
+    """Stream changes and JPEG data for a smaller version of obj, or None.
+
+    shown is the largest size (in points) the image is drawn at.
+    """
+    if obj.get("/ImageMask") or "/Mask" in obj:
+        return None
+    filters = pdfimages.filter_names(obj)
+    if filters and filters[-1] in ("/CCITTFaxDecode", "/JBIG2Decode"):
+        return None
+    try:
+        space = pdfimages.color_space(obj.get("/ColorSpace"))
+    except pdfimages.UnsupportedImage:
+        return None
+    if space.family not in JPEG_COLOR_SPACES or int(obj.get("/BitsPerComponent", 8)) < 8:
+        return None
+
+    width, height = int(obj["/Width"]), int(obj["/Height"])
+    target = (max(1, ceil(shown[0] / 72 * dpi)), max(1, ceil(shown[1] / 72 * dpi)))
+    downsample = width > target[0] * DPI_TOLERANCE and height > target[1] * DPI_TOLERANCE
+    lossy = bool(filters) and filters[-1] in ("/DCTDecode", "/JPXDecode")
+    if not downsample and lossy:
+        return None  # Re-encoding a JPEG at the same size only loses quality
+
+    img = pdfimages.decode_image(obj, max_size=target if downsample else None)
+    if img.mode in ("LA", "RGBA"):
+        img = img.convert(img.mode[:-1])  # The /SMask stays as it is
+    if downsample:
+        img = img.resize(target, Image.LANCZOS)
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality, optimize=True)
+    data = buffer.getvalue()
+
+    original = len(obj._data)
+    if len(data) >= original or (not downsample and len(data) * PHOTO_RATIO > original):
+        return None
+    changes = {
+        "/Width": str(img.width), "/Height": str(img.height),
+        "/ColorSpace": "/DeviceGray" if img.mode == "L" else "/DeviceRGB",
+        "/BitsPerComponent": "8", "/Filter": "/DCTDecode",
+        "/DecodeParms": None, "/Decode": None,
+    }
+    return changes, data
+
+
+def _recompress(reference: Reference, shown: Size, dpi: int, quality: int):
+    try:
+        obj = _reader.get_object(IndirectObject(*reference, _reader))
+        with trace.span("optimize.image", image=reference[0]):
+            return recompress_image(obj, shown, dpi, quality)
+    except Exception as e:
+        trace.error("optimize.image", e, image=reference[0])
+        return None
+
+
+# Main process ----------------------------------------------------------------
+
+def compress_stream(copier: ObjectCopier, obj: StreamObject) -> Optional[bytes]:
+    """Body for obj with its data Flate-compressed, if it is unfiltered and that helps."""
+    if "/Filter" in obj or obj.get("/Type") == "/Metadata" or len(obj._data) < MIN_STREAM:
+        return None
+    data = zlib.compress(obj._data, 6)
+    if len(data) >= len(obj._data):
+        return None
+    return copier.stream_body(obj, data, {"/Filter": "/FlateDecode", "/DecodeParms": None})
+
+
+def optimize_pdf(input_path: str, output_path: str, dpi: int = TARGET_DPI,
+                 quality: int = JPEG_QUALITY, workers: Optional[int] = None,
+                 progress: Optional[ProgressCallback] = None) -> OptimizeReport:
+    """Write a smaller copy of input_path to output_path and report the savings."""
+    if dpi < 1 or not 1 <= quality <= 95:
+        raise ValueError("DPI must be positive and JPEG quality between 1 and 95")
+    workers = workers or os.cpu_count() or 1
+    stats = {"images": 0, "streams": 0}
+
+    with LazyPdfReader(input_path) as reader, \
+            process_pool(workers, initializer=_open_worker, initargs=(input_path,)) as pool:
+        page_count = len(reader.pages)
+        # Scanning and recompressing count as the first half of the work
+        total = page_count * 2
+
+        with trace.span("optimize.scan", pages=page_count):
+            shown: Dict[Reference, Size] = {}
+            starts = range(0, page_count, SCAN_CHUNK)
+            stops = [min(start + SCAN_CHUNK, page_count) for start in starts]
+            for stop, sizes in zip(stops, pool.map(_scan_chunk, starts, stops)):
+                for key, (width, height) in sizes.items():
+                    old = shown.get(key, (0, 0))
+                    shown[key] = (max(old[0], width), max(old[1], height))
+                if progress:
+                    progress(stop // 2, total)
+
+        with trace.span("optimize.images", images=len(shown)):
+            futures = {key: pool.submit(_recompress, key, size, dpi, quality)
+                       for key, size in shown.items()}
+            replacements = {}
+            for done, (key, future) in enumerate(futures.items(), 1):
+                result = future.result()
+                if result is not None:
+                    replacements[key[0]] = result
+                if progress:
+                    progress(page_count // 2 + page_count * done // (2 * len(futures)), total)
+
+        def transform(copier: ObjectCopier, idnum: int, obj: StreamObject) -> Optional[bytes]:
+            if idnum in replacements:
+                changes, data = replacements[idnum]
+                stats["images"] += 1
+                return copier.stream_body(obj, data, changes)
+            body = compress_stream(copier, obj)
+            if body is not None:
+                stats["streams"] += 1
+            return body
+
+        with trace.span("pdf.write", output=output_path, pages=page_count), \
+                StreamingPdfWriter(output_path) as writer:
+            copier = ObjectCopier(reader, writer, transform=transform)
+            pages = list(reader.pages)
+            copier.reserve_pages(pages)
+            for index, page in enumerate(pages, 1):
+                copier.add_page(page)
+                if progress:
+                    progress(page_count + index, total)
+            # Bookmarks, forms, metadata and the like go along with the pages
+            writer.catalog.update(copier.copy_entries(reader.trailer["/Root"], CATALOG_KEYS))
+            writer.trailer.update(copier.copy_entries(reader.trailer, ("/Info",)))
+
+    report = OptimizeReport(page_count, os.path.getsize(input_path), os.path.getsize(output_path),
+                            stats["images"], stats["streams"])
+    trace.event("optimize.report", **report._asdict())
+    return report
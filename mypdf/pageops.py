@@ -0,0 +1,234 @@
+"""Page edits: rotate, delete, keep, move and N-up, written in one pass.
+
+Edits are recorded as a list of small operations, e.g.
+
+    ["rotate", "1-3", 90]     rotate pages 1-3 clockwise
+    ["delete", "7"]           drop page 7
+    ["keep", "1-3,7,10-"]     keep only these pages, in this order
+    ["move", "10-", 1]        move pages 10 to the end so they start at 1
+    ["nup", 2]                print 2 pages per sheet (1 turns it off)
+
+Page numbers refer to the document as the edits before them left it.
+PageEdits replays them on a list of page numbers, so recording an edit
+never touches the PDF, and write_pages applies the result in a single
+streaming write at save time. The ops list is plain JSON and can be sent
+to a batch job as is.
+"""
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import DictionaryObject, StreamObject
+
+from . import trace
+from .extract import ObjectCopier, ProgressCallback, parse_page_ranges
+from .pdfstream import StreamingPdfWriter, pdf_array, pdf_number, ref
+
+# Pages per sheet -> (columns, rows) on a sheet in portrait pages' orientation
+NUP_GRIDS = {1: (1, 1), 2: (2, 1), 4: (2, 2), 6: (3, 2), 8: (4, 2), 9: (3, 3), 16: (4, 4)}
+
+Edit = Sequence  # ["rotate", "1-3", 90], ["delete", "7"], ...
+
+
+class PageEdits:
+    """The pages of a document after a list of edits, without the document.
+
+    pages holds the 0-based source page shown at each position and
+    rotation the degrees added to each source page.
+    """
+
+    def __init__(self, page_count: int, ops: Iterable[Edit] = ()):
+        self.page_count = page_count
+        self.ops: List[list] = []
+        self.pages: List[int] = list(range(page_count))
+        self.rotation: Dict[int, int] = {}
+        self.nup = 1
+        for op in ops:
+            self.apply(op)
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.ops)
+
+    def select(self, spec: str) -> List[int]:
+        """Positions (0-based) picked by spec, in its order, each once."""
+        ranges = parse_page_ranges(spec, len(self.pages))
+        return list(dict.fromkeys(position for part in ranges for position in part))
+
+    def rotate(self, spec: str, degrees: int):
+        self.apply(["rotate", spec, degrees])
+
+    def delete(self, spec: str):
+        self.apply(["delete", spec])
+
+    def keep(self, spec: str):
+        self.apply(["keep", spec])
+
+    def move(self, spec: str, position: int):
+        self.apply(["move", spec, position])
+
+    def set_nup(self, n: int):
+        self.apply(["nup", n])
+
+    def undo(self):
+        """Forget the last edit."""
+        ops = self.ops[:-1]
+        self.__init__(self.page_count, ops)
+
+    def apply(self, op: Edit):
+        """Record one edit; raises ValueError and changes nothing if it is invalid."""
+        name, args = (op[0], list(op[1:])) if op else (None, [])
+        arity = {"rotate": 2, "delete": 1, "keep": 1, "move": 2, "nup": 1}
+        if name not in arity:
+            raise ValueError(f"Unknown page edit: {name!r}")
+        if len(args) != arity[name]:
+            raise ValueError(f"Invalid page edit: {list(op)!r}")
+
+        if name == "rotate":
+            degrees = int(args[1])
+            if degrees % 90:
+                raise ValueError("Rotation must be a multiple of 90 degrees")
+            for position in self.select(args[0]):
+                page = self.pages[position]
+                self.rotation[page] = (self.rotation.get(page, 0) + degrees) % 360
+        elif name == "nup":
+            n = int(args[0])
+            if n not in NUP_GRIDS:
+                raise ValueError(f"Pages per sheet must be one of {', '.join(map(str, NUP_GRIDS))}")
+            self.nup = n
+        else:
+            chosen = self.select(args[0])
+            picked = set(chosen)
+            rest = [page for position, page in enumerate(self.pages) if position not in picked]
+            if name == "delete":
+                pages = rest
+            elif name == "keep":
+                pages = [self.pages[position] for position in chosen]
+            else:
+                position = int(args[1])
+                if not 1 <= position <= len(rest) + 1:
+                    raise ValueError(f"Invalid position {position} (1-{len(rest) + 1})")
+                pages = rest[:position - 1] + [self.pages[p] for p in chosen] + rest[position - 1:]
+            if not pages:
+                raise ValueError("Edits would leave no pages")
+            self.pages = pages
+        self.ops.append([name, *args])
+
+
+def _page_rotation(page: DictionaryObject) -> int:
+    return int(page["/Rotate"]) % 360 if "/Rotate" in page else 0
+
+
+def _shown_size(page: DictionaryObject, rotation: int) -> Tuple[float, float]:
+    box = page.cropbox
+    width, height = float(box.width), float(box.height)
+    return (height, width) if rotation % 180 else (width, height)
+
+
+def _upright_matrix(page: DictionaryObject, rotation: int) -> Tuple[float, ...]:
+    """Map the page's box, turned clockwise by rotation, onto (0, 0, w, h)."""
+    box = page.cropbox
+    x0, y0, x1, y1 = (float(v) for v in (box.left, box.bottom, box.right, box.top))
+    return {
+        0: (1, 0, 0, 1, -x0, -y0),
+        90: (0, -1, 1, 0, -y0, x1),
+        180: (-1, 0, 0, -1, x1, y1),
+        270: (0, 1, -1, 0, y1, -x0),
+    }[rotation]
+
+
+def _form_xobject(copier: ObjectCopier, page: DictionaryObject) -> int:
+    """Write page as a Form XObject, reusing its content stream's bytes when possible."""
+    resources = copier.serialize(page.raw_get("/Resources")) if "/Resources" in page else b"<< >>"
+    box = page.cropbox
+    entries = {"/Type": "/XObject", "/Subtype": "/Form",
+               "/BBox": pdf_array([box.left, box.bottom, box.right, box.top]),
+               "/Resources": resources.decode("latin-1")}
+    contents = page["/Contents"] if "/Contents" in page else None
+    if isinstance(contents, StreamObject):
+        data = contents._data if isinstance(contents._data, bytes) else contents._data.encode("latin-1")
+        form_id = copier.writer.write_object(copier.stream_body(contents, data, entries))
+    else:
+        # Several content streams have to be joined into one
+        data = b"\n".join(part.get_object().get_data() for part in contents or ())
+        form_id = copier.writer.write_stream(
+            " ".join(f"{k} {v}" for k, v in entries.items()) + " /Filter /FlateDecode",
+            zlib.compress(data)
+        )
+    copier.flush()
+    return form_id
+
+
+def _write_sheets(copier: ObjectCopier, pages: List[Tuple[DictionaryObject, int]], n: int,
+                  progress: Optional[ProgressCallback] = None) -> int:
+    """Place pages n to a sheet, left to right and top to bottom; return the sheet count."""
+    first_width, first_height = _shown_size(*pages[0])
+    columns, rows = NUP_GRIDS[n]
+    if first_width > first_height:
+        columns, rows = rows, columns
+    # The sheet is the first page's size, turned to suit the grid
+    long_side, short_side = max(first_width, first_height), min(first_width, first_height)
+    if columns > rows:
+        sheet = (long_side, short_side)
+    elif rows > columns:
+        sheet = (short_side, long_side)
+    else:
+        sheet = (first_width, first_height)
+    cell_width, cell_height = sheet[0] / columns, sheet[1] / rows
+
+    sheets = 0
+    for start in range(0, len(pages), n):
+        placed = []
+        resources = []
+        for slot, (page, rotation) in enumerate(pages[start:start + n]):
+            form_id = _form_xobject(copier, page)
+            width, height = _shown_size(page, rotation)
+            scale = min(cell_width / width, cell_height / height)
+            column, row = slot % columns, slot // columns
+            x = column * cell_width + (cell_width - width * scale) / 2
+            y = sheet[1] - (row + 1) * cell_height + (cell_height - height * scale) / 2
+            a, b, c, d, e, f = _upright_matrix(page, rotation)
+            matrix = (a * scale, b * scale, c * scale, d * scale, e * scale + x, f * scale + y)
+            placed.append(f"q {' '.join(pdf_number(v) for v in matrix)} cm /P{slot} Do Q")
+            resources.append(f"/P{slot} {ref(form_id)}")
+            if progress:
+                progress(start + slot + 1, len(pages))
+        content_id = copier.writer.write_stream("", "\n".join(placed).encode("latin-1"))
+        copier.writer.add_page(content_id, f"<< /XObject << {' '.join(resources)} >> >>",
+                               (0, 0) + sheet)
+        sheets += 1
+    return sheets
+
+
+def write_pages(reader: PdfReader, output_path: str, edits: PageEdits,
+                progress: Optional[ProgressCallback] = None) -> int:
+    """Write reader's pages as edits leave them; return the pages (or sheets) written.
+
+    progress(done, total) counts source pages. N-up sheets draw each page
+    as a Form XObject, so annotations and links are not carried over.
+    """
+    if edits.page_count != len(reader.pages):
+        raise ValueError(f"Edits are for {edits.page_count} pages, "
+                         f"the document has {len(reader.pages)}")
+    with trace.span("pdf.write", output=output_path, edits=len(edits.ops)) as span, \
+            StreamingPdfWriter(output_path) as writer:
+        copier = ObjectCopier(reader, writer)
+        pages = []
+        for index in edits.pages:
+            page = reader.pages[index]
+            pages.append((page, (_page_rotation(page) + edits.rotation.get(index, 0)) % 360))
+        if edits.nup > 1:
+            count = _write_sheets(copier, pages, edits.nup, progress)
+        else:
+            copier.reserve_pages(page for page, _ in pages)
+            for done, (page, rotation) in enumerate(pages, 1):
+                extra = {"/Rotate": str(rotation)} if rotation != _page_rotation(page) else None
+                copier.add_page(page, extra)
+                if progress:
+                    progress(done, len(pages))
+            count = len(pages)
+        span.set(pages=count)
+    return count
@@ -0,0 +1,218 @@
+"""Minimal PDF writer that streams objects to disk as they are produced.
+
+Unlike PIL's save_all or reportlab's canvas, nothing is kept in memory
+except each object's byte offset and the list of page ids, so an output
+with thousands of pages costs the same RAM as one with ten.
+"""
+import os
+import threading
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+PDF_HEADER = b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n"
+A4_SIZE = (595, 842)
+
+
+def pdf_name(name: str) -> str:
+    return "/" + name.lstrip("/")
+
+
+def pdf_string(text: str, encoding: str = "latin-1") -> str:
+    """Encode text as a literal PDF string (unmappable chars become ?).
+
+    Use encoding="cp1252" for text shown in a /WinAnsiEncoding font.
+    """
+    data = text.encode(encoding, "replace").decode("latin-1")
+    data = data.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    data = data.replace("\r", "\\r").replace("\n", "\\n")
+    return f"({data})"
+
+
+def pdf_number(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return f"{value:.4f}".rstrip("0").rstrip(".")
+
+
+def pdf_array(values: Sequence) -> str:
+    return "[" + " ".join(pdf_number(v) if isinstance(v, (int, float)) else str(v)
+                          for v in values) + "]"
+
+
+def ref(obj_id: int) -> str:
+    return f"{obj_id} 0 R"
+
+
+class StreamingPdfWriter:
+    """Writes a PDF object by object; close() adds the page tree and xref.
+
+    A path output is written to a work file next to it and moved into
+    place by close(), so the output - which may be the very file being
+    read, through an mmap - is never truncated or left half-written.
+    Pass work_path to choose the work file; it is then kept if writing
+    fails, for resume().
+    """
+
+    def __init__(self, output: Union[str, BinaryIO], work_path: Optional[str] = None):
+        self.path: Optional[str] = None
+        self._work: Optional[str] = None
+        self._keep_work = work_path is not None
+        if isinstance(output, str):
+            self.path = output
+            self._work = work_path or f"{output}.{os.getpid()}.{threading.get_ident()}.tmp"
+            self._file = open(self._work, "wb")
+            self._owns_file = True
+        else:
+            self._file = output
+            self._owns_file = False
+        # Index is the object number; object 0 is the free-list head
+        self._offsets: List[Optional[int]] = [0]
+        self.page_ids: List[int] = []
+        self._file.write(PDF_HEADER)
+        self.pages_id = self.reserve()
+        self.info: dict = {}
+        # Raw PDF values close() adds to the catalog and trailer, e.g.
+        # {"/Outlines": "12 0 R"}; /Info here is replaced if info is set
+        self.catalog: Dict[str, str] = {}
+        self.trailer: Dict[str, str] = {}
+        # (object id, offset) of every object written while this is a list
+        self.written: Optional[List[Tuple[int, int]]] = None
+
+    @classmethod
+    def resume(cls, path: str, work_path: str, offset: int, size: int,
+               written: Sequence[Tuple[int, int]], page_ids: List[int]) -> "StreamingPdfWriter":
+        """Continue the work file an earlier writer for path got to offset in.
+
+        size is the number of object ids it had allocated, written the
+        (id, offset) pairs and page_ids the pages it had written by then.
+        Anything after offset is discarded.
+        """
+        writer = cls.__new__(cls)
+        writer.path = path
+        writer._work = work_path
+        writer._keep_work = True
+        writer._file = open(work_path, "r+b")
+        writer._file.truncate(offset)
+        writer._file.seek(offset)
+        writer._owns_file = True
+        writer._offsets = [0] + [None] * (size - 1)
+        for obj_id, obj_offset in written:
+            writer._offsets[obj_id] = obj_offset
+        writer.page_ids = list(page_ids)
+        writer.pages_id = 1
+        writer.info = {}
+        writer.catalog = {}
+        writer.trailer = {}
+        writer.written = None
+        return writer
+
+    @property
+    def size(self) -> int:
+        """Number of object ids allocated so far, including object 0."""
+        return len(self._offsets)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def sync(self):
+        """Flush everything written so far to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._owns_file:
+            self._file.close()
+            if not self._keep_work:
+                os.remove(self._work)
+
+    def reserve(self) -> int:
+        """Allocate an object number to be written later."""
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def write_object(self, body: Union[str, bytes], obj_id: Optional[int] = None) -> int:
+        if obj_id is None:
+            obj_id = self.reserve()
+        if isinstance(body, str):
+            body = body.encode("latin-1")
+        self._offsets[obj_id] = self._file.tell()
+        if self.written is not None:
+            self.written.append((obj_id, self._offsets[obj_id]))
+        self._file.write(b"%d 0 obj\n" % obj_id)
+        self._file.write(body)
+        self._file.write(b"\nendobj\n")
+        return obj_id
+
+    def write_stream(self, entries: str, data: bytes, obj_id: Optional[int] = None) -> int:
+        """Write a stream object; entries are the dict keys except /Length."""
+        body = f"<< {entries} /Length {len(data)} >>\nstream\n".encode("latin-1")
+        return self.write_object(body + data + b"\nendstream", obj_id)
+
+    def add_page(self, content_id: int, resources: str,
+                 media_box: Sequence[float], extra: str = "") -> int:
+        page_id = self.write_object(
+            f"<< /Type /Page /Parent {ref(self.pages_id)} "
+            f"/MediaBox {pdf_array(media_box)} /Resources {resources} "
+            f"/Contents {ref(content_id)} {extra}>>"
+        )
+        self.page_ids.append(page_id)
+        return page_id
+
+    def add_image_page(self, image_entries: str, image_data: bytes,
+                       image_size: Sequence[float], page_size: Sequence[float],
+                       position: Sequence[float] = (0, 0), overlay: str = "",
+                       overlay_resources: str = "") -> int:
+        """Add a page showing one image XObject at image_size points.
+
+        image_entries holds the image's /Width, /Height, /ColorSpace etc.;
+        scaling happens in the content stream, not by resampling pixels.
+        overlay is content drawn over the image (e.g. an OCR text layer) and
+        overlay_resources the /Resources entries it needs, e.g.
+        "/Font << /OCR 5 0 R >>".
+        """
+        image_id = self.write_stream(f"/Type /XObject /Subtype /Image {image_entries}",
+                                     image_data)
+        w, h = image_size
+        x, y = position
+        content = f"q {pdf_number(w)} 0 0 {pdf_number(h)} {pdf_number(x)} {pdf_number(y)} cm /Im0 Do Q"
+        if overlay:
+            content += "\n" + overlay
+        content_id = self.write_stream("", content.encode("latin-1"))
+        return self.add_page(content_id,
+                             f"<< /XObject << /Im0 {ref(image_id)} >> {overlay_resources}>>",
+                             (0, 0) + tuple(page_size))
+
+    def close(self):
+        kids = " ".join(ref(page_id) for page_id in self.page_ids)
+        self.write_object(
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>",
+            self.pages_id
+        )
+        catalog = {"/Type": "/Catalog", **self.catalog, "/Pages": ref(self.pages_id)}
+        catalog_id = self.write_object(
+            "<< " + " ".join(f"{k} {v}" for k, v in catalog.items()) + " >>"
+        )
+        trailer = dict(self.trailer)
+        if self.info:
+            entries = " ".join(f"{pdf_name(k)} {pdf_string(v)}" for k, v in self.info.items())
+            trailer["/Info"] = ref(self.write_object(f"<< {entries} >>"))
+
+        # Objects reserved but never written become free entries
+        xref_offset = self._file.tell()
+        lines = [f"xref\n0 {len(self._offsets)}\n", "0000000000 65535 f \n"]
+        for offset in self._offsets[1:]:
+            if offset is None:
+                lines.append("0000000000 65535 f \n")
+            else:
+                lines.append(f"{offset:010d} 00000 n \n")
+        trailer.update({"/Size": str(len(self._offsets)), "/Root": ref(catalog_id)})
+        entries = " ".join(f"{k} {v}" for k, v in trailer.items())
+        lines.append(f"trailer\n<< {entries} >>\nstartxref\n{xref_offset}\n%%EOF\n")
+        self._file.write("".join(lines).encode("latin-1"))
+        if self._owns_file:
+            self._file.close()
+            os.replace(self._work, self.path)
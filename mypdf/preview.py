@@ -0,0 +1,41 @@
+"""Reduced-size image decoding for the preview canvas.
+
+Sources are often 12-50 MP phone photos while the canvas is 580x480, so we
+never decode at full resolution: JPEGs use draft mode (DCT scaling in the
+decoder) and other formats use Image.reduce() before the final resize.
+"""
+from typing import TYPE_CHECKING, Tuple
+
+from . import trace
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+PREVIEW_SIZE = (580, 480)
+
+
+def fit_size(size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    """Largest size with the same aspect ratio as size that fits in box."""
+    width, height = size
+    scale = min(box[0] / width, box[1] / height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def load_preview(path: str, box: Tuple[int, int] = PREVIEW_SIZE) -> "Image.Image":
+    """Decode path at roughly the size needed to fill box."""
+    # Imported here so the GUI can start without PIL
+    from PIL import Image
+
+    with trace.span("image.decode", path=path), Image.open(path) as img:
+        target = fit_size(img.size, box)
+        if img.format == "JPEG":
+            img.draft("RGB", target)
+        img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info
+                          else "RGB")
+    with trace.span("image.resize", path=path):
+        factor = min(img.width // target[0], img.height // target[1])
+        if factor >= 2:
+            img = img.reduce(factor)
+        if img.size != target:
+            img = img.resize(target, Image.LANCZOS)
+    return img
@@ -0,0 +1,289 @@
+"""Memory-mapped PDF reader for very large inputs.
+
+PyPDF2's PdfReader copies the whole file into a BytesIO, parses every xref
+entry, flattens the complete page tree on the first len(reader.pages) and
+keeps every object it ever resolved. LazyPdfReader keeps PdfReader's API
+but:
+
+* reads through an mmap, so the OS pages the file in on demand;
+* records classic xref subsections and decodes an entry only when that
+  object is requested;
+* answers len(pages) from /Count and finds page N by walking the page
+  tree using the /Count of each node;
+* keeps resolved objects in a bounded LRU instead of an unbounded dict.
+"""
+import mmap
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+from PyPDF2._page import PageObject
+from PyPDF2.generic import DictionaryObject, NameObject, NullObject
+
+INHERITABLE_PAGE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+XREF_ENTRY_SIZE = 20
+XREF_ENTRY = re.compile(rb"\d{10} \d{5} [fn](\r\n| \r| \n)")
+
+
+class BoundedObjectCache(OrderedDict):
+    """Drop-in for PdfReader.resolved_objects that forgets old entries."""
+
+    def __init__(self, max_items: int):
+        super().__init__()
+        self.max_items = max_items
+
+    def get(self, key, default=None):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        return default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.max_items:
+            self.popitem(last=False)
+
+
+class _XrefSections:
+    """Classic xref subsections whose entries are decoded on demand."""
+
+    def __init__(self, data):
+        self.data = data
+        # Sorted by first object number for lookups: (first, count, offset, rank)
+        self._starts: List[int] = []
+        self._sections: List[Tuple[int, int, int, int]] = []
+        self._rank = 0
+
+    def add(self, first: int, count: int, offset: int):
+        # Tables are read newest first, so a lower rank wins on overlap
+        index = bisect_right(self._starts, first)
+        self._starts.insert(index, first)
+        self._sections.insert(index, (first, count, offset, self._rank))
+        self._rank += 1
+
+    def lookup(self, idnum: int) -> Optional[Tuple[int, int, bool]]:
+        """Return (offset, generation, in_use) for idnum, or None."""
+        best = None
+        # Sections can overlap between incremental updates, so look at every
+        # section starting at or before idnum (there are usually only a few)
+        for first, count, offset, rank in self._sections[:bisect_right(self._starts, idnum)]:
+            if first <= idnum < first + count and (best is None or rank < best[1]):
+                best = (offset + (idnum - first) * XREF_ENTRY_SIZE, rank)
+        if best is None:
+            return None
+        line = self.data[best[0]:best[0] + XREF_ENTRY_SIZE]
+        return int(line[:10]), int(line[11:16]), line[17:18] == b"n"
+
+    def __bool__(self):
+        return bool(self._sections)
+
+
+class _LazyGeneration(dict):
+    """xref[generation]: eager entries first, then the lazy sections."""
+
+    def __init__(self, generation: int, sections: _XrefSections, entries=()):
+        super().__init__(entries)
+        self.generation = generation
+        self.sections = sections
+
+    def _lookup(self, idnum):
+        if not isinstance(idnum, int):
+            return None
+        entry = self.sections.lookup(idnum)
+        if entry is None or entry[1] != self.generation or not entry[2]:
+            return None
+        return entry[0]
+
+    def __contains__(self, idnum):
+        return dict.__contains__(self, idnum) or self._lookup(idnum) is not None
+
+    def __getitem__(self, idnum):
+        if dict.__contains__(self, idnum):
+            return dict.__getitem__(self, idnum)
+        offset = self._lookup(idnum)
+        if offset is None:
+            raise KeyError(idnum)
+        return offset
+
+    def get(self, idnum, default=None):
+        return self[idnum] if idnum in self else default
+
+
+class _LazyXref(dict):
+    """reader.xref replacement that answers from lazy sections as well."""
+
+    def __init__(self, sections: _XrefSections):
+        super().__init__()
+        self.sections = sections
+
+    def __setitem__(self, generation, entries):
+        if not isinstance(entries, _LazyGeneration):
+            entries = _LazyGeneration(generation, self.sections, entries)
+        super().__setitem__(generation, entries)
+
+    def __contains__(self, generation):
+        return dict.__contains__(self, generation) or bool(self.sections)
+
+    def __missing__(self, generation):
+        entries = _LazyGeneration(generation, self.sections)
+        dict.__setitem__(self, generation, entries)
+        return entries
+
+    def get(self, generation, default=None):
+        return self[generation] if generation in self else default
+
+
+class LazyPdfReader(PdfReader):
+    def __init__(self, path: str, cache_size: int = 4096, page_cache_size: int = 256,
+                 strict: bool = False, password=None):
+        self._file = open(path, "rb")
+        try:
+            # An empty file cannot be mapped
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise
+        self._sections = _XrefSections(self._map)
+        self._page_cache: "OrderedDict[int, PageObject]" = OrderedDict()
+        self._page_cache_size = page_cache_size
+        self.path = path
+        try:
+            super().__init__(self._map, strict=strict, password=password)
+        except BaseException:
+            # Not a PDF, or a broken one: do not keep the file open
+            self._map.close()
+            self._file.close()
+            raise
+        resolved = self.resolved_objects
+        self.resolved_objects = BoundedObjectCache(cache_size)
+        self.resolved_objects.update(resolved)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.resolved_objects.clear()
+        self._page_cache.clear()
+        self._map.close()
+        self._file.close()
+
+    def get_object(self, indirect_reference):
+        idnum = getattr(indirect_reference, "idnum", indirect_reference)
+        generation = getattr(indirect_reference, "generation", 0)
+        if (self._sections and idnum not in self.xref_objStm
+                and self.cache_get_indirect_object(generation, idnum) is None):
+            # Free entries are not in the lazy xref; answer them here before
+            # PyPDF2 falls back to scanning the whole file for the object
+            entry = self._sections.lookup(idnum)
+            if entry is not None and not entry[2] and not any(
+                dict.__contains__(entries, idnum) for entries in self.xref.values()
+            ):
+                return NullObject()
+        return super().get_object(indirect_reference)
+
+    def _read_xref_tables_and_trailers(self, stream, startxref, xref_issue_nr):
+        super()._read_xref_tables_and_trailers(stream, startxref, xref_issue_nr)
+        # PyPDF2 resets xref at the start of this method; swap in the lazy
+        # view afterwards, keeping whatever it parsed eagerly
+        eager = self.xref
+        self.xref = _LazyXref(self._sections)
+        for generation, entries in eager.items():
+            self.xref[generation] = entries
+
+    def _read_standard_xref_table(self, stream):
+        """Record subsections without decoding entries when the table is regular."""
+        table_start = stream.tell()
+        sections = []
+        if stream.read(4)[:3] == b"ref":
+            while True:
+                match = re.match(rb"\s*(\d+)\s+(\d+)\s*?(\r\n|\r|\n)",
+                                 self._map[stream.tell():stream.tell() + 64])
+                if not match:
+                    break
+                first, count = int(match.group(1)), int(match.group(2))
+                offset = stream.tell() + match.end()
+                last = offset + (count - 1) * XREF_ENTRY_SIZE
+                if count and not (
+                    XREF_ENTRY.fullmatch(self._map[offset:offset + XREF_ENTRY_SIZE])
+                    and XREF_ENTRY.fullmatch(self._map[last:last + XREF_ENTRY_SIZE])
+                ):
+                    sections = None  # Irregular entries: let PyPDF2 repair them
+                    break
+                sections.append((first, count, offset))
+                stream.seek(offset + count * XREF_ENTRY_SIZE)
+        # A table not starting at object 0 may need PyPDF2's renumbering fix
+        if not sections or sections[0][0] != 0:
+            stream.seek(table_start)
+            return super()._read_standard_xref_table(stream)
+        for first, count, offset in sections:
+            self._sections.add(first, count, offset)
+        # Leave the stream just after "trailer" as PyPDF2 does
+        while self._map[stream.tell():stream.tell() + 1].isspace():
+            stream.seek(1, 1)
+        if self._map[stream.tell():stream.tell() + 7] == b"trailer":
+            stream.seek(7, 1)
+
+    def _get_num_pages(self) -> int:
+        if self.flattened_pages is not None:
+            return len(self.flattened_pages)
+        return int(self.trailer["/Root"]["/Pages"]["/Count"])
+
+    def _get_page(self, page_number: int) -> PageObject:
+        if self.flattened_pages is not None:
+            return super()._get_page(page_number)
+        if page_number < 0:
+            page_number += self._get_num_pages()
+        if page_number in self._page_cache:
+            self._page_cache.move_to_end(page_number)
+            return self._page_cache[page_number]
+
+        page = self._find_page(page_number)
+        self._page_cache[page_number] = page
+        while len(self._page_cache) > self._page_cache_size:
+            self._page_cache.popitem(last=False)
+        return page
+
+    def _find_page(self, page_number: int) -> PageObject:
+        """Walk the page tree to page_number using each node's /Count."""
+        node = self.trailer["/Root"]["/Pages"].get_object()
+        inherit: Dict[str, object] = {}
+        remaining = page_number
+        while True:
+            for attr in INHERITABLE_PAGE_ATTRIBUTES:
+                if attr in node:
+                    inherit[attr] = node[attr]
+            kids = node["/Kids"]
+            # A node whose /Count equals its number of kids holds only leaves
+            if int(node.get("/Count", -1)) == len(kids) and remaining < len(kids):
+                kid_ref = kids[remaining]
+                kid = kid_ref.get_object()
+                if "/Kids" not in kid:
+                    return self._make_page(kid_ref, kid, inherit)
+            for kid_ref in kids:
+                kid = kid_ref.get_object()
+                if "/Kids" in kid:
+                    count = int(kid.get("/Count", 0))
+                    if remaining < count:
+                        node = kid
+                        break
+                    remaining -= count
+                elif remaining == 0:
+                    return self._make_page(kid_ref, kid, inherit)
+                else:
+                    remaining -= 1
+            else:
+                raise IndexError(f"Page {page_number + 1} not found in page tree")
+
+    def _make_page(self, indirect_reference, kid: DictionaryObject, inherit) -> PageObject:
+        page = PageObject(self, indirect_reference)
+        page.update(kid)
+        for attr, value in inherit.items():
+            if attr not in page:
+                page[NameObject(attr)] = value
+        return page
@@ -0,0 +1,245 @@
+"""Rasterized PDF page previews rendered off the Tk thread.
+
+Pages are turned into ready-made bitmaps, either with poppler's pdftoppm
+when it is installed or by compositing the page's text and placed images
+with Pillow. Results go into an LRU cache keyed by (file, page, zoom) and a
+background thread keeps the pages around the current one warm.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+from PyPDF2.generic import ContentStream
+
+from . import pdfimages, trace
+from .cache import LRUCache, image_cost
+from .preview import PREVIEW_SIZE, fit_size
+from .reader import LazyPdfReader
+
+# Shared by every renderer so reopening a file reuses its pages
+PAGE_CACHE = LRUCache(max_items=512, max_cost=192 * 1024 * 1024, cost=image_cost)
+
+Matrix = Tuple[float, float, float, float, float, float]
+IDENTITY: Matrix = (1, 0, 0, 1, 0, 0)
+FORM_DEPTH = 8
+
+
+def _multiply(m: Matrix, n: Matrix) -> Matrix:
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (
+        a * a2 + b * c2, a * b2 + b * d2,
+        c * a2 + d * c2, c * b2 + d * d2,
+        e * a2 + f * c2 + e2, e * b2 + f * d2 + f2,
+    )
+
+
+def _xobjects(resources):
+    if hasattr(resources, 'get_object'):
+        resources = resources.get_object()
+    if not resources or '/XObject' not in resources:
+        return {}
+    return resources['/XObject'].get_object()
+
+
+def _placed_images(page) -> List[Tuple[object, object, Matrix]]:
+    """Return (name, image XObject, CTM) for every image drawn on the page.
+
+    Form XObjects are followed (with their /Matrix), up to FORM_DEPTH deep.
+    """
+    contents = page.get_contents()
+    if contents is None:
+        return []
+    placed: List[Tuple[object, object, Matrix]] = []
+    _walk_content(contents, page.pdf, _xobjects(page.get('/Resources', {})),
+                  IDENTITY, placed, 0)
+    return placed
+
+
+def _walk_content(contents, pdf, xobject, ctm: Matrix, placed: list, depth: int):
+    stack = []
+    for operands, operator in ContentStream(contents, pdf).operations:
+        if operator == b"q":
+            stack.append(ctm)
+        elif operator == b"Q":
+            ctm = stack.pop() if stack else ctm
+        elif operator == b"cm":
+            ctm = _multiply(tuple(float(v) for v in operands), ctm)
+        elif operator == b"Do":
+            name = operands[0]
+            obj = xobject.get(name)
+            if obj is None:
+                continue
+            obj = obj.get_object()
+            subtype = obj.get('/Subtype')
+            if subtype == '/Image':
+                placed.append((name, obj, ctm))
+            elif subtype == '/Form' and depth < FORM_DEPTH:
+                matrix = tuple(float(v) for v in obj.get('/Matrix', IDENTITY))
+                _walk_content(obj, pdf, _xobjects(obj.get('/Resources', {})) or xobject,
+                              _multiply(matrix, ctm), placed, depth + 1)
+
+
+def compose_page(page, size: Tuple[int, int], text: Optional[str] = None) -> Image.Image:
+    """Approximate a page bitmap from its text and placed images.
+
+    Pass text when it is already known (see textindex) to skip extraction.
+    """
+    box = page.mediabox
+    page_width, page_height = float(box.width), float(box.height)
+    width, height = fit_size((page_width, page_height), size)
+    scale = width / page_width
+    bitmap = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(bitmap)
+
+    if text is None:
+        try:
+            with trace.span("text.extract"):
+                text = page.extract_text()
+        except Exception as e:
+            text = f"Error extracting text: {str(e)}"
+            trace.error("text.extract", e)
+    if text:
+        draw.multiline_text((10, 10), text, fill="black")
+
+    try:
+        placed = _placed_images(page)
+    except Exception as e:
+        trace.error("render.resources", e)
+        placed = []
+    for name, obj, (a, b, c, d, e, f) in placed:
+        # The image fills the unit square mapped through the CTM
+        xs = [e, a + e, c + e, a + c + e]
+        ys = [f, b + f, d + f, b + d + f]
+        left = int((min(xs) - float(box.left)) * scale)
+        top = int((float(box.top) - max(ys)) * scale)
+        target = (max(1, int((max(xs) - min(xs)) * scale)),
+                  max(1, int((max(ys) - min(ys)) * scale)))
+        try:
+            with trace.span("image.decode", image=name):
+                img = pdfimages.decode_image(obj, max_size=target)
+            with trace.span("image.resize", size=target):
+                img = img.resize(target, Image.BILINEAR)
+        except Exception as e:
+            trace.error("render.image", e, image=name)
+            continue
+        if img.mode in ("LA", "RGBA"):
+            bitmap.paste(img.convert("RGB"), (left, top), img.getchannel("A"))
+        else:
+            bitmap.paste(img.convert("RGB"), (left, top))
+    return bitmap
+
+
+def rasterize_with_pdftoppm(path: str, index: int, size: Tuple[int, int]) -> Optional[Image.Image]:
+    """Render one page with poppler, or return None if it is not installed."""
+    pdftoppm = shutil.which("pdftoppm")
+    if not pdftoppm:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "page")
+        subprocess.run(
+            [pdftoppm, "-f", str(index + 1), "-l", str(index + 1), "-singlefile",
+             "-scale-to-x", str(size[0]), "-scale-to-y", "-1", "-png", path, root],
+            check=True, capture_output=True
+        )
+        with Image.open(root + ".png") as img:
+            img.load()
+            img.thumbnail(size)
+            return img
+
+
+class PageRenderer:
+    """Renders pages of one PDF on a background thread.
+
+    get() never blocks: it returns the cached bitmap or None and queues the
+    page. on_ready(index) is called from the worker thread when a page is
+    done, so GUI callers must hand it back to the Tk thread themselves.
+    """
+
+    def __init__(self, path: str, zoom: float = 1.0, prefetch: int = 3,
+                 size: Tuple[int, int] = PREVIEW_SIZE,
+                 on_ready: Optional[Callable[[int], None]] = None,
+                 page_text: Optional[Callable[[int], Optional[str]]] = None):
+        self.path = path
+        # Known page texts (e.g. TextIndex.page_text); None means extract
+        self.page_text = page_text
+        self.zoom = zoom
+        self.prefetch_count = prefetch
+        self.size = (int(size[0] * zoom), int(size[1] * zoom))
+        self.on_ready = on_ready
+        self.file_key = (os.path.abspath(path), os.path.getmtime(path))
+        # The renderer has its own reader so it never races the GUI's
+        self.reader = LazyPdfReader(path)
+        self.page_count = len(self.reader.pages)
+        self._wanted: List[int] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def key(self, index: int):
+        return (self.file_key, index, self.zoom)
+
+    def get(self, index: int) -> Optional[Image.Image]:
+        img = PAGE_CACHE.get(self.key(index))
+        if img is None:
+            self._schedule([index])
+        return img
+
+    def prefetch(self, center: int):
+        """Queue the pages around center, nearest first."""
+        indexes = [center]
+        for offset in range(1, self.prefetch_count + 1):
+            indexes += [center + offset, center - offset]
+        self._schedule([i for i in indexes if 0 <= i < self.page_count])
+
+    def render(self, index: int) -> Image.Image:
+        """Render a page synchronously, using the cache."""
+        img = PAGE_CACHE.get(self.key(index))
+        if img is None:
+            trace.count("render.cache_misses")
+            with trace.span("render.page", page=index + 1) as span:
+                img = rasterize_with_pdftoppm(self.path, index, self.size)
+                span.set(backend="pdftoppm" if img is not None else "compose")
+                if img is None:
+                    text = self.page_text(index) if self.page_text else None
+                    img = compose_page(self.reader.pages[index], self.size, text)
+            PAGE_CACHE.put(self.key(index), img)
+        return img
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.reader.close()
+
+    def _schedule(self, indexes: List[int]):
+        with self._cond:
+            # Newest requests first; anything not re-requested keeps its place after them
+            wanted = [i for i in indexes if PAGE_CACHE.get(self.key(i)) is None]
+            self._wanted = wanted + [i for i in self._wanted if i not in wanted]
+            self._cond.notify()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._wanted and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                index = self._wanted.pop(0)
+            try:
+                self.render(index)
+            except Exception as e:
+                trace.error("render.page", e, page=index + 1)
+                # Cache a placeholder so the page is not retried on every view
+                img = Image.new("RGB", self.size, "white")
+                ImageDraw.Draw(img).text((10, 10), f"Error displaying page: {e}", fill="black")
+                PAGE_CACHE.put(self.key(index), img)
+            if self.on_ready:
+                self.on_ready(index)
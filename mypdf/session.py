@@ -0,0 +1,214 @@
+"""Open documents, one per GUI tab, and the memory budget they share.
+
+A Document remembers what a tab shows (file or files, mode, page, order)
+and holds the heavy objects behind it while it is loaded: the PDF reader,
+background renderer and text index, or the Word layout. Decoded images
+and rendered pages live in shared LRU caches, keyed by file path, and
+are counted against the document that owns the file.
+
+ResourceManager keeps the loaded documents' total under a budget
+(MYPDF_MEMORY_MB, 1024 MB by default). Past it, the least recently used
+documents are released: readers and workers closed, their cache entries
+dropped. The tab stays; switching back loads it again where it was.
+
+Sizes are estimates. Readers are mmapped, so the file itself is paged
+by the OS and only the parsed objects are counted.
+"""
+import itertools
+import os
+import sys
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Sequence, Set, Tuple
+
+from . import trace
+from .cache import LRUCache
+
+MEMORY_BUDGET_ENV = "MYPDF_MEMORY_MB"
+MEMORY_BUDGET_MB = 1024
+READER_BYTES = 1024 * 1024  # Xref sections, trailer and page tree
+OBJECT_BYTES = 2048  # Per parsed object in a reader's cache
+LAYOUT_PAGE_BYTES = 64 * 1024  # Laid out flowables of one Word page
+
+# A cache and how to find the file path in one of its keys
+CacheSpec = Tuple[LRUCache, Callable[[Hashable], Optional[str]]]
+
+_ids = itertools.count(1)
+
+
+class MissingDependency(ImportError):
+    """A package needed to open a document is not installed; str() says which."""
+
+
+def _shared_caches() -> List[CacheSpec]:
+    # Only caches of modules already in use; importing them here would undo
+    # the GUI's lazy imports
+    caches: List[CacheSpec] = []
+    render = sys.modules.get(f"{__package__}.render")
+    if render is not None:
+        caches.append((render.PAGE_CACHE, lambda key: key[0][0]))
+    thumbnails = sys.modules.get(f"{__package__}.thumbnails")
+    if thumbnails is not None:
+        caches.append((thumbnails.THUMB_CACHE, lambda key: key[1]))
+    layout = sys.modules.get(f"{__package__}.layout")
+    if layout is not None:
+        caches.append((layout._LAYOUTS, lambda key: key[0]))
+    return caches
+
+
+class Document:
+    """One open tab: a PDF to crop, a Word file, images or PDFs to merge."""
+
+    def __init__(self, mode: str, path: Optional[str] = None, files: Sequence[str] = ()):
+        self.id = next(_ids)
+        self.mode = mode
+        self.path = path
+        self.files = list(files)
+        self.order: List[int] = list(range(len(self.files)))  # images; pages once loaded
+        self.edits = None  # pageops.PageEdits of a PDF, kept while released
+        self.position = 0  # page or image shown
+        self.page_count = 0
+        self.reader = None
+        self.page_renderer = None
+        self.text_index = None
+        self.word_layout = None
+        self.loaded = False
+
+    @property
+    def title(self) -> str:
+        if self.path:
+            return os.path.basename(self.path)
+        kind = "images" if self.mode == "images" else "PDFs"
+        return f"{len(self.files)} {kind}"
+
+    def paths(self) -> Set[str]:
+        return {os.path.abspath(path) for path in ([self.path] if self.path else self.files)}
+
+    def load(self):
+        """Open what the document needs to be shown; a no-op when loaded."""
+        if self.loaded:
+            return
+        with trace.span("session.load", mode=self.mode, document=self.title):
+            if self.mode == "crop":
+                from .pageops import PageEdits
+                from .reader import LazyPdfReader
+                from .render import PageRenderer
+                from .textindex import TextIndex
+
+                # Pages are only parsed when previewed or exported
+                self.reader = LazyPdfReader(self.path)
+                self.page_count = len(self.reader.pages)
+                if self.edits is None or self.edits.page_count != self.page_count:
+                    self.edits = PageEdits(self.page_count)
+                self.order = list(self.edits.pages)
+                self.position = min(self.position, max(0, self.page_count - 1))
+                # Text is extracted for every page in the background and
+                # shared with the renderer
+                self.text_index = TextIndex(self.path, self.page_count)
+                self.page_renderer = PageRenderer(self.path, page_text=self.text_index.page_text)
+            elif self.mode == "word":
+                from . import layout
+
+                # Same pagination as the PDF output; the body is streamed,
+                # so only the first page is laid out before it is shown
+                self.word_layout = layout.get_layout(self.path)
+            # Images and merge lists decode nothing up front
+        self.loaded = True
+
+    def release(self, caches: Sequence[CacheSpec] = ()):
+        """Close readers and workers and drop this document's cache entries."""
+        if self.page_renderer is not None:
+            self.page_renderer.close()
+        if self.text_index is not None:
+            self.text_index.close()
+        if self.word_layout is not None:
+            self.word_layout.stop()
+        if self.reader is not None:
+            self.reader.close()
+        self.reader = self.page_renderer = self.text_index = self.word_layout = None
+        paths = self.paths()
+        for cache, key_path in caches:
+            cache.remove_where(lambda key: key_path(key) in paths)
+        self.loaded = False
+
+    def memory(self, caches: Sequence[CacheSpec] = ()) -> int:
+        """Estimated bytes held by this document, cache entries included."""
+        paths = self.paths()
+        total = sum(cache.cost_where(lambda key: key_path(key) in paths)
+                    for cache, key_path in caches)
+        if self.reader is not None:
+            total += READER_BYTES + OBJECT_BYTES * len(self.reader.resolved_objects)
+        if self.text_index is not None:
+            total += self.text_index.memory_estimate()
+        if self.word_layout is not None:
+            # The XML is streamed and dropped as it is laid out
+            total += LAYOUT_PAGE_BYTES * len(self.word_layout.pages)
+        return total
+
+
+class ResourceManager:
+    """Keeps the open documents within a memory budget, least recently used first.
+
+    caches are the caller's own caches to count and clean up along with
+    the shared ones (rendered pages, thumbnails, Word layouts).
+    """
+
+    def __init__(self, budget: Optional[int] = None, caches: Sequence[CacheSpec] = ()):
+        if budget is None:
+            budget = int(os.environ.get(MEMORY_BUDGET_ENV, MEMORY_BUDGET_MB)) * 1024 * 1024
+        self.budget = budget
+        self._caches = list(caches)
+        # Least recently used first
+        self.documents: "OrderedDict[int, Document]" = OrderedDict()
+
+    def caches(self) -> List[CacheSpec]:
+        return self._caches + _shared_caches()
+
+    def add(self, doc: Document):
+        self.documents[doc.id] = doc
+
+    def use(self, doc: Document) -> List[Document]:
+        """Load doc as the one in view; returns the documents released to make room."""
+        doc.load()
+        self.documents[doc.id] = doc
+        self.documents.move_to_end(doc.id)
+        return self.enforce()
+
+    def close(self, doc: Document):
+        if self.documents.pop(doc.id, None) is not None:
+            doc.release(self.caches())
+
+    def close_all(self):
+        for doc in list(self.documents.values()):
+            self.close(doc)
+
+    def usage(self) -> int:
+        """Estimated bytes held by every document and the caches."""
+        caches = self.caches()
+        owned = sum(doc.memory() for doc in self.documents.values())
+        # Cache entries count once whoever owns them, including leftovers
+        # of closed documents
+        return owned + sum(cache.total_cost for cache, _ in caches)
+
+    def enforce(self) -> List[Document]:
+        """Release least recently used documents (never the newest) until under budget."""
+        released = []
+        caches = self.caches()
+        candidates = [doc for doc in list(self.documents.values())[:-1] if doc.loaded]
+        usage = self.usage()
+        for doc in candidates:
+            if usage <= self.budget:
+                break
+            freed = doc.memory(caches)
+            doc.release(caches)
+            usage -= freed
+            released.append(doc)
+            trace.count("session.released")
+        if released:
+            trace.event("session.enforce", released=len(released), usage=usage,
+                        budget=self.budget)
+        if usage > self.budget:
+            # Only the document in view is left; shed cache entries nobody owns
+            owned = set().union(*(doc.paths() for doc in self.documents.values()))
+            for cache, key_path in caches:
+                cache.remove_where(lambda key: key_path(key) not in owned)
+        return released
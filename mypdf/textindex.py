@@ -0,0 +1,220 @@
+"""Background full-text extraction and search for opened PDFs.
+
+Text is extracted once per file, in chunks of pages across a process pool
+(PyPDF2's extract_text is pure Python, so threads would not help) that all
+open documents share, and saved gzipped in the disk cache under the
+file's SHA-256. Reopening the same document - even under another name -
+loads the text instantly.
+
+Extracted pages feed an inverted word index, so a phrase search over
+thousands of pages only scans the pages that contain its inner words.
+"""
+import gzip
+import json
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+from . import trace
+from .cache import disk_cache, file_digest
+from .reader import LazyPdfReader
+from .workers import process_pool
+
+CHUNK_PAGES = 50
+CACHE_VERSION = 1
+TEXT_WORKERS = 4  # Size of the pool every TextIndex shares
+WORD = re.compile(r"\w+")
+WORD_INDEX_BYTES = 200  # A word's key and page set, roughly
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class Match(NamedTuple):
+    page: int  # 0-based
+    snippet: str
+
+
+def extract_range(path: str, start: int, stop: int) -> List[str]:
+    """Text of pages start..stop-1; pages that fail to extract are empty."""
+    texts = []
+    with LazyPdfReader(path) as reader:
+        for index in range(start, stop):
+            try:
+                texts.append(reader.pages[index].extract_text() or "")
+            except Exception as e:
+                trace.error("text.extract", e, page=index + 1)
+                texts.append("")
+    return texts
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _shared_pool() -> ProcessPoolExecutor:
+    """The extraction pool, started when the first document needs it."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = process_pool(min(TEXT_WORKERS, os.cpu_count() or 1))
+        return _pool
+
+
+def _cache_key(digest: str) -> str:
+    return disk_cache().key("text", CACHE_VERSION, digest)
+
+
+def load_cached(digest: str) -> Optional[List[str]]:
+    data = disk_cache().get(_cache_key(digest))
+    if data is None:
+        return None
+    try:
+        return json.loads(gzip.decompress(data))
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached(digest: str, pages: List[str]):
+    data = gzip.compress(json.dumps(pages).encode("utf-8"))
+    disk_cache().put(_cache_key(digest), data)
+
+
+class TextIndex:
+    """Page texts of one PDF, extracted in the background and searchable.
+
+    Everything is usable while extraction runs: page_text() returns None
+    for pages not done yet and search() only covers finished pages.
+    on_progress(done, total) is called from the background thread.
+    """
+
+    def __init__(self, path: str, page_count: int, workers: Optional[int] = None,
+                 on_progress: Optional[ProgressCallback] = None):
+        self.path = path
+        self.page_count = page_count
+        # Chunks this document keeps in flight; 1 extracts in the background thread
+        self.workers = workers or min(TEXT_WORKERS, os.cpu_count() or 1)
+        self.on_progress = on_progress
+        self.done = 0
+        self.complete = False
+        self.error: Optional[str] = None
+        self._texts: List[Optional[str]] = [None] * page_count
+        self._lower: List[Optional[str]] = [None] * page_count
+        self._words: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._cancel.set()
+        self._thread.join()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until extraction has finished; returns complete."""
+        self._thread.join(timeout)
+        return self.complete
+
+    def page_text(self, index: int) -> Optional[str]:
+        return self._texts[index]
+
+    def memory_estimate(self) -> int:
+        """Rough bytes held: each text, its lower-cased copy and the word index."""
+        with self._lock:
+            chars = sum(len(text) for text in self._texts if text)
+            return 2 * chars + WORD_INDEX_BYTES * len(self._words)
+
+    def _add(self, start: int, texts: List[str]):
+        with self._lock:
+            for index, text in enumerate(texts, start):
+                # Lower-cased with runs of whitespace collapsed, as queries are
+                lower = " ".join(text.lower().split())
+                self._texts[index] = text
+                self._lower[index] = lower
+                for word in set(WORD.findall(lower)):
+                    self._words.setdefault(word, set()).add(index)
+            self.done += len(texts)
+        if self.on_progress:
+            self.on_progress(self.done, self.page_count)
+
+    def _run(self):
+        try:
+            with trace.span("text.index", pages=self.page_count) as span:
+                digest = file_digest(self.path)
+                cached = load_cached(digest)
+                span.set(cached=cached is not None)
+                if cached is not None and len(cached) == self.page_count:
+                    self._add(0, cached)
+                else:
+                    self._extract()
+                    if self._cancel.is_set():
+                        return
+                    save_cached(digest, list(self._texts))
+            self.complete = True
+        except Exception as e:
+            self.error = str(e)
+            trace.error("text.index", e, path=self.path)
+            if self.on_progress:
+                self.on_progress(self.done, self.page_count)
+
+    def _extract(self):
+        chunks = [(start, min(start + CHUNK_PAGES, self.page_count))
+                  for start in range(0, self.page_count, CHUNK_PAGES)]
+        if self.workers == 1 or len(chunks) == 1:
+            for start, stop in chunks:
+                if self._cancel.is_set():
+                    return
+                self._add(start, extract_range(self.path, start, stop))
+            return
+        pool = _shared_pool()
+        pending = {}
+        chunks_left = iter(chunks)
+        # A bounded window keeps cancellation quick on huge files and lets
+        # other documents' chunks in between
+        for start, stop in chunks_left:
+            pending[pool.submit(extract_range, self.path, start, stop)] = start
+            if len(pending) >= self.workers * 2:
+                break
+        while pending:
+            finished, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            if self._cancel.is_set():
+                for future in pending:
+                    future.cancel()
+                return
+            for future in finished:
+                self._add(pending.pop(future), future.result())
+                chunk = next(chunks_left, None)
+                if chunk is not None:
+                    pending[pool.submit(extract_range, self.path, *chunk)] = chunk[0]
+
+    def pages_matching(self, query: str) -> List[int]:
+        """0-based pages whose text contains query (case-insensitive), in order."""
+        query = " ".join(query.lower().split())
+        if not query:
+            return []
+        words = WORD.findall(query)
+        with self._lock:
+            candidates = None
+            # Words inside the query are whole words of any match and narrow
+            # the search through the index; the first and last may be parts
+            # of longer words, so they are only checked against the text
+            for word in words[1:-1]:
+                pages = self._words.get(word, set())
+                candidates = pages if candidates is None else candidates & pages
+            if candidates is None:
+                candidates = (i for i, text in enumerate(self._lower) if text is not None)
+            lower = self._lower
+            return sorted(i for i in candidates if query in lower[i])
+
+    def search(self, query: str, limit: int = 100, context: int = 40) -> List[Match]:
+        """Matching pages with a snippet around the first hit on each."""
+        matches = []
+        needle = " ".join(query.lower().split())
+        for index in self.pages_matching(query)[:limit]:
+            text = " ".join(self._texts[index].split())
+            at = text.lower().find(needle)
+            start = max(0, at - context)
+            snippet = text[start:at + len(needle) + context]
+            matches.append(Match(index, ("..." if start else "") + snippet))
+        return matches
@@ -0,0 +1,256 @@
+"""Scrollable thumbnail grid that only draws the cells in view.
+
+The canvas' scroll region covers every row, but canvas items exist only
+for the visible rows (plus one), so a 2,000-page document costs the same
+to scroll as a 20-page one. Missing thumbnails are asked for from a
+ThumbnailLoader and picked up by polling its version counter.
+
+Click selects a cell, double-click opens it and dragging a cell to
+another place reorders the grid; on_select, on_open and on_move(source,
+target) report these to the owner.
+"""
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Hashable, List, Optional, Sequence
+
+from PIL import ImageTk
+
+from . import trace
+from .cache import LRUCache
+from .thumbnails import THUMB_SIZE, ThumbnailLoader
+
+PAD = 8
+LABEL_HEIGHT = 18
+CELL_WIDTH = THUMB_SIZE[0] + 2 * PAD
+CELL_HEIGHT = THUMB_SIZE[1] + LABEL_HEIGHT + 2 * PAD
+PREFETCH_ROWS = 2
+POLL_MS = 60
+DRAG_THRESHOLD = 5
+AUTOSCROLL_MARGIN = 30
+
+
+class ThumbnailGrid:
+    def __init__(self, parent, loader: ThumbnailLoader,
+                 on_select: Optional[Callable[[int], None]] = None,
+                 on_open: Optional[Callable[[int], None]] = None,
+                 on_move: Optional[Callable[[int, int], None]] = None):
+        self.loader = loader
+        self.on_select = on_select
+        self.on_open = on_open
+        self.on_move = on_move
+        self.keys: List[Hashable] = []
+        self.labels: List[str] = []
+        self.selected: Optional[int] = None
+        # PhotoImages for cells seen recently; Tk needs a reference kept
+        self.photos = LRUCache(max_items=256)
+        self._poll = None
+        self._version = -1
+        self._drag_from: Optional[int] = None
+        self._drag_start = (0, 0)
+        self._dragging = False
+
+        self.frame = tk.Frame(parent, bg="white")
+        self.canvas = tk.Canvas(self.frame, bg="white", highlightthickness=0,
+                                yscrollincrement=CELL_HEIGHT // 4)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self._scroll(-3))
+        self.canvas.bind("<Button-5>", lambda event: self._scroll(3))
+        self.canvas.bind("<ButtonPress-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self._on_release)
+        self.canvas.bind("<Double-Button-1>", self._on_double)
+
+    def set_items(self, keys: Sequence[Hashable], labels: Sequence[str],
+                  selected: Optional[int] = None):
+        self.keys = list(keys)
+        self.labels = list(labels)
+        self.selected = selected
+        self.redraw()
+        if selected is not None:
+            self.see(selected)
+
+    def see(self, index: int):
+        """Scroll so the cell at index is in view."""
+        rows = self._rows()
+        if not rows:
+            return
+        row = index // self._columns()
+        top, bottom = self._visible_span()
+        if row * CELL_HEIGHT < top or (row + 1) * CELL_HEIGHT > bottom:
+            self.canvas.yview_moveto(row / rows)
+            self.redraw()
+
+    def close(self):
+        if self._poll is not None:
+            self.canvas.after_cancel(self._poll)
+            self._poll = None
+
+    # Layout ------------------------------------------------------------------
+
+    def _columns(self) -> int:
+        return max(1, self.canvas.winfo_width() // CELL_WIDTH)
+
+    def _rows(self) -> int:
+        return -(-len(self.keys) // self._columns())
+
+    def _visible_span(self):
+        top = self.canvas.canvasy(0)
+        return top, top + self.canvas.winfo_height()
+
+    def _cell_origin(self, index: int):
+        columns = self._columns()
+        return (index % columns) * CELL_WIDTH, (index // columns) * CELL_HEIGHT
+
+    def _index_at(self, x: float, y: float) -> Optional[int]:
+        column = int(self.canvas.canvasx(x) // CELL_WIDTH)
+        row = int(self.canvas.canvasy(y) // CELL_HEIGHT)
+        if column >= self._columns() or row < 0:
+            return None
+        index = row * self._columns() + column
+        return index if index < len(self.keys) else None
+
+    def _gap_at(self, x: float, y: float):
+        """Insertion point (0..len) nearest to the pointer, and where to mark it."""
+        columns = self._columns()
+        column = min(columns, max(0, round(self.canvas.canvasx(x) / CELL_WIDTH)))
+        row = max(0, int(self.canvas.canvasy(y) // CELL_HEIGHT))
+        gap = row * columns + column
+        if gap > len(self.keys):
+            gap = len(self.keys)
+            row, column = divmod(gap, columns)
+            if column == 0 and row:
+                row, column = row - 1, columns  # After the last cell of a full row
+        return gap, column * CELL_WIDTH, row * CELL_HEIGHT
+
+    # Drawing -----------------------------------------------------------------
+
+    def redraw(self):
+        canvas = self.canvas
+        # Read before drawing, so a thumbnail landing meanwhile is not missed
+        self._version = self.loader.version
+        canvas.delete("cell")
+        width = self._columns() * CELL_WIDTH
+        canvas.configure(scrollregion=(0, 0, width, max(1, self._rows() * CELL_HEIGHT)))
+        if not self.keys:
+            return
+        columns = self._columns()
+        top, bottom = self._visible_span()
+        first = max(0, int(top // CELL_HEIGHT)) * columns
+        last = min(len(self.keys), (int(bottom // CELL_HEIGHT) + 1) * columns)
+
+        missing = []
+        with trace.span("ui.thumbnails.draw", cells=last - first):
+            for index in range(first, last):
+                key = self.keys[index]
+                x, y = self._cell_origin(index)
+                if index == self.selected:
+                    canvas.create_rectangle(x + 2, y + 2, x + CELL_WIDTH - 2, y + CELL_HEIGHT - 2,
+                                            fill="#dbe9ff", outline="#3b8ed0", tags="cell")
+                photo = self._photo(key)
+                if photo is None:
+                    missing.append(key)
+                    canvas.create_rectangle(x + PAD, y + PAD, x + PAD + THUMB_SIZE[0],
+                                            y + PAD + THUMB_SIZE[1], outline="#dddddd",
+                                            tags="cell")
+                else:
+                    canvas.create_image(x + CELL_WIDTH // 2, y + PAD + THUMB_SIZE[1] // 2,
+                                        image=photo, tags="cell")
+                canvas.create_text(x + CELL_WIDTH // 2, y + CELL_HEIGHT - PAD - LABEL_HEIGHT // 2,
+                                   text=self.labels[index], width=CELL_WIDTH - 4,
+                                   font=("Helvetica", 9), tags="cell")
+
+        # Rows just below the view come next, so scrolling on finds them ready
+        ahead = self.keys[last:min(len(self.keys), last + PREFETCH_ROWS * columns)]
+        self.loader.want(missing + [key for key in ahead if self.loader.get(key) is None])
+        if missing and self._poll is None:
+            self._poll = canvas.after(POLL_MS, self._poll_thumbnails)
+
+    def _photo(self, key) -> Optional[ImageTk.PhotoImage]:
+        photo = self.photos.get(key)
+        if photo is None:
+            img = self.loader.get(key)
+            if img is None:
+                return None
+            photo = ImageTk.PhotoImage(img)
+            self.photos.put(key, photo)
+        return photo
+
+    def _poll_thumbnails(self):
+        self._poll = None
+        if not self.frame.winfo_ismapped():
+            return
+        if self.loader.version != self._version:
+            self.redraw()
+        else:
+            self._poll = self.canvas.after(POLL_MS, self._poll_thumbnails)
+
+    # Scrolling ---------------------------------------------------------------
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def _scroll(self, units: int):
+        self.canvas.yview_scroll(units, "units")
+        self.redraw()
+
+    def _on_wheel(self, event):
+        self._scroll(-3 if event.delta > 0 else 3)
+
+    # Selection and drag and drop ---------------------------------------------
+
+    def _on_press(self, event):
+        self._drag_from = self._index_at(event.x, event.y)
+        self._drag_start = (event.x, event.y)
+        self._dragging = False
+        if self._drag_from is not None:
+            self.selected = self._drag_from
+            self.redraw()
+            if self.on_select:
+                self.on_select(self._drag_from)
+
+    def _on_drag(self, event):
+        if self._drag_from is None:
+            return
+        if not self._dragging:
+            dx, dy = event.x - self._drag_start[0], event.y - self._drag_start[1]
+            if abs(dx) < DRAG_THRESHOLD and abs(dy) < DRAG_THRESHOLD:
+                return
+            self._dragging = True
+        if event.y < AUTOSCROLL_MARGIN:
+            self._scroll(-1)
+        elif event.y > self.canvas.winfo_height() - AUTOSCROLL_MARGIN:
+            self._scroll(1)
+        _, x, y = self._gap_at(event.x, event.y)
+        self.canvas.delete("marker")
+        self.canvas.create_line(x + 1, y + PAD, x + 1, y + CELL_HEIGHT - PAD,
+                                fill="#3b8ed0", width=3, tags="marker")
+
+    def _on_release(self, event):
+        self.canvas.delete("marker")
+        source, dragging = self._drag_from, self._dragging
+        self._drag_from = None
+        self._dragging = False
+        if source is None or not dragging:
+            return
+        gap, _, _ = self._gap_at(event.x, event.y)
+        target = gap - 1 if gap > source else gap
+        if target == source:
+            return
+        self.keys.insert(target, self.keys.pop(source))
+        self.labels.insert(target, self.labels.pop(source))
+        self.selected = target
+        self.redraw()
+        if self.on_move:
+            self.on_move(source, target)
+
+    def _on_double(self, event):
+        index = self._index_at(event.x, event.y)
+        if index is not None and self.on_open:
+            self.on_open(index)
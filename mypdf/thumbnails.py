@@ -0,0 +1,154 @@
+"""Thumbnails of images and PDF pages, made in a background process pool.
+
+A thumbnail is named by a small picklable key, image_key(path) or
+page_key(path, index), so the same function can make it in any worker.
+Finished thumbnails go into THUMB_CACHE, which is bounded by memory, and
+the loader only works on what the grid last asked for: when the view
+scrolls on, pages that went off screen before their turn are dropped
+rather than rendered.
+"""
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw
+
+from . import trace
+from .cache import LRUCache, image_cost
+from .preview import load_preview
+from .workers import process_pool
+
+THUMB_SIZE = (120, 160)
+THUMB_WORKERS = 4
+# About 1,100 page thumbnails; the rest are re-rendered when scrolled back to
+THUMB_CACHE = LRUCache(max_items=4096, max_cost=64 * 1024 * 1024, cost=image_cost)
+WORKER_READERS = 4
+
+Key = Tuple  # ("image", path, mtime) or ("page", path, mtime, index)
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def image_key(path: str) -> Key:
+    return ("image", os.path.abspath(path), _mtime(path))
+
+
+def page_key(path: str, index: int) -> Key:
+    return ("page", os.path.abspath(path), _mtime(path), index)
+
+
+# Worker side -----------------------------------------------------------------
+
+_readers = LRUCache(max_items=WORKER_READERS)
+
+
+def _reader(path: str, mtime: float):
+    from .reader import LazyPdfReader
+
+    reader = _readers.get((path, mtime))
+    if reader is None:
+        reader = LazyPdfReader(path)
+        _readers.put((path, mtime), reader)
+    return reader
+
+
+def render_thumbnail(key: Key, size: Tuple[int, int] = THUMB_SIZE) -> Image.Image:
+    """Make the thumbnail named by key."""
+    if key[0] == "image":
+        return load_preview(key[1], size)
+    from .render import compose_page, rasterize_with_pdftoppm
+
+    _, path, mtime, index = key
+    with trace.span("thumbnail.page", page=index + 1):
+        img = rasterize_with_pdftoppm(path, index, size)
+        if img is None:
+            # Text is unreadable at this size, so skip extracting it
+            img = compose_page(_reader(path, mtime).pages[index], size, text="")
+    return img
+
+
+def error_thumbnail(size: Tuple[int, int] = THUMB_SIZE) -> Image.Image:
+    img = Image.new("RGB", size, "#f4f4f4")
+    ImageDraw.Draw(img).text((size[0] // 2 - 3, size[1] // 2 - 6), "!", fill="red")
+    return img
+
+
+# Main process ----------------------------------------------------------------
+
+class ThumbnailLoader:
+    """Keeps up to `workers` thumbnails rendering, most recently wanted first.
+
+    get() never blocks. version goes up every time a thumbnail lands in
+    the cache, so the Tk side can poll it instead of being called back
+    from another thread.
+    """
+
+    def __init__(self, workers: int = THUMB_WORKERS,
+                 render: Callable[[Key], Image.Image] = render_thumbnail):
+        self.workers = max(1, min(workers, os.cpu_count() or 1))
+        self.render = render
+        self.version = 0
+        self._wanted: List[Key] = []
+        self._running: Dict[Key, Future] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        # Worker processes start on the first thumbnail, not here
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._thread = threading.Thread(target=self._dispatch, name="thumbnails", daemon=True)
+        self._thread.start()
+
+    def get(self, key: Hashable) -> Optional[Image.Image]:
+        return THUMB_CACHE.get(key)
+
+    def want(self, keys: Sequence[Key]):
+        """Render these (in order) next; earlier wishes not repeated are dropped."""
+        with self._cond:
+            self._wanted = [key for key in keys
+                            if key not in THUMB_CACHE and key not in self._running]
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._wanted = []
+            self._cond.notify()
+        self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._wanted or len(self._running) >= self.workers):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                key = self._wanted.pop(0)
+                if self._pool is None:
+                    self._pool = process_pool(self.workers)
+                try:
+                    future = self._pool.submit(self.render, key)
+                except RuntimeError as e:  # The pool broke or is shutting down
+                    trace.error("thumbnail", e)
+                    return
+                self._running[key] = future
+            future.add_done_callback(lambda done, key=key: self._finished(key, done))
+
+    def _finished(self, key: Key, future: Future):
+        try:
+            img = future.result()
+        except Exception as e:
+            trace.error("thumbnail", e, key=str(key))
+            img = error_thumbnail()
+        THUMB_CACHE.put(key, img)
+        trace.count("thumbnail.rendered")
+        with self._cond:
+            self._running.pop(key, None)
+            self.version += 1
+            self._cond.notify()
@@ -0,0 +1,229 @@
+"""Lightweight timing spans and counters, exported as JSON Lines.
+
+Tracing is off unless MYPDF_TRACE names an output file (or `pdf.py
+--trace FILE` sets it). When off, span() hands back a shared no-op object,
+so instrumented code pays for little more than a function call.
+
+Each finished span is written as one line:
+
+    {"type": "span", "name": "image.decode", "ms": 41.2, "pid": 123, ...}
+
+and at exit a summary per span name and the counters are appended.
+MYPDF_PROFILE=cpu (cProfile), mem (tracemalloc) or all adds profile
+records as well; the raw cProfile data is saved next to the trace file as
+<trace>.<pid>.prof for snakeviz/pstats. Worker processes inherit the
+environment and append to the same file.
+"""
+import atexit
+import functools
+import json
+import multiprocessing.util
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+TRACE_ENV = "MYPDF_TRACE"
+PROFILE_ENV = "MYPDF_PROFILE"
+PROFILE_TOP = 30
+
+_lock = threading.Lock()
+_sink = None
+_path: Optional[str] = None
+_profiler = None
+_tracemalloc = False
+_spans: Dict[str, list] = {}  # name -> [count, total ms, max ms]
+_counters: Dict[str, float] = {}
+
+
+def enabled() -> bool:
+    return _sink is not None
+
+
+def _write(record: dict):
+    record.setdefault("pid", os.getpid())
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        if _sink is not None:
+            # One write per record so lines from worker processes do not interleave
+            _sink.write(line)
+            _sink.flush()
+
+
+class _Span:
+    __slots__ = ("name", "fields", "started")
+
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self.started) * 1000
+        with _lock:
+            stats = _spans.setdefault(self.name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+        record = {"type": "span", "name": self.name, "ms": round(ms, 3),
+                  "ts": round(time.time(), 3), "thread": threading.current_thread().name}
+        record.update(self.fields)
+        if exc is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        _write(record)
+        return False
+
+    def set(self, **fields):
+        """Attach fields known only once the work is done (e.g. page counts)."""
+        self.fields.update(fields)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **fields):
+    """Time a block: `with trace.span("image.decode", path=path): ...`."""
+    if _sink is None:
+        return _NULL_SPAN
+    return _Span(name, fields)
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _sink is None:
+                return func(*args, **kwargs)
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, value: float = 1):
+    """Add value to a per-process counter, written out at exit."""
+    if _sink is not None:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + value
+
+
+def event(name: str, **fields):
+    """Record a one-off event."""
+    if _sink is not None:
+        record = {"type": "event", "name": name, "ts": round(time.time(), 3)}
+        record.update(fields)
+        _write(record)
+
+
+def error(name: str, exc: BaseException, **fields):
+    """Report a recoverable error: traced when enabled, else one stderr line."""
+    if _sink is not None:
+        count(f"{name}.errors")
+        event(name, error=f"{type(exc).__name__}: {exc}", **fields)
+    else:
+        details = " ".join(f"{k}={v}" for k, v in fields.items())
+        print(f"{name}: {exc} {details}".rstrip(), file=sys.stderr)
+
+
+def configure(path: Optional[str] = None, profile: Optional[str] = None):
+    """Start tracing to path (JSON Lines, appended) and optionally profiling.
+
+    Called on import from the environment; the CLI calls it again after
+    setting the environment so worker processes pick the settings up.
+    """
+    global _sink, _path, _profiler, _tracemalloc
+    if path and _sink is None:
+        _sink = open(path, "a", encoding="utf-8")
+        _path = path
+        atexit.register(_finish)
+        # Pool workers leave through os._exit, skipping atexit. Spawned and
+        # forkserver workers configure tracing themselves, forked ones on fork
+        if multiprocessing.parent_process() is not None:
+            multiprocessing.util.Finalize(None, _finish, exitpriority=0)
+        multiprocessing.util.register_after_fork(_FORK_HOOK, _after_fork)
+    if _sink is None or not profile:
+        return
+    modes = {"cpu", "mem"} if profile in ("1", "all") else set(profile.split(","))
+    if "cpu" in modes and _profiler is None:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    if "mem" in modes and not _tracemalloc:
+        import tracemalloc
+        tracemalloc.start(10)
+        _tracemalloc = True
+
+
+def _profile_records():
+    if _profiler is not None:
+        import pstats
+        _profiler.disable()
+        _profiler.dump_stats(f"{_path}.{os.getpid()}.prof")
+        stats = pstats.Stats(_profiler)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in rows[:PROFILE_TOP]:
+            yield {"type": "profile", "function": f"{filename}:{line}({function})",
+                   "calls": calls, "tottime_ms": round(tottime * 1000, 3),
+                   "cumtime_ms": round(cumtime * 1000, 3)}
+    if _tracemalloc:
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        yield {"type": "memory", "current_kb": current // 1024, "peak_kb": peak // 1024}
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:PROFILE_TOP]:
+            frame = stat.traceback[0]
+            yield {"type": "alloc", "where": f"{frame.filename}:{frame.lineno}",
+                   "kb": stat.size // 1024, "blocks": stat.count}
+
+
+class _ForkHook:
+    pass
+
+
+_FORK_HOOK = _ForkHook()  # register_after_fork needs an object to key on
+
+
+def _after_fork(_):
+    global _lock
+    # Another thread may have held the lock at the fork; the copy would stay held
+    _lock = threading.Lock()
+    # Summaries are per process: drop the stats copied from the parent
+    _spans.clear()
+    _counters.clear()
+    multiprocessing.util.Finalize(None, _finish, exitpriority=0)
+
+
+def _finish():
+    global _sink
+    if _sink is None:
+        return
+    for name, (calls, total, longest) in sorted(_spans.items()):
+        _write({"type": "summary", "name": name, "count": calls,
+                "total_ms": round(total, 3), "max_ms": round(longest, 3)})
+    for name, value in sorted(_counters.items()):
+        _write({"type": "counter", "name": name, "value": value})
+    for record in _profile_records():
+        _write(record)
+    with _lock:
+        _sink.close()
+        _sink = None
+
+
+configure(os.environ.get(TRACE_ENV), os.environ.get(PROFILE_ENV))
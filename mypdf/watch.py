@@ -0,0 +1,344 @@
+"""`pdf.py watch` - convert files dropped into hot folders.
+
+Watched folders are polled (no extra dependencies, and it works on
+network shares where change notifications do not). A new image or .docx
+file is only picked up once its size and modification time have stayed
+the same for `settle` seconds, so scanners still writing a file are left
+alone. Ready files go to a process pool, at most two per worker in
+flight; the rest wait on disk until there is room, so a burst of
+thousands of files never piles up in memory.
+
+Each file becomes <output dir>/<name>.pdf. The PDF is written under a
+temporary name and moved into place with os.replace, so other programs
+watching the output folder never see a half-written file. Files whose
+PDF is already newer than they are count as done, so restarting the
+watcher does not convert everything again.
+
+Throughput and latency are printed every `report` seconds and, with
+--metrics, written to a JSON file as well.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import engine, ocr, trace
+from .workers import process_pool
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp")
+WORD_EXTENSIONS = (".docx",)
+SETTLE_SECONDS = 2.0
+POLL_SECONDS = 1.0
+REPORT_SECONDS = 30.0
+LATENCY_SAMPLES = 1000
+
+Stamp = Tuple[int, int]  # (size, mtime_ns)
+
+
+def _stamp(path: str) -> Optional[Stamp]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def job_for(path: str, output_dir: str) -> Optional[dict]:
+    """Engine job converting path into output_dir, or None if it is not a source file."""
+    name = os.path.basename(path)
+    stem, ext = os.path.splitext(name)
+    ext = ext.lower()
+    # Skip hidden files, Office lock files and partial downloads
+    if name.startswith((".", "~$")):
+        return None
+    output = os.path.join(output_dir, stem + ".pdf")
+    if ext in IMAGE_EXTENSIONS:
+        return {"op": "images", "inputs": [path], "output": output}
+    if ext in WORD_EXTENSIONS:
+        return {"op": "word", "input": path, "output": output}
+    return None
+
+
+def convert(job: dict) -> Tuple[int, float]:
+    """Run job into a temporary file and move it over the real output.
+
+    Returns the page count and the seconds it took.
+    """
+    started = time.perf_counter()
+    output = job["output"]
+    tmp = os.path.join(os.path.dirname(output),
+                       f".{os.path.basename(output)}.{os.getpid()}.tmp")
+    try:
+        pages = engine.run_job(dict(job, output=tmp))
+        os.replace(tmp, output)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return pages, time.perf_counter() - started
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class WatchMetrics:
+    """Counters and recent latencies of a running watcher."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.converted = 0
+        self.failed = 0
+        self.pages = 0
+        self.waiting = 0  # settling or waiting for a worker
+        self.in_flight = 0
+        # Seconds from first seeing a file to its PDF being in place, and
+        # seconds spent converting it
+        self.latency: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.convert: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, pages: int, latency: float, seconds: float):
+        self.converted += 1
+        self.pages += pages
+        self.latency.append(latency)
+        self.convert.append(seconds)
+        trace.count("watch.converted")
+
+    def snapshot(self) -> dict:
+        elapsed = max(time.time() - self.started, 1e-9)
+        return {
+            "uptime_s": round(elapsed, 1),
+            "converted": self.converted,
+            "failed": self.failed,
+            "pages": self.pages,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "files_per_hour": round(self.converted * 3600 / elapsed, 1),
+            "pages_per_hour": round(self.pages * 3600 / elapsed, 1),
+            "latency_p50_s": round(_percentile(self.latency, 0.5), 3),
+            "latency_p95_s": round(_percentile(self.latency, 0.95), 3),
+            "convert_p50_s": round(_percentile(self.convert, 0.5), 3),
+            "convert_p95_s": round(_percentile(self.convert, 0.95), 3),
+        }
+
+    def summary(self) -> str:
+        s = self.snapshot()
+        return (f"{s['converted']} converted, {s['failed']} failed, {s['waiting']} waiting, "
+                f"{s['in_flight']} running; {s['files_per_hour']:.0f} files/h, "
+                f"latency p50 {s['latency_p50_s']:.1f}s p95 {s['latency_p95_s']:.1f}s")
+
+    def write(self, path: str):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+
+class _Pending(NamedTuple):
+    path: str
+    stamp: Stamp
+    first_seen: float
+
+
+class HotFolder:
+    """Finds files in the watched folders that are ready to convert."""
+
+    def __init__(self, folders: Sequence[str], output_dir: str,
+                 settle: float = SETTLE_SECONDS):
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.output_dir = os.path.abspath(output_dir)
+        self.settle = settle
+        self.seen: Dict[str, Tuple[Stamp, float, float]] = {}  # stamp, first seen, stable since
+        self.handled: Dict[str, Stamp] = {}  # converted, failed or running
+
+    def scan(self, now: float) -> List[_Pending]:
+        """Files that have stopped changing, oldest first."""
+        ready = []
+        present = set()
+        for folder in self.folders:
+            try:
+                entries = list(os.scandir(folder))
+            except OSError as e:
+                trace.error("watch.scan", e, folder=folder)
+                continue
+            for entry in entries:
+                if not entry.is_file() or job_for(entry.path, self.output_dir) is None:
+                    continue
+                path = entry.path
+                present.add(path)
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                stamp = (stat.st_size, stat.st_mtime_ns)
+                if self.handled.get(path) == stamp:
+                    continue
+                previous = self.seen.get(path)
+                if previous is None or previous[0] != stamp:
+                    first_seen = previous[1] if previous else now
+                    self.seen[path] = (stamp, first_seen, now)
+                    continue
+                if now - previous[2] >= self.settle:
+                    del self.seen[path]
+                    if stamp[0]:
+                        ready.append(_Pending(path, stamp, previous[1]))
+                    else:
+                        self.handled[path] = stamp  # Empty placeholder; wait for a change
+        # Forget files that were moved away or deleted
+        for path in [path for path in self.seen if path not in present]:
+            del self.seen[path]
+        for path in [path for path in self.handled if path not in present]:
+            del self.handled[path]
+        ready.sort(key=lambda item: item.first_seen)
+        return ready
+
+    def up_to_date(self, item: _Pending) -> bool:
+        """True if the file's PDF is already newer than the file."""
+        output = job_for(item.path, self.output_dir)["output"]
+        stamp = _stamp(output)
+        return stamp is not None and stamp[1] >= item.stamp[1]
+
+
+def _archive(path: str, archive_dir: Optional[str], failed: bool):
+    if not archive_dir:
+        return
+    target_dir = os.path.join(archive_dir, "failed") if failed else archive_dir
+    try:
+        os.makedirs(target_dir, exist_ok=True)
+        shutil.move(path, os.path.join(target_dir, os.path.basename(path)))
+    except OSError as e:
+        trace.error("watch.archive", e, path=path)
+
+
+def watch(folders: Sequence[str], output_dir: str, workers: int = 1,
+          settle: float = SETTLE_SECONDS, poll: float = POLL_SECONDS,
+          report: float = REPORT_SECONDS, metrics_path: Optional[str] = None,
+          archive_dir: Optional[str] = None, once: bool = False,
+          ocr_language: Optional[str] = None) -> WatchMetrics:
+    """Convert files arriving in folders until interrupted.
+
+    With once, stop as soon as every file present has been handled.
+    Converted sources (and failed ones, under failed/) are moved to
+    archive_dir when it is given. ocr_language makes images searchable.
+    """
+    for folder in folders:
+        if not os.path.isdir(folder):
+            raise ValueError(f"Not a folder: {folder}")
+    if ocr_language:
+        ocr.get_engine()
+    os.makedirs(output_dir, exist_ok=True)
+    hot = HotFolder(folders, output_dir, settle)
+    metrics = WatchMetrics()
+    waiting: Deque[_Pending] = deque()
+    running: Dict[Future, _Pending] = {}
+    limit = workers * 2
+    next_report = time.time() + report
+
+    def finish(future: Future):
+        item = running.pop(future)
+        try:
+            pages, seconds = future.result()
+        except Exception as e:
+            metrics.failed += 1
+            trace.error("watch.convert", e, path=item.path)
+            print(f"FAILED {item.path}: {e}", file=sys.stderr)
+            _archive(item.path, archive_dir, failed=True)
+        else:
+            latency = time.time() - item.first_seen
+            metrics.record(pages, latency, seconds)
+            print(f"ok {item.path} ({pages} pages, {seconds:.2f}s, {latency:.1f}s after arrival)")
+            _archive(item.path, archive_dir, failed=False)
+
+    print(f"Watching {', '.join(hot.folders)} -> {hot.output_dir} with {workers} workers")
+    with process_pool(workers) as pool:
+        try:
+            while True:
+                now = time.time()
+                for item in hot.scan(now):
+                    hot.handled[item.path] = item.stamp
+                    if hot.up_to_date(item):
+                        continue
+                    waiting.append(item)
+
+                # Backpressure: only a few files per worker are submitted
+                while waiting and len(running) < limit:
+                    item = waiting.popleft()
+                    job = job_for(item.path, hot.output_dir)
+                    if ocr_language and job["op"] == "images":
+                        job["ocr"] = ocr_language
+                    running[pool.submit(convert, job)] = item
+                metrics.waiting = len(waiting) + len(hot.seen)
+                metrics.in_flight = len(running)
+
+                if once and not running and not waiting and not hot.seen:
+                    break
+                if running:
+                    finished, _ = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        finish(future)
+                else:
+                    time.sleep(poll)
+
+                if time.time() >= next_report:
+                    next_report = time.time() + report
+                    print(metrics.summary())
+                    if metrics_path:
+                        metrics.write(metrics_path)
+        except KeyboardInterrupt:
+            print(f"Stopping; finishing {len(running)} running conversions", file=sys.stderr)
+            for future in list(running):
+                future.exception()
+                finish(future)
+
+    metrics.waiting = len(waiting) + len(hot.seen)
+    metrics.in_flight = 0
+    print(metrics.summary())
+    if metrics_path:
+        metrics.write(metrics_path)
+    trace.event("watch.metrics", **metrics.snapshot())
+    return metrics
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="pdf.py watch",
+        description="Convert images and Word files dropped into folders to PDF."
+    )
+    parser.add_argument("folders", nargs="+", help="folders to watch")
+    parser.add_argument("-o", "--output", required=True, help="folder for the PDFs")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help="seconds a file must stay unchanged before it is converted "
+                             f"(default: {SETTLE_SECONDS:g})")
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS,
+                        help=f"seconds between folder scans (default: {POLL_SECONDS:g})")
+    parser.add_argument("--report", type=float, default=REPORT_SECONDS,
+                        help=f"seconds between metrics reports (default: {REPORT_SECONDS:g})")
+    parser.add_argument("--metrics", metavar="PATH", help="also write metrics to this JSON file")
+    parser.add_argument("--archive", metavar="DIR",
+                        help="move converted files here (failed ones to DIR/failed)")
+    parser.add_argument("--once", action="store_true",
+                        help="exit once the files already there are converted")
+    parser.add_argument("--ocr", metavar="LANG",
+                        help="make images searchable with OCR in this language, e.g. eng")
+    args = parser.parse_args(argv)
+
+    try:
+        metrics = watch(args.folders, args.output, max(1, args.workers), args.settle,
+                        args.poll, args.report, args.metrics, args.archive, args.once,
+                        args.ocr)
+    except (ValueError, ocr.OcrUnavailable) as e:
+        print(e, file=sys.stderr)
+        return 2
+    return 1 if args.once and metrics.failed else 0
@@ -0,0 +1,306 @@
+"""Word document -> reportlab platypus flowables.
+
+Paragraphs are wrapped, headings/list items get their own styles, tables
+and inline images are kept. Blocks are read from the .docx body in order
+and turned into flowables one at a time by a generator, so no list of
+every flowable in the document is ever built; pagination lives in layout.
+
+The body itself is streamed too (see DocxStream): the first page can be
+laid out as soon as its paragraphs have been read, not after the whole
+document.xml has been parsed.
+"""
+import io
+import posixpath
+import zipfile
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable, Image, PageBreak, Paragraph, Table, TableStyle
+
+MARGIN = 40
+EMU_PER_POINT = 12700
+TABLE_PADDING = 12  # Left + right cell padding used by the default TableStyle
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+REL_TYPES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+READ_CHUNK = 64 * 1024
+
+HEADING_SIZES = {"Title": 24, "Heading 1": 18, "Heading 2": 15, "Heading 3": 13}
+ALIGNMENTS = {0: TA_LEFT, 1: TA_CENTER, 2: TA_RIGHT, 3: TA_JUSTIFY}
+
+
+@lru_cache(maxsize=None)
+def paragraph_style(name: str, alignment: int = TA_LEFT) -> ParagraphStyle:
+    """Platypus style for a Word style name, built once per process."""
+    base = getSampleStyleSheet()["Normal"]
+    if name in HEADING_SIZES or name.startswith("Heading"):
+        size = HEADING_SIZES.get(name, 12)
+        return ParagraphStyle(
+            f"{name}-{alignment}", parent=base, fontName="Helvetica-Bold",
+            fontSize=size, leading=size * 1.2, spaceBefore=size * 0.6,
+            spaceAfter=size * 0.3, alignment=alignment
+        )
+    if name.startswith("List"):
+        return ParagraphStyle(
+            f"{name}-{alignment}", parent=base, fontSize=10, leading=13,
+            leftIndent=18, bulletIndent=6, spaceAfter=2, alignment=alignment
+        )
+    return ParagraphStyle(
+        f"{name}-{alignment}", parent=base, fontSize=10, leading=13,
+        spaceAfter=6, alignment=alignment
+    )
+
+
+def install_width_cache():
+    """Memoise the string widths platypus measures while wrapping.
+
+    Paragraph.breakLines calls pdfmetrics.stringWidth for every word, which
+    is pure Python unless rl_accel is installed. Widths only depend on
+    (text, font, size), so the same words are never measured twice.
+    """
+    from reportlab.platypus import paragraph as rl_paragraph
+    if not hasattr(rl_paragraph.stringWidth, "cache_info"):
+        rl_paragraph.stringWidth = lru_cache(maxsize=65536)(rl_paragraph.stringWidth)
+
+
+@lru_cache(maxsize=65536)
+def text_width(text: str, font: str = "Helvetica", size: float = 10) -> float:
+    """Cached string width, used to size table columns."""
+    return stringWidth(text, font, size)
+
+
+class _Related:
+    """A part another part links to; its bytes are read when first asked for."""
+
+    def __init__(self, archive: zipfile.ZipFile, name: str):
+        self._archive = archive
+        self._name = name
+
+    @property
+    def blob(self) -> bytes:
+        return self._archive.read(self._name)
+
+
+class _Part:
+    """What python-docx's paragraphs need of their part: related_parts."""
+
+    def __init__(self, related_parts: Dict[str, _Related]):
+        self.related_parts = related_parts
+
+
+class DocxStream:
+    """A .docx whose body is read one paragraph or table at a time.
+
+    python-docx's Document() parses all of document.xml before returning.
+    Here it is fed to a pull parser in chunks, and each top-level paragraph
+    or table is handed out as a python-docx object as soon as its end tag
+    arrives, then dropped from the tree. Styles and relationships are
+    small and read up front; images are read when a paragraph uses them.
+    """
+
+    def __init__(self, path: str):
+        try:
+            from lxml import etree
+            from docx.styles import BabelFish
+        except ImportError:
+            from .session import MissingDependency
+            raise MissingDependency("Please install 'python-docx' package first.") from None
+
+        self.path = path
+        self._archive = zipfile.ZipFile(path)
+        main = self._targets("", "officeDocument")
+        if not main:
+            raise ValueError(f"{path} is not a Word document")
+        self._main = next(iter(main.values()))
+        targets = self._targets(self._main)
+        self.part = _Part({rel_id: _Related(self._archive, name)
+                           for rel_id, name in targets.items()})
+        # Style ids -> names as python-docx shows them ("Heading 1", not "heading 1")
+        self.styles: Dict[str, str] = {}
+        styles = self._targets(self._main, "styles")
+        if styles:
+            root = etree.fromstring(self._archive.read(next(iter(styles.values()))))
+            for style in root.iterfind(f"{{{W_NS}}}style"):
+                name = style.find(f"{{{W_NS}}}name")
+                if name is not None:
+                    self.styles[style.get(f"{{{W_NS}}}styleId")] = \
+                        BabelFish.internal2ui(name.get(f"{{{W_NS}}}val"))
+
+    def _targets(self, source: str, kind: Optional[str] = None) -> Dict[str, str]:
+        """Relationship id -> archive member for source's internal relationships."""
+        from lxml import etree
+
+        folder, name = posixpath.split(source)
+        rels = posixpath.join(folder, "_rels", name + ".rels")
+        try:
+            root = etree.fromstring(self._archive.read(rels))
+        except KeyError:
+            return {}
+        targets = {}
+        for rel in root.iterfind(f"{{{RELS_NS}}}Relationship"):
+            if rel.get("TargetMode") == "External":
+                continue
+            if kind is not None and rel.get("Type") != REL_TYPES + kind:
+                continue
+            target = rel.get("Target")
+            if target.startswith("/"):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            targets[rel.get("Id")] = target
+        return targets
+
+    def blocks(self) -> Iterator[object]:
+        """Yield python-docx Paragraph and Table objects in body order."""
+        from lxml import etree
+        from docx.oxml.parser import element_class_lookup
+        from docx.table import Table as DocxTable
+        from docx.text.paragraph import Paragraph as DocxParagraph
+
+        body_tag = f"{{{W_NS}}}body"
+        paragraph_tag = f"{{{W_NS}}}p"
+        parser = etree.XMLPullParser(events=("end",), tag=(paragraph_tag, f"{{{W_NS}}}tbl"),
+                                     remove_blank_text=True, resolve_entities=False)
+        # Elements get python-docx's classes, as if parsed by Document()
+        parser.set_element_class_lookup(element_class_lookup)
+        try:
+            with self._archive.open(self._main) as f:
+                while True:
+                    chunk = f.read(READ_CHUNK)
+                    if chunk:
+                        parser.feed(chunk)
+                    else:
+                        parser.close()
+                    for _, element in parser.read_events():
+                        body = element.getparent()
+                        if body is None or body.tag != body_tag:
+                            continue  # Paragraphs inside tables come with their table
+                        yield (DocxParagraph if element.tag == paragraph_tag
+                               else DocxTable)(element, self)
+                        # Laid out: free it and anything before it
+                        for sibling in list(element.itersiblings(preceding=True)):
+                            body.remove(sibling)
+                        body.remove(element)
+                    if not chunk:
+                        break
+        finally:
+            self._archive.close()
+
+
+def _run_markup(run) -> str:
+    text = escape(run.text).replace("\n", "<br/>").replace("\t", "&nbsp;" * 4)
+    if not text:
+        return ""
+    if run.bold:
+        text = f"<b>{text}</b>"
+    if run.italic:
+        text = f"<i>{text}</i>"
+    if run.underline:
+        text = f"<u>{text}</u>"
+    return text
+
+
+def _inline_images(paragraph, drawings, max_width: float, max_height: float) -> List[Flowable]:
+    images = []
+    part = paragraph.part
+    for drawing in drawings:
+        blips = drawing.xpath(".//a:blip/@r:embed")
+        if not blips or blips[0] not in part.related_parts:
+            continue
+        blob = part.related_parts[blips[0]].blob
+        extent = drawing.xpath(".//wp:extent")
+        if extent:
+            width = int(extent[0].get("cx")) / EMU_PER_POINT
+            height = int(extent[0].get("cy")) / EMU_PER_POINT
+        else:
+            width, height = max_width, max_height
+        scale = min(1.0, max_width / width, max_height / height)
+        images.append(Image(io.BytesIO(blob), width * scale, height * scale))
+    return images
+
+
+def paragraph_flowables(paragraph, frame_size: Tuple[float, float],
+                        numbering: dict, styles: dict) -> Iterator[Flowable]:
+    style_name = styles.get(paragraph._p.style, "Normal")
+    alignment = ALIGNMENTS.get(paragraph.alignment, TA_LEFT)
+    style = paragraph_style(style_name, alignment)
+
+    if paragraph.paragraph_format.page_break_before:
+        yield PageBreak()
+
+    # One XPath query per paragraph for both drawings and page breaks
+    special = paragraph._p.xpath(".//w:drawing | .//w:br[@w:type='page']")
+    drawings = [el for el in special if el.tag.endswith("}drawing")]
+
+    markup = "".join(_run_markup(run) for run in paragraph.runs)
+    if markup.strip() or not drawings:
+        bullet = None
+        if style_name.startswith("List Bullet"):
+            bullet = "•"
+        elif style_name.startswith("List Number"):
+            numbering[style_name] = numbering.get(style_name, 0) + 1
+            bullet = f"{numbering[style_name]}."
+        if not style_name.startswith("List Number"):
+            numbering.clear()
+        yield Paragraph(markup or "&nbsp;", style, bulletText=bullet)
+
+    if drawings:
+        yield from _inline_images(paragraph, drawings, *frame_size)
+
+    if len(drawings) < len(special):
+        yield PageBreak()
+
+
+def table_flowable(table, frame_size: Tuple[float, float]) -> Optional[Table]:
+    style = paragraph_style("Table Text")
+    rows = []
+    widths: List[float] = []
+    for row in table.rows:
+        cells = []
+        for col, cell in enumerate(row.cells):
+            text = cell.text
+            longest = max((text_width(word) for word in text.split()), default=0)
+            natural = text_width(text)
+            if col >= len(widths):
+                widths.append(0)
+            # Prefer the natural width but never narrower than the longest word
+            widths[col] = max(widths[col], min(natural, frame_size[0] / 2), longest)
+            cells.append(Paragraph(escape(text).replace("\n", "<br/>"), style))
+        rows.append(cells)
+    if not rows:
+        return None
+
+    # Pad ragged rows (merged cells) and scale columns to the frame width
+    columns = len(widths)
+    for cells in rows:
+        cells.extend([""] * (columns - len(cells)))
+    widths = [w + TABLE_PADDING for w in widths]
+    total = sum(widths)
+    if total > frame_size[0]:
+        widths = [w * frame_size[0] / total for w in widths]
+
+    flowable = Table(rows, colWidths=widths, repeatRows=1, hAlign="LEFT")
+    flowable.setStyle(TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    return flowable
+
+
+def iter_flowables(doc: DocxStream, frame_size: Tuple[float, float]) -> Iterator[Flowable]:
+    numbering: dict = {}
+    styles = doc.styles
+    for block in doc.blocks():
+        if hasattr(block, "runs"):
+            yield from paragraph_flowables(block, frame_size, numbering, styles)
+        else:
+            numbering.clear()
+            flowable = table_flowable(block, frame_size)
+            if flowable is not None:
+                yield flowable
@@ -0,0 +1,22 @@
+"""Process pools that are safe to start from any thread.
+
+The GUI starts pools from background threads (text extraction,
+thumbnails, conversions on the job queue). With the default fork start
+method a child copies every lock as it was at the fork, so a lock some
+other thread held at that moment stays held forever in the child. Pools
+made here start their workers from a clean process instead: forkserver
+where the platform has it, spawn otherwise. Workers still inherit the
+environment, so MYPDF_* settings (tracing, cache, OCR) carry over.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def start_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def process_pool(max_workers: int, **kwargs) -> ProcessPoolExecutor:
+    """A ProcessPoolExecutor whose workers are not forked from this process."""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=start_context(), **kwargs)
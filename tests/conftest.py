@@ -0,0 +1,93 @@
+import io
+
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from mypdf import cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the disk cache of every test in its own directory."""
+    monkeypatch.setenv(cache.CACHE_ENV, str(tmp_path / "cache"))
+    monkeypatch.setattr(cache, "_disk_cache", None)
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """make_pdf(name, pages, tag=...) writes a PDF whose page i reads "<tag> page <i>".
+
+    outline adds one bookmark per page, form a text field on page 1,
+    image a noisy photo drawn on every page (the same image object), and
+    rotate sets /Rotate on page 1.
+    """
+    def make(name, pages, tag="A", outline=False, form=False, image=False, rotate=0):
+        path = str(tmp_path / name)
+        c = canvas.Canvas(path)
+        c.setTitle(f"Doc {tag}")
+        c.setAuthor("tests")
+        photo = None
+        if image:
+            pixels = Image.effect_noise((1200, 900), 60).convert("RGB")
+            buffer = io.BytesIO()
+            pixels.save(buffer, format="PNG")
+            buffer.seek(0)
+            photo = ImageReader(buffer)
+        for i in range(pages):
+            c.setPageRotation(rotate if i == 0 else 0)
+            c.drawString(100, 700, f"{tag} page {i + 1}")
+            if photo is not None:
+                c.drawImage(photo, 100, 300, width=200, height=150)
+            if outline:
+                c.bookmarkPage(f"p{i}")
+                c.addOutlineEntry(f"{tag} chapter {i + 1}", f"p{i}", level=0)
+            if form and i == 0:
+                c.acroForm.textfield(name=f"field{tag}", x=100, y=600)
+            c.showPage()
+        c.save()
+        return path
+    return make
+
+
+@pytest.fixture
+def make_docx(tmp_path):
+    """make_docx(name, paragraphs) writes a .docx: a "Report" heading, then
+    paragraph i reading "Paragraph <i>" and enough words to wrap.
+
+    table adds a 3x2 table after paragraph 1, page_break starts paragraph 2
+    on a new page.
+    """
+    def make(name, paragraphs, table=False, page_break=False):
+        from docx import Document
+
+        doc = Document()
+        doc.add_heading("Report", level=1)
+        for i in range(paragraphs):
+            paragraph = doc.add_paragraph(f"Paragraph {i + 1} " + "lorem ipsum dolor " * 20)
+            if page_break and i == 1:
+                paragraph.paragraph_format.page_break_before = True
+            if table and i == 0:
+                grid = doc.add_table(rows=3, cols=2)
+                for r, row in enumerate(grid.rows):
+                    for c, cell in enumerate(row.cells):
+                        cell.text = f"cell {r}{c}"
+        path = str(tmp_path / name)
+        doc.save(path)
+        return path
+    return make
+
+
+def page_texts(path):
+    return [page.extract_text().strip() for page in PdfReader(path).pages]
+
+
+def rotations(path):
+    return [int(page.get("/Rotate", 0)) % 360 for page in PdfReader(path).pages]
+
+
+def outline_titles(path):
+    reader = PdfReader(path)
+    return [(item.title, reader.get_destination_page_number(item)) for item in reader.outline]
@@ -0,0 +1,44 @@
+import json
+import os
+
+from conftest import page_texts
+from PIL import Image
+
+from mypdf import batch
+
+
+def test_manifest_runs_jobs_and_reports_failures(make_pdf, tmp_path):
+    make_pdf("big.pdf", 5)
+    Image.new("RGB", (80, 60), "red").save(tmp_path / "a.png")
+    Image.new("RGB", (60, 80), "blue").save(tmp_path / "b.jpg")
+    jobs = [
+        {"op": "crop", "input": "big.pdf", "start": 2, "end": 3, "output": "out/part.pdf"},
+        {"op": "crop", "input": "big.pdf", "start": 4, "end": 9, "output": "out/bad.pdf"},
+        {"op": "images", "inputs": ["a.png", "b.jpg"], "output": "out/ab.pdf"},
+    ]
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text("# comment\n" + "\n".join(json.dumps(job) for job in jobs) + "\n")
+    failures = tmp_path / "failed.jsonl"
+
+    assert batch.main([str(manifest), "-j", "2", "--failures", str(failures)]) == 1
+
+    assert page_texts(str(tmp_path / "out" / "part.pdf")) == ["A page 2", "A page 3"]
+    assert len(page_texts(str(tmp_path / "out" / "ab.pdf"))) == 2
+    assert not os.path.exists(tmp_path / "out" / "bad.pdf")
+    [failure] = [json.loads(line) for line in failures.read_text().splitlines()]
+    assert failure["job"]["output"] == str(tmp_path / "out" / "bad.pdf")
+    assert "Invalid page range 4-9" in failure["error"]
+
+
+def test_json_manifest_paths_are_relative_to_it(tmp_path):
+    manifest = tmp_path / "sub" / "jobs.json"
+    manifest.parent.mkdir()
+    manifest.write_text(json.dumps({"jobs": [
+        {"op": "merge", "inputs": ["a.pdf", {"input": "b.pdf", "pages": "1"}], "output": "m.pdf"},
+    ]}))
+
+    [job] = batch.read_manifest(str(manifest))
+    base = str(manifest.parent)
+    assert job["inputs"] == [os.path.join(base, "a.pdf"),
+                             {"input": os.path.join(base, "b.pdf"), "pages": "1"}]
+    assert job["output"] == os.path.join(base, "m.pdf")
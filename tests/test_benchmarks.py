@@ -0,0 +1,34 @@
+import json
+
+from benchmarks import run
+
+
+def test_suite_runs_and_records_results(tmp_path):
+    output = tmp_path / "results.json"
+    argv = ["--work", str(tmp_path / "work"), "--images", "2", "--paragraphs", "10",
+            "--pages", "6", "--preview-pages", "2", "--only", "images_to_pdf,crop,merge",
+            "-o", str(output)]
+
+    assert run.main(argv) == 0
+
+    results = json.loads(output.read_text())
+    assert results["params"]["pages"] == 6
+    assert set(results["results"]) == {"images_to_pdf", "crop", "merge"}
+    for result in results["results"].values():
+        assert "error" not in result
+        assert result["pages"] > 0 and result["wall_s"] > 0
+
+    # Comparing against itself is no regression
+    assert run.main(argv[:-4] + ["--only", "crop", "-o", str(tmp_path / "again.json"),
+                                 "--compare", str(output), "--threshold", "100"]) == 0
+
+
+def test_compare_flags_slowdowns_above_the_threshold():
+    baseline = {"results": {"crop": {"wall_s": 1.0, "peak_rss_mb": 100},
+                            "merge": {"error": "boom"}}}
+    current = {"results": {"crop": {"wall_s": 1.1, "peak_rss_mb": 200},
+                           "merge": {"wall_s": 9.0, "peak_rss_mb": 1}}}
+
+    [regression] = run.compare(current, baseline, threshold=0.2)
+    assert regression.split()[:2] == ["crop", "peak_rss_mb"]
+    assert run.compare(current, baseline, threshold=1.5) == []
@@ -0,0 +1,37 @@
+import os
+
+from mypdf.cache import DiskCache, LRUCache
+
+
+def test_rewriting_a_key_does_not_grow_the_total(tmp_path):
+    cache = DiskCache(str(tmp_path / "objects"), max_bytes=10_000)
+    for _ in range(50):
+        cache.put("k" * 64, b"x" * 1000)
+    cache.put("a" * 64, b"y" * 10)
+    assert cache._size == cache._scan_size() == 1010
+    assert cache.get("k" * 64) == b"x" * 1000
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path / "objects"), max_bytes=3000)
+    keys = [cache.key("entry", i) for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, b"x" * 900)
+        os.utime(cache.path(key), (age, age))
+    cache.get(keys[0])  # Now the most recently used
+    cache.put(cache.key("entry", 3), b"x" * 900)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache._size <= 3000
+
+
+def test_lru_cache_bounded_by_cost():
+    cache = LRUCache(max_items=10, max_cost=10, cost=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.get("a")
+    cache.put("c", "xxxx")
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx"
+    assert cache.total_cost == 8
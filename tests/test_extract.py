@@ -0,0 +1,44 @@
+import os
+
+import pytest
+from conftest import page_texts, rotations
+from PyPDF2 import PdfReader
+
+from mypdf.extract import every_n_pages, extract_pages, parse_page_ranges, split_pdf
+from mypdf.reader import LazyPdfReader
+
+
+def test_parse_page_ranges():
+    assert parse_page_ranges("1-3, 7,10-", 12) == [range(0, 3), range(6, 7), range(9, 12)]
+    assert every_n_pages(2, 5) == [range(0, 2), range(2, 4), range(4, 5)]
+    for spec in ("", "0", "3-1", "13", "a-b"):
+        with pytest.raises(ValueError):
+            parse_page_ranges(spec, 12)
+
+
+def test_extract_copies_only_what_the_pages_use(make_pdf, tmp_path):
+    source = make_pdf("in.pdf", 4, rotate=90, image=True)
+    output = str(tmp_path / "out.pdf")
+
+    assert extract_pages(source, output, [3, 0]) == 2
+    assert page_texts(output) == ["A page 4", "A page 1"]
+    assert rotations(output) == [0, 90]
+    reader = PdfReader(output)
+    # Both pages show the same image object, written once
+    images = {next(iter(page["/Resources"]["/XObject"].values())).idnum for page in reader.pages}
+    assert len(images) == 1
+    assert os.path.getsize(output) < os.path.getsize(source)
+
+
+def test_split_reads_source_once(make_pdf, tmp_path):
+    source = make_pdf("in.pdf", 5)
+    pattern = str(tmp_path / "part-{n}-{start}-{end}.pdf")
+    seen = []
+    with LazyPdfReader(source) as reader:
+        outputs = split_pdf(reader, every_n_pages(2, 5), pattern,
+                            lambda done, total: seen.append((done, total)))
+    assert [os.path.basename(path) for path in outputs] == \
+        ["part-1-1-2.pdf", "part-2-3-4.pdf", "part-3-5-5.pdf"]
+    assert page_texts(outputs[2]) == ["A page 5"]
+    assert seen == [(i, 5) for i in range(1, 6)]
+
@@ -0,0 +1,103 @@
+import os
+
+from PIL import Image
+from PyPDF2 import PdfReader
+
+from mypdf.imagepdf import convert_images_to_pdf
+from mypdf.pdfimages import decode_image
+
+COLORS = [(204, 51, 51), (51, 204, 51), (51, 51, 204), (204, 204, 51), (51, 204, 204)]
+
+
+def page_image(page):
+    return page["/Resources"]["/XObject"]["/Im0"].get_object()
+
+
+def center_color(page):
+    img = decode_image(page_image(page)).convert("RGB")
+    return img.getpixel((img.width // 2, img.height // 2))
+
+
+def close_to(actual, expected, tolerance=12):
+    return all(abs(a - b) <= tolerance for a, b in zip(actual, expected))
+
+
+def write_images(tmp_path):
+    """Images that all need rendering: alpha, palette and BMP files."""
+    paths = []
+    for i, color in enumerate(COLORS):
+        img = Image.new("RGB", (300 + 50 * i, 200), color)
+        if i % 3 == 0:
+            path, img = tmp_path / f"{i}.png", img.convert("RGBA")
+        elif i % 3 == 1:
+            path = tmp_path / f"{i}.bmp"
+        else:
+            path, img = tmp_path / f"{i}.gif", img.convert("P")
+        img.save(path)
+        paths.append(str(path))
+    return paths
+
+
+def test_pool_keeps_pages_in_order(tmp_path):
+    paths = write_images(tmp_path)
+    output = str(tmp_path / "out.pdf")
+    seen = []
+
+    assert convert_images_to_pdf(paths, output, workers=2,
+                                 progress=lambda done, total: seen.append((done, total))) == 5
+
+    assert seen == [(i, 5) for i in range(1, 6)]
+    pages = PdfReader(output).pages
+    for page, color in zip(pages, COLORS):
+        assert [float(v) for v in page.mediabox] == [0, 0, 595, 842]
+        assert page_image(page)["/Filter"] == "/DCTDecode"
+        assert close_to(center_color(page), color)
+
+
+def test_rendered_pages_come_from_the_cache(tmp_path, monkeypatch):
+    paths = write_images(tmp_path)[:2]
+    convert_images_to_pdf(paths, str(tmp_path / "first.pdf"), workers=1)
+
+    def render_again(*args, **kwargs):
+        raise AssertionError("page rendered twice")
+    monkeypatch.setattr("mypdf.imagepdf.render_page", render_again)
+    convert_images_to_pdf(paths, str(tmp_path / "second.pdf"), workers=1)
+    assert os.path.getsize(tmp_path / "second.pdf") == os.path.getsize(tmp_path / "first.pdf")
+
+
+def test_jpeg_and_png_are_embedded_untouched(tmp_path):
+    photo = tmp_path / "photo.jpg"
+    Image.effect_noise((900, 1400), 50).convert("RGB").save(photo, quality=85)
+    chart = tmp_path / "chart.png"
+    pixels = Image.effect_noise((64, 48), 80).convert("RGB")
+    pixels.save(chart)
+    palette = tmp_path / "palette.png"
+    Image.new("RGB", (30, 20), (51, 102, 153)).convert("P").save(palette)
+    output = str(tmp_path / "out.pdf")
+
+    convert_images_to_pdf([str(photo), str(chart), str(palette)], output, workers=1)
+
+    first, second, third = (page_image(page) for page in PdfReader(output).pages)
+    assert first["/Filter"] == "/DCTDecode"
+    assert first._data == photo.read_bytes()
+    assert (first["/Width"], first["/Height"]) == (900, 1400)
+    assert second["/Filter"] == "/FlateDecode"
+    assert decode_image(second).tobytes() == pixels.tobytes()
+    assert third["/ColorSpace"][0] == "/Indexed"
+    assert decode_image(third).getpixel((0, 0)) == (51, 102, 153)
+
+
+def test_images_that_need_decoding_are_rendered(tmp_path):
+    photo = tmp_path / "photo.jpg"
+    Image.new("RGB", (300, 200), (204, 51, 51)).save(photo)
+    transparent = tmp_path / "transparent.png"
+    Image.new("RGBA", (300, 200), (51, 204, 51, 128)).save(transparent)
+    output = str(tmp_path / "out.pdf")
+
+    convert_images_to_pdf([str(photo), str(transparent)], output, workers=1, passthrough=False)
+    convert_images_to_pdf([str(transparent)], str(tmp_path / "auto.pdf"), workers=1)
+
+    for page in [*PdfReader(output).pages, *PdfReader(str(tmp_path / "auto.pdf")).pages]:
+        image = page_image(page)
+        assert image["/Filter"] == "/DCTDecode"
+        assert (image["/Width"], image["/Height"]) == (595, 842)
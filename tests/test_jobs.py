@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+import pytest
+from conftest import page_texts
+
+from mypdf import engine, jobs
+from mypdf.jobs import CANCELLED, DONE, FAILED, JobQueue
+
+
+@pytest.fixture
+def job_queue():
+    queue = JobQueue(workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def wait_idle(queue, timeout=30):
+    deadline = time.monotonic() + timeout
+    while queue.active() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not queue.active()
+
+
+def crop(source, output, end=6):
+    return {"op": "crop", "input": source, "start": 1, "end": end, "output": output}
+
+
+def cancel_at_page(queue, monkeypatch, page):
+    """Make running jobs cancel themselves once they have written page pages."""
+    run_job = engine.run_job
+
+    def cancelling(spec, progress):
+        def check(done, total):
+            if done == page:
+                for job in list(queue.jobs.values()):
+                    queue.cancel(job.id)
+            progress(done, total)
+        return run_job(spec, check)
+    monkeypatch.setattr(jobs.engine, "run_job", cancelling)
+
+
+def test_jobs_run_and_report_progress(make_pdf, tmp_path, job_queue):
+    source = make_pdf("a.pdf", 6)
+    output = str(tmp_path / "out.pdf")
+    job = job_queue.submit("Crop", crop(source, output))
+    wait_idle(job_queue)
+
+    assert job.state == DONE and job.result == 6
+    assert (job.done, job.total) == (6, 6)
+    assert job.output_bytes == os.path.getsize(output)
+    assert job in job_queue.poll()
+    assert job_queue.clear_finished() == [job] and not job_queue.jobs
+
+
+def test_cancel_discards_the_partial_output(make_pdf, tmp_path, job_queue, monkeypatch):
+    source = make_pdf("a.pdf", 6)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    cancel_at_page(job_queue, monkeypatch, 2)
+
+    job = job_queue.submit("Crop", crop(source, str(out_dir / "part.pdf")))
+    wait_idle(job_queue)
+
+    assert job.state == CANCELLED and job.done == 1
+    assert os.listdir(out_dir) == []
+
+
+def test_cancelled_job_keeps_an_earlier_output(make_pdf, tmp_path, job_queue, monkeypatch):
+    source = make_pdf("a.pdf", 6)
+    output = make_pdf("old.pdf", 1, "OLD")
+    run_job = engine.run_job
+    cancel_at_page(job_queue, monkeypatch, 2)
+
+    job = job_queue.submit("Crop", crop(source, output))
+    wait_idle(job_queue)
+    assert job.state == CANCELLED
+    assert page_texts(output) == ["OLD page 1"]
+
+    monkeypatch.setattr(jobs.engine, "run_job", run_job)
+    failed = job_queue.submit("Crop", crop(source, output, end=99))
+    wait_idle(job_queue)
+    assert failed.state == FAILED and "Invalid page range" in failed.error
+    assert page_texts(output) == ["OLD page 1"]
+
+
+def test_queued_job_cancelled_before_it_starts(make_pdf, tmp_path, job_queue, monkeypatch):
+    source = make_pdf("a.pdf", 2)
+    release = threading.Event()
+    run_job = engine.run_job
+
+    def blocked(spec, progress):
+        assert release.wait(30)
+        return run_job(spec, progress)
+    monkeypatch.setattr(jobs.engine, "run_job", blocked)
+
+    first = job_queue.submit("First", crop(source, str(tmp_path / "first.pdf"), end=2))
+    second = job_queue.submit("Second", crop(source, str(tmp_path / "second.pdf"), end=2))
+    job_queue.cancel(second.id)
+    assert second.state == CANCELLED
+    release.set()
+    wait_idle(job_queue)
+
+    assert first.state == DONE
+    assert second.state == CANCELLED and second.result is None
+    assert not os.path.exists(tmp_path / "second.pdf")
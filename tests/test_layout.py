@@ -0,0 +1,78 @@
+import time
+
+from conftest import page_texts
+
+from mypdf import engine, layout
+from mypdf.layout import convert_docx
+
+
+def test_paragraphs_wrap_and_flow_onto_pages(make_docx, tmp_path):
+    docx = make_docx("report.docx", 40)
+    output = str(tmp_path / "report.pdf")
+
+    pages = convert_docx(docx, output, cache=False)
+
+    texts = page_texts(output)
+    assert pages == len(texts) > 1
+    assert texts[0].startswith("Report\nParagraph 1 lorem")
+    assert "Paragraph 40" in texts[-1]
+    # Every paragraph is wrapped onto several lines of the page width
+    assert all(line.count("lorem") < 20 for text in texts for line in text.splitlines())
+
+
+def test_tables_and_page_breaks(make_docx, tmp_path):
+    docx = make_docx("report.docx", 3, table=True, page_break=True)
+    output = str(tmp_path / "report.pdf")
+
+    assert engine.run_job({"op": "word", "input": docx, "output": output}) == 2
+
+    first, second = page_texts(output)
+    assert "cell 00" in first and "cell 21" in first
+    assert "Paragraph 2" not in first
+    assert second.startswith("Paragraph 2")
+
+
+def test_converted_documents_come_from_the_cache(make_docx, tmp_path, monkeypatch):
+    docx = make_docx("report.docx", 5)
+    pages = convert_docx(docx, str(tmp_path / "first.pdf"))
+
+    def lay_out_again(*args, **kwargs):
+        raise AssertionError("laid out twice")
+    monkeypatch.setattr(layout, "DocumentLayout", lay_out_again)
+    assert convert_docx(docx, str(tmp_path / "second.pdf")) == pages
+    assert page_texts(str(tmp_path / "second.pdf")) == page_texts(str(tmp_path / "first.pdf"))
+
+
+def test_preview_and_output_share_one_pagination(make_docx, tmp_path, monkeypatch):
+    docx = make_docx("report.docx", 40, table=True)
+    preview = layout.get_layout(docx)
+    first = preview.page(0)
+    assert first and preview.laid_out == 1 and not preview.complete
+    assert layout.get_layout(docx) is preview
+
+    # The conversion draws the preview's pages instead of laying out its own
+    def lay_out_again(*args, **kwargs):
+        raise AssertionError("laid out twice")
+    monkeypatch.setattr(layout, "DocumentLayout", lay_out_again)
+    output = str(tmp_path / "report.pdf")
+    pages = convert_docx(docx, output, cache=False)
+
+    assert pages == preview.page_count() == len(preview.pages) == len(page_texts(output))
+    assert preview.page(0) is first
+    assert preview.page(pages) is None
+
+
+def test_background_layout_finishes_the_document(make_docx):
+    docx = make_docx("report.docx", 60)
+    background = layout.DocumentLayout(docx)
+    background.page(0)
+    background.start_background()
+    background.stop()  # Waits for the page in progress
+    assert background.laid_out == len(background.pages)
+    background.start_background()
+    deadline = time.monotonic() + 10
+    while not background.complete and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert background.complete and background.error is None
+    assert len(background.pages) == layout.DocumentLayout(docx).page_count() > 2
@@ -0,0 +1,104 @@
+import os
+
+import pytest
+from conftest import outline_titles, page_texts, rotations
+from PyPDF2 import PdfReader
+
+from mypdf import merge
+from mypdf.merge import MergeInput, journal_path, merge_pdfs
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_merge_keeps_pages_in_order(make_pdf, tmp_path):
+    a = make_pdf("a.pdf", 3, "A", rotate=90)
+    b = make_pdf("b.pdf", 4, "B")
+    output = str(tmp_path / "out.pdf")
+
+    assert merge_pdfs([a, MergeInput(b, "3-4,1")], output) == 6
+    assert page_texts(output) == ["A page 1", "A page 2", "A page 3",
+                                  "B page 3", "B page 4", "B page 1"]
+    assert rotations(output) == [90, 0, 0, 0, 0, 0]
+    assert not os.path.exists(journal_path(output))
+
+
+def test_merge_stores_shared_images_once(make_pdf, tmp_path):
+    a = make_pdf("a.pdf", 3, "A", image=True)
+    output = str(tmp_path / "out.pdf")
+    merge_pdfs([a, a], output)
+
+    images = set()
+    for page in PdfReader(output).pages:
+        for xobject in page["/Resources"]["/XObject"].values():
+            images.add(xobject.idnum)
+    assert len(images) == 1
+    assert os.path.getsize(output) < 1.5 * os.path.getsize(a)
+
+
+def test_merge_joins_outlines(make_pdf, tmp_path):
+    a = make_pdf("a.pdf", 2, "A", outline=True)
+    b = make_pdf("b.pdf", 2, "B", outline=True)
+    output = str(tmp_path / "out.pdf")
+    merge_pdfs([a, b], output)
+
+    assert outline_titles(output) == [("A chapter 1", 0), ("A chapter 2", 1),
+                                      ("B chapter 1", 2), ("B chapter 2", 3)]
+
+
+def test_merge_keeps_form_fields_and_info(make_pdf, tmp_path):
+    a = make_pdf("a.pdf", 2, "A", form=True)
+    b = make_pdf("b.pdf", 2, "B", form=True)
+    c = make_pdf("c.pdf", 2, "C", form=True)
+    output = str(tmp_path / "out.pdf")
+    # c's field is on its first page, which is left out
+    merge_pdfs([a, b, MergeInput(c, "2")], output)
+
+    reader = PdfReader(output)
+    assert sorted(reader.get_fields()) == ["fieldA", "fieldB"]
+    assert "/DR" in reader.trailer["/Root"]["/AcroForm"]
+    assert reader.metadata.title == "Doc A"
+    assert reader.metadata.author == "tests"
+
+
+def test_interrupted_merge_resumes(make_pdf, tmp_path, monkeypatch):
+    monkeypatch.setattr(merge, "CHECKPOINT_PAGES", 2)
+    inputs = [make_pdf("a.pdf", 5, "A", outline=True, form=True),
+              make_pdf("b.pdf", 3, "B", outline=True, form=True)]
+    output = str(tmp_path / "out.pdf")
+
+    def stop_at_seven(done, total):
+        if done == 7:
+            raise Interrupted()
+    with pytest.raises(Interrupted):
+        merge_pdfs(inputs, output, stop_at_seven)
+    assert os.path.exists(journal_path(output))
+
+    seen = []
+    assert merge_pdfs(inputs, output, lambda done, total: seen.append(done)) == 8
+    # Pages 1-6 were checkpointed, so only the rest are copied again
+    assert seen[0] > 1
+    assert page_texts(output) == [f"A page {i}" for i in range(1, 6)] + \
+        [f"B page {i}" for i in range(1, 4)]
+    assert [title for title, _ in outline_titles(output)] == \
+        [f"A chapter {i}" for i in range(1, 6)] + [f"B chapter {i}" for i in range(1, 4)]
+    assert sorted(PdfReader(output).get_fields()) == ["fieldA", "fieldB"]
+    assert PdfReader(output).metadata.title == "Doc A"
+    assert not os.path.exists(journal_path(output))
+
+
+def test_changed_input_starts_over(make_pdf, tmp_path, monkeypatch):
+    monkeypatch.setattr(merge, "CHECKPOINT_PAGES", 2)
+    a = make_pdf("a.pdf", 5, "A")
+    output = str(tmp_path / "out.pdf")
+
+    def stop_at_four(done, total):
+        if done == 4:
+            raise Interrupted()
+    with pytest.raises(Interrupted):
+        merge_pdfs([a], output, stop_at_four)
+
+    a = make_pdf("a.pdf", 3, "C")
+    assert merge_pdfs([a], output) == 3
+    assert page_texts(output) == ["C page 1", "C page 2", "C page 3"]
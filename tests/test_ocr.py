@@ -0,0 +1,64 @@
+from PIL import Image
+from PyPDF2 import PdfReader
+
+from mypdf import imagepdf, ocr
+from mypdf.pdfstream import StreamingPdfWriter, ref
+
+
+def test_text_layer_places_words_over_the_image():
+    result = ocr.OcrResult((200, 100), [ocr.Word("Hello", 20, 10, 50, 20)])
+    # Image drawn at half size, 100 x 50 points, with its corner at (30, 40)
+    layer = ocr.text_layer(result, (100, 50, 30, 40))
+    assert layer.startswith("BT 3 Tr")
+    # Left edge 30 + 20 / 2; bottom 40 + 50 - (10 + 20) / 2; height 20 / 2
+    assert "/OCR 10 Tf" in layer
+    assert "1 0 0 1 40 75 Tm" in layer
+    assert ocr.text_layer(ocr.OcrResult((0, 0), result.words), (100, 50, 0, 0)) == ""
+
+
+def test_text_layer_is_searchable(tmp_path):
+    words = [ocr.Word("“Café”", 10, 10, 60, 12), ocr.Word("costs", 80, 10, 40, 12),
+             ocr.Word("€5—ok", 130, 10, 50, 12), ocr.Word("日本", 10, 40, 20, 12)]
+    result = ocr.OcrResult((300, 200), words)
+    output = str(tmp_path / "ocr.pdf")
+    with StreamingPdfWriter(output) as writer:
+        font = f"/Font << {ocr.FONT_NAME} {ref(writer.write_object(ocr.FONT_OBJECT))} >>"
+        layer = ocr.text_layer(result, imagepdf.fit_on_page(result.size, imagepdf.A4_SIZE))
+        writer.add_image_page("/Width 1 /Height 1 /ColorSpace /DeviceGray /BitsPerComponent 8",
+                              b"\xff", result.size, imagepdf.A4_SIZE, (0, 0), layer, font)
+
+    text = PdfReader(output).pages[0].extract_text()
+    # WinAnsi covers the quotes, dash and euro sign; anything else becomes ?
+    assert "“Café” costs €5—ok" in text
+    assert "??" in text
+
+
+def test_results_round_trip_through_json():
+    result = ocr.OcrResult((10, 20), [ocr.Word("a", 1, 2, 3, 4)])
+    assert ocr.OcrResult.from_json(result.to_json()) == result
+
+
+class FakeEngine:
+    name = "fake"
+    calls = 0
+
+    def available(self):
+        return True
+
+    def recognize(self, path, language):
+        FakeEngine.calls += 1
+        return ocr.OcrResult((400, 300), [ocr.Word(f"scan-{language}", 40, 40, 200, 30)])
+
+
+def test_images_to_pdf_adds_the_text_layer(tmp_path, monkeypatch):
+    monkeypatch.setitem(ocr.ENGINES, "fake", FakeEngine)
+    monkeypatch.setenv(ocr.OCR_ENGINE_ENV, "fake")
+    image = str(tmp_path / "scan.png")
+    Image.new("RGB", (400, 300), "white").save(image)
+    output = str(tmp_path / "out.pdf")
+
+    for _ in range(2):
+        imagepdf.convert_images_to_pdf([image, image], output, workers=1, ocr_language="ind")
+    assert [page.extract_text().strip() for page in PdfReader(output).pages] == ["scan-ind"] * 2
+    # The second image and the second run come from the cache
+    assert FakeEngine.calls == 1
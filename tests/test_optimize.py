@@ -0,0 +1,37 @@
+from conftest import outline_titles, page_texts, rotations
+from PyPDF2 import PdfReader
+
+from mypdf.optimize import optimize_pdf
+
+
+def test_optimize_shrinks_images_and_keeps_pages(make_pdf, tmp_path):
+    source = make_pdf("in.pdf", 3, image=True, rotate=270)
+    output = str(tmp_path / "out.pdf")
+
+    report = optimize_pdf(source, output, workers=2)
+    assert report.pages == 3
+    assert report.images_recompressed == 1
+    assert report.output_bytes < report.input_bytes / 2
+    assert page_texts(output) == page_texts(source)
+    assert rotations(output) == [270, 0, 0]
+
+    image = PdfReader(output).pages[0]["/Resources"]["/XObject"]
+    image = next(iter(image.values())).get_object()
+    # Drawn 200 points wide: 150 dpi is about 417 pixels
+    assert image["/Filter"] == "/DCTDecode"
+    assert 400 <= image["/Width"] <= 440
+
+
+def test_optimize_keeps_document_level_data(make_pdf, tmp_path):
+    source = make_pdf("in.pdf", 3, "A", outline=True, form=True)
+    output = str(tmp_path / "out.pdf")
+    optimize_pdf(source, output, workers=1)
+
+    reader = PdfReader(output)
+    assert outline_titles(output) == outline_titles(source)
+    assert list(reader.get_fields()) == ["fieldA"]
+    assert reader.metadata["/Title"] == "Doc A"
+    assert reader.metadata["/Author"] == "tests"
+    # The field's widget is the one on page 1, not a copy
+    widget = reader.pages[0]["/Annots"][0]
+    assert widget.idnum == reader.trailer["/Root"]["/AcroForm"].raw_get("/Fields")[0].idnum
@@ -0,0 +1,65 @@
+import pytest
+from conftest import page_texts, rotations
+from PyPDF2 import PdfReader
+
+from mypdf import engine
+from mypdf.pageops import PageEdits
+
+
+def test_edits_replay_on_page_numbers():
+    edits = PageEdits(10)
+    edits.delete("2")
+    edits.rotate("1-2", 90)
+    edits.move("8-", 1)
+    edits.keep("1-3,5")
+    # delete 2 -> [0,2,3,...,9]; move the last two (8, 9) to the front
+    assert edits.pages == [8, 9, 0, 3]
+    assert edits.rotation == {0: 90, 2: 90}
+    assert edits.ops == [["delete", "2"], ["rotate", "1-2", 90],
+                         ["move", "8-", 1], ["keep", "1-3,5"]]
+
+    edits.undo()
+    assert edits.pages == [8, 9, 0, 2, 3, 4, 5, 6, 7]
+    assert PageEdits(10, edits.ops).pages == edits.pages
+
+
+@pytest.mark.parametrize("op", [
+    ["rotate", "1", 45],
+    ["delete", "1-3"],
+    ["move", "1", 5],
+    ["nup", 3],
+    ["flip", "1"],
+    ["delete"],
+])
+def test_invalid_edits_change_nothing(op):
+    edits = PageEdits(3, [["rotate", "2", 90]])
+    with pytest.raises(ValueError):
+        edits.apply(op)
+    assert edits.pages == [0, 1, 2]
+    assert edits.ops == [["rotate", "2", 90]]
+
+
+def test_write_rotates_deletes_and_reorders(make_pdf, tmp_path):
+    source = make_pdf("in.pdf", 5, rotate=90)
+    output = str(tmp_path / "out.pdf")
+    ops = [["rotate", "1-2", 90], ["delete", "3"], ["move", "4", 1]]
+
+    assert engine.edit_pages(source, output, ops) == 4
+    assert page_texts(output) == ["A page 5", "A page 1", "A page 2", "A page 4"]
+    # Page 1 was already turned 90 degrees; the edit adds to that
+    assert rotations(output) == [0, 180, 90, 0]
+
+
+def test_write_n_up_sheets(make_pdf, tmp_path):
+    source = make_pdf("in.pdf", 5)
+    output = str(tmp_path / "out.pdf")
+
+    assert engine.edit_pages(source, output, [["delete", "5"], ["nup", 2]]) == 2
+    reader = PdfReader(output)
+    assert len(reader.pages) == 2
+    # Two portrait pages side by side on a landscape sheet
+    box = reader.pages[0].mediabox
+    assert float(box.width) > float(box.height)
+    texts = page_texts(output)
+    assert texts[0].index("A page 1") < texts[0].index("A page 2")
+    assert "A page 3" in texts[1] and "A page 4" in texts[1]
@@ -0,0 +1,137 @@
+import zlib
+
+import pytest
+from PIL import Image
+from PyPDF2.generic import (
+    ArrayObject,
+    BooleanObject,
+    ByteStringObject,
+    DictionaryObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+)
+
+from mypdf import pdfimages
+from mypdf.pdfimages import decode_image
+
+np = pytest.importorskip("numpy")
+
+
+def _value(value):
+    if isinstance(value, bool):
+        return BooleanObject(value)
+    if isinstance(value, int):
+        return NumberObject(value)
+    if isinstance(value, str):
+        return NameObject(value)
+    if isinstance(value, bytes):
+        return ByteStringObject(value)
+    if isinstance(value, dict):
+        return DictionaryObject({NameObject(k): _value(v) for k, v in value.items()})
+    return ArrayObject(_value(v) for v in value)
+
+
+def image_stream(data, **entries):
+    """An image XObject dictionary around already encoded data."""
+    obj = StreamObject()
+    for key, value in entries.items():
+        obj[NameObject("/" + key)] = _value(value)
+    obj._data = data
+    return obj
+
+
+def png_up(rows):
+    """Rows of bytes, PNG-filtered with the Up filter."""
+    out = b""
+    previous = bytes(len(rows[0]))
+    for row in rows:
+        out += b"\x02" + bytes((a - b) % 256 for a, b in zip(row, previous))
+        previous = row
+    return out
+
+
+def test_flate_rgb_with_png_predictor():
+    pixels = np.arange(4 * 3 * 3, dtype=np.uint8).reshape(3, 4, 3) * 7
+    data = zlib.compress(png_up([row.tobytes() for row in pixels]))
+    obj = image_stream(data, Width=4, Height=3, ColorSpace="/DeviceRGB", BitsPerComponent=8,
+                       Filter="/FlateDecode",
+                       DecodeParms={"/Predictor": 12, "/Colors": 3, "/Columns": 4})
+    img = decode_image(obj)
+    assert img.mode == "RGB"
+    assert np.array_equal(np.asarray(img), pixels)
+
+
+def test_one_bit_gray_with_inverted_decode():
+    # Rows are padded to whole bytes: 0b1010_0000 and 0b0101_0000
+    obj = image_stream(b"\xa0\x50", Width=4, Height=2, ColorSpace="/DeviceGray",
+                       BitsPerComponent=1, Decode=[1, 0])
+    assert np.asarray(decode_image(obj)).tolist() == [[0, 255, 0, 255], [255, 0, 255, 0]]
+
+
+def test_indexed_four_bit_and_hex_filter():
+    palette = bytes([255, 0, 0, 0, 255, 0, 0, 0, 255])
+    obj = image_stream(b"01 20>", Width=2, Height=2,
+                       ColorSpace=["/Indexed", "/DeviceRGB", 2, palette],
+                       BitsPerComponent=4, Filter="/AHx")
+    img = decode_image(obj)
+    assert [img.getpixel(xy) for xy in ((0, 0), (1, 0), (0, 1))] == \
+        [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+
+
+def test_cmyk_and_sixteen_bit():
+    cmyk = image_stream(bytes([0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 255]), Width=3, Height=1,
+                        ColorSpace="/DeviceCMYK", BitsPerComponent=8)
+    assert np.asarray(decode_image(cmyk)).tolist() == [[[255, 255, 255], [0, 255, 255], [0, 0, 0]]]
+
+    gray = image_stream(b"\xff\xff\x80\x00\x00\x00", Width=3, Height=1,
+                        ColorSpace="/DeviceGray", BitsPerComponent=16)
+    assert np.asarray(decode_image(gray)).tolist() == [[255, 128, 0]]
+
+
+def test_color_key_mask_and_subsampling():
+    pixels = np.zeros((40, 60), np.uint8)
+    pixels[:, 30:] = 200
+    obj = image_stream(zlib.compress(pixels.tobytes()), Width=60, Height=40,
+                       ColorSpace="/DeviceGray", BitsPerComponent=8, Filter="/FlateDecode",
+                       Mask=[190, 210])
+    img = decode_image(obj, max_size=(15, 10))
+    assert img.mode == "LA"
+    assert img.size == (15, 10)
+    assert img.getpixel((0, 0)) == (0, 255)
+    assert img.getpixel((14, 0))[1] == 0
+
+
+def test_dct_is_decoded_by_pillow(tmp_path):
+    source = Image.new("RGB", (16, 8), (10, 200, 30))
+    path = tmp_path / "x.jpg"
+    source.save(path, quality=95)
+    obj = image_stream(path.read_bytes(), Width=16, Height=8, ColorSpace="/DeviceRGB",
+                       BitsPerComponent=8, Filter="/DCTDecode")
+    img = decode_image(obj)
+    assert img.size == (16, 8)
+    assert all(abs(a - b) <= 3 for a, b in zip(img.getpixel((4, 4)), (10, 200, 30)))
+
+
+def test_plain_gray_and_rgb_need_no_numpy(monkeypatch):
+    def no_numpy():
+        raise ImportError("no numpy")
+    monkeypatch.setattr(pdfimages, "_numpy", no_numpy)
+    pixels = np.arange(4 * 3 * 3, dtype=np.uint8).reshape(3, 4, 3) * 7
+    data = zlib.compress(png_up([row.tobytes() for row in pixels]))
+    rgb = image_stream(data, Width=4, Height=3, ColorSpace="/DeviceRGB", BitsPerComponent=8,
+                       Filter="/FlateDecode",
+                       DecodeParms={"/Predictor": 12, "/Colors": 3, "/Columns": 4})
+    assert np.asarray(decode_image(rgb)).tolist() == pixels.tolist()
+
+    gray = image_stream(zlib.compress(bytes(range(60)) * 40), Width=60, Height=40,
+                        ColorSpace="/DeviceGray", BitsPerComponent=8, Filter="/FlateDecode",
+                        Decode=[0, 1])
+    img = decode_image(gray, max_size=(15, 10))
+    assert img.mode == "L"
+    assert img.size == (15, 10)
+
+    inverted = image_stream(b"\x00\xff", Width=2, Height=1, ColorSpace="/DeviceGray",
+                            BitsPerComponent=8, Decode=[1, 0])
+    with pytest.raises(ImportError):
+        decode_image(inverted)
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+from conftest import page_texts
+
+from mypdf import engine
+from mypdf.pdfstream import StreamingPdfWriter
+
+
+def test_operations_can_overwrite_their_input(make_pdf, tmp_path):
+    # The input is read through an mmap; truncating it in place crashed
+    path = make_pdf("doc.pdf", 30)
+
+    assert engine.crop_pdf_pages(path, path, 2, 20) == 19
+    assert engine.edit_pages(path, path, [["delete", "1"]]) == 18
+    assert engine.optimize_pdf(path, path, workers=1).pages == 18
+    assert engine.merge_pdfs([path, path], path) == 36
+
+    texts = page_texts(path)
+    assert texts[0] == "A page 3" and texts[18] == "A page 3"
+    assert sorted(os.listdir(tmp_path)) in (["doc.pdf"], ["cache", "doc.pdf"])
+
+
+def test_failed_write_leaves_the_old_output(tmp_path):
+    output = tmp_path / "out.pdf"
+    output.write_bytes(b"old")
+    with pytest.raises(RuntimeError):
+        with StreamingPdfWriter(str(output)) as writer:
+            writer.write_object("<< >>")
+            raise RuntimeError("stop")
+    assert output.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["out.pdf"]
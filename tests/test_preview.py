@@ -0,0 +1,37 @@
+from PIL import Image, JpegImagePlugin
+
+from mypdf.preview import fit_size, load_preview
+
+
+def test_fit_size_keeps_aspect_ratio():
+    assert fit_size((4000, 3000), (580, 480)) == (580, 434)
+    assert fit_size((1000, 4000), (580, 480)) == (120, 480)
+    assert fit_size((10000, 1), (580, 480)) == (580, 1)
+
+
+def test_jpeg_is_decoded_in_draft_mode(tmp_path, monkeypatch):
+    path = tmp_path / "photo.jpg"
+    Image.effect_noise((4000, 3000), 40).convert("RGB").save(path, quality=80)
+    decoded = []
+    original = JpegImagePlugin.JpegImageFile.draft
+
+    def draft(self, mode, size):
+        result = original(self, mode, size)
+        decoded.append(self.size)
+        return result
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "draft", draft)
+
+    img = load_preview(str(path))
+    assert img.size == (580, 434)
+    assert img.mode == "RGB"
+    # DCT scaling decoded a quarter of each side, not all 12 MP
+    assert decoded == [(1000, 750)]
+
+
+def test_transparent_png_keeps_alpha(tmp_path):
+    path = tmp_path / "logo.png"
+    Image.new("RGBA", (1200, 1200), (255, 0, 0, 128)).save(path)
+    img = load_preview(str(path), (100, 100))
+    assert img.size == (100, 100)
+    assert img.mode == "RGBA"
+    assert img.getpixel((50, 50))[3] == 128
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from mypdf.reader import LazyPdfReader
+
+
+def test_pages_and_inherited_attributes(make_pdf):
+    source = make_pdf("in.pdf", 300, rotate=90)
+    with LazyPdfReader(source, cache_size=16, page_cache_size=4) as reader:
+        assert len(reader.pages) == 300
+        assert reader.pages[250].extract_text().strip() == "A page 251"
+        assert int(reader.pages[0]["/Rotate"]) == 90
+        assert [float(v) for v in reader.pages[299].mediabox] == [0, 0, 595.2756, 841.8898]
+
+
+def test_unreadable_files_are_closed(tmp_path):
+    path = tmp_path / "bad.pdf"
+    path.write_bytes(b"not a pdf at all")
+    before = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+    for _ in range(5):
+        with pytest.raises(Exception):
+            LazyPdfReader(str(path))
+    if before is not None:
+        assert len(os.listdir("/proc/self/fd")) == before
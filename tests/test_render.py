@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+from PyPDF2 import PdfReader
+
+from mypdf import render
+from mypdf.render import PAGE_CACHE, PageRenderer, compose_page
+
+
+@pytest.fixture(autouse=True)
+def compose_only(monkeypatch):
+    """Render with Pillow whether or not poppler is installed."""
+    monkeypatch.setattr(render, "rasterize_with_pdftoppm", lambda *args: None)
+
+
+def test_get_renders_in_the_background_and_prefetches(make_pdf):
+    path = make_pdf("a.pdf", 8)
+    ready = []
+    done = threading.Event()
+
+    def on_ready(index):
+        ready.append(index)
+        if len(set(ready)) == 5:
+            done.set()
+    renderer = PageRenderer(path, prefetch=2, size=(200, 280), on_ready=on_ready)
+    try:
+        assert renderer.get(4) is None
+        renderer.prefetch(4)
+        assert done.wait(10)
+        assert sorted(set(ready)) == [2, 3, 4, 5, 6]
+        img = renderer.get(4)
+        assert img is not None
+        # A4 fitted into the box
+        assert img.height == 280 and img.width == 197
+        assert PAGE_CACHE.get(renderer.key(0)) is None
+    finally:
+        renderer.close()
+
+
+def test_rendered_pages_are_shared_between_renderers(make_pdf, monkeypatch):
+    path = make_pdf("a.pdf", 2)
+    first = PageRenderer(path, size=(100, 140))
+    try:
+        page = first.render(1)
+    finally:
+        first.close()
+
+    monkeypatch.setattr(render, "compose_page", None)  # Any render would fail
+    second = PageRenderer(path, size=(100, 140))
+    try:
+        assert second.render(1) is page
+    finally:
+        second.close()
+
+
+def test_compose_page_draws_placed_images(make_pdf):
+    path = make_pdf("a.pdf", 1, image=True)
+    page = PdfReader(path).pages[0]
+    bitmap = compose_page(page, (595, 842), text="")
+    assert bitmap.size == (595, 841)
+    # reportlab put the 200x150 photo at (100, 300) from the bottom left
+    assert bitmap.getpixel((200, 841 - 375)) != (255, 255, 255)
+    assert bitmap.getpixel((500, 100)) == (255, 255, 255)
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+from mypdf.cache import LRUCache
+from mypdf.session import READER_BYTES, Document, MissingDependency, ResourceManager
+
+
+def test_missing_python_docx_is_reported(tmp_path, monkeypatch):
+    path = tmp_path / "report.docx"
+    path.write_bytes(b"")
+    monkeypatch.setitem(sys.modules, "docx.styles", None)
+    resources = ResourceManager()
+    doc = Document("word", path=str(path))
+    resources.add(doc)
+    with pytest.raises(MissingDependency, match="python-docx"):
+        resources.use(doc)
+
+
+def test_least_recently_used_documents_are_released(make_pdf):
+    paths = [make_pdf(f"{name}.pdf", 3, name.upper()) for name in "abc"]
+    previews = LRUCache(max_items=10, cost=lambda value: value)
+    # Room for about two open PDFs besides what earlier tests left in the shared caches
+    resources = ResourceManager(caches=[(previews, lambda key: key[0])])
+    resources.budget = resources.usage() + int(2.5 * READER_BYTES)
+    a, b, c = docs = [Document("crop", path=path) for path in paths]
+    try:
+        for doc in docs:
+            resources.add(doc)
+        assert resources.use(a) == []
+        a.position = 2
+        previews.put((os.path.abspath(paths[0]), 2), 1000)
+        assert resources.use(b) == []
+        assert resources.use(c) == [a]
+        assert not a.loaded and a.reader is None and b.loaded and c.loaded
+        assert len(previews) == 0
+        assert resources.usage() <= resources.budget
+
+        # Switching back loads it again where it was, and b is now the oldest
+        assert resources.use(a) == [b]
+        assert a.loaded and a.position == 2 and a.page_count == 3
+    finally:
+        resources.close_all()
+    assert not any(doc.loaded for doc in docs)
+
+
+def test_the_document_in_view_is_never_released(make_pdf):
+    resources = ResourceManager(budget=1)
+    a, b = Document("crop", path=make_pdf("a.pdf", 1)), Document("crop", path=make_pdf("b.pdf", 1))
+    try:
+        resources.use(a)
+        assert resources.use(b) == [a]
+        assert b.loaded
+    finally:
+        resources.close_all()
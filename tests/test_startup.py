@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks import startup
+
+
+def test_gui_starts_without_heavy_modules():
+    pytest.importorskip("tkinter")
+    pytest.importorskip("customtkinter")
+    result = startup.measure_once()
+    assert result["modules"] == []
+    assert result["import_ms"] > 0
+
+
+def test_compare_ignores_small_differences():
+    baseline = {"process_ms": 50.0, "import_ms": 40.0, "window_ms": None}
+    # +40% but only 10 ms: noise
+    assert startup.compare({"process_ms": 60.0, "import_ms": 40.0, "window_ms": 80.0},
+                           baseline) == []
+    [regression] = startup.compare({"process_ms": 50.0, "import_ms": 90.0, "window_ms": None},
+                                   baseline)
+    assert regression.startswith("import_ms")
@@ -0,0 +1,40 @@
+import shutil
+
+from mypdf import textindex
+from mypdf.textindex import Match, TextIndex
+
+
+def test_pages_are_extracted_in_the_pool_and_searchable(make_pdf, monkeypatch):
+    monkeypatch.setattr(textindex, "CHUNK_PAGES", 2)
+    path = make_pdf("a.pdf", 7)
+    progress = []
+
+    index = TextIndex(path, 7, workers=2, on_progress=lambda done, total: progress.append(done))
+    try:
+        assert index.wait(30)
+    finally:
+        index.close()
+
+    assert [index.page_text(i).strip() for i in range(7)] == [f"A page {i}" for i in range(1, 8)]
+    assert sorted(progress)[-1] == 7 and len(progress) == 4
+    assert index.search("a  PAGE 3") == [Match(2, "A page 3")]
+    assert index.pages_matching("page") == list(range(7))
+    # The first and last words of a query may be parts of longer words
+    assert index.pages_matching("age 6") == [5]
+    assert index.pages_matching("chapter") == []
+    assert index.memory_estimate() > 0
+
+
+def test_text_comes_from_the_cache_under_any_name(make_pdf, tmp_path, monkeypatch):
+    path = make_pdf("a.pdf", 3)
+    first = TextIndex(path, 3, workers=1)
+    assert first.wait(30)
+
+    def extract_again(*args):
+        raise AssertionError("extracted twice")
+    monkeypatch.setattr(textindex, "extract_range", extract_again)
+    copy = str(tmp_path / "copy.pdf")
+    shutil.copy(path, copy)
+    second = TextIndex(copy, 3, workers=1)
+    assert second.wait(30) and second.error is None
+    assert second.search("page 2") == [Match(1, "A page 2")]
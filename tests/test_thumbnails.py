@@ -0,0 +1,66 @@
+import os
+import time
+
+from PIL import Image
+
+from mypdf.thumbnails import (
+    THUMB_CACHE,
+    THUMB_SIZE,
+    ThumbnailLoader,
+    image_key,
+    page_key,
+    render_thumbnail,
+)
+
+
+def wait_for(loader, keys, timeout=30):
+    deadline = time.monotonic() + timeout
+    while any(loader.get(key) is None for key in keys) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return [loader.get(key) for key in keys]
+
+
+def test_render_thumbnail_fits_the_box(make_pdf, tmp_path):
+    pdf = make_pdf("a.pdf", 2, image=True)
+    photo = str(tmp_path / "photo.jpg")
+    Image.new("RGB", (1600, 900), "red").save(photo)
+
+    page = render_thumbnail(page_key(pdf, 1))
+    image = render_thumbnail(image_key(photo))
+    assert page.height == THUMB_SIZE[1] and page.width <= THUMB_SIZE[0]
+    assert image.size == (120, 67)
+
+
+def test_loader_renders_wanted_thumbnails_in_the_pool(make_pdf, tmp_path):
+    pdf = make_pdf("a.pdf", 3)
+    photo = str(tmp_path / "photo.png")
+    Image.new("RGB", (300, 400), "blue").save(photo)
+    missing = str(tmp_path / "gone.png")
+    keys = [page_key(pdf, i) for i in range(3)] + [image_key(photo), image_key(missing)]
+
+    loader = ThumbnailLoader(workers=2)
+    try:
+        loader.want(keys)
+        thumbnails = wait_for(loader, keys)
+        assert all(thumbnails)
+        assert loader.version == len(keys)
+        assert thumbnails[3].getpixel((10, 10)) == (0, 0, 255)
+        # A file that cannot be read gets a placeholder instead of an error
+        assert thumbnails[4].size == THUMB_SIZE
+
+        # Cached thumbnails are not rendered again
+        loader.want(keys)
+        time.sleep(0.2)
+        assert loader.version == len(keys)
+    finally:
+        loader.close()
+
+
+def test_changed_files_get_new_keys(tmp_path):
+    photo = str(tmp_path / "photo.png")
+    Image.new("RGB", (30, 40), "blue").save(photo)
+    before = image_key(photo)
+    THUMB_CACHE.put(before, Image.new("RGB", (1, 1)))
+    os.utime(photo, (1, 1))
+    assert image_key(photo) != before
+    assert image_key(photo) not in THUMB_CACHE
@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+from mypdf import engine, trace, workers
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_disabled_tracing_is_a_no_op():
+    assert not trace.enabled()
+    with trace.span("idle") as span:
+        span.set(pages=1)
+    trace.count("idle")
+    assert "idle" not in trace._spans and "idle" not in trace._counters
+
+
+def test_spans_counters_and_summaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(trace, "_spans", {})
+    monkeypatch.setattr(trace, "_counters", {})
+    path = str(tmp_path / "trace.jsonl")
+    trace.configure(path)
+    try:
+        with trace.span("step", path="a.pdf") as span:
+            span.set(pages=3)
+        with pytest.raises(ValueError):
+            with trace.span("step"):
+                raise ValueError("bad page")
+        trace.count("bytes", 10)
+        trace.count("bytes", 5)
+        trace.event("done", jobs=2)
+    finally:
+        trace._finish()
+    assert not trace.enabled()
+
+    records = read_records(path)
+    spans = [r for r in records if r["type"] == "span"]
+    assert [(r["name"], r.get("pages"), r.get("error")) for r in spans] == \
+        [("step", 3, None), ("step", None, "ValueError: bad page")]
+    assert spans[0]["path"] == "a.pdf" and spans[0]["pid"] == os.getpid()
+    [event] = [r for r in records if r["type"] == "event"]
+    assert event["jobs"] == 2
+    [summary] = [r for r in records if r["type"] == "summary"]
+    assert summary["name"] == "step" and summary["count"] == 2
+    assert [(r["name"], r["value"]) for r in records if r["type"] == "counter"] == [("bytes", 15)]
+
+
+def test_pool_workers_write_their_summaries(make_pdf, tmp_path):
+    source = make_pdf("a.pdf", 3)
+    path = str(tmp_path / "trace.jsonl")
+    jobs = [{"op": "crop", "input": source, "start": 1, "end": 2,
+             "output": str(tmp_path / f"out{i}.pdf")} for i in range(4)]
+    with workers.process_pool(2, initializer=trace.configure, initargs=(path,)) as pool:
+        assert list(pool.map(engine.run_job, jobs)) == [2] * 4
+
+    records = read_records(path)
+    assert all(record["pid"] != os.getpid() for record in records)
+    summaries = [r for r in records if r["type"] == "summary" and r["name"] == "engine.crop"]
+    counters = [r for r in records if r["type"] == "counter" and r["name"] == "job.crop"]
+    assert sum(r["count"] for r in summaries) == 4
+    assert sum(r["value"] for r in counters) == 4
@@ -0,0 +1,70 @@
+import json
+import os
+
+from conftest import page_texts
+from PIL import Image
+
+from mypdf.watch import HotFolder, watch
+
+
+def test_scan_waits_until_a_file_settles(tmp_path):
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    scan = inbox / "scan.jpg"
+    scan.write_bytes(b"\xff\xd8 first half")
+    (inbox / "notes.txt").write_text("not an image")
+    (inbox / ".hidden.jpg").write_bytes(b"x")
+    (inbox / "~$report.docx").write_bytes(b"x")
+    (inbox / "empty.png").write_bytes(b"")
+    hot = HotFolder([str(inbox)], str(tmp_path / "out"), settle=2)
+
+    assert hot.scan(0) == []
+    assert hot.scan(1) == []
+    with open(scan, "ab") as f:
+        f.write(b" second half")  # Still being written
+    assert hot.scan(2.5) == []
+    assert hot.scan(4) == []
+    [ready] = hot.scan(5)
+    assert ready.path == str(scan) and ready.first_seen == 0
+    # Empty files are placeholders, never converted as they are
+    assert str(inbox / "empty.png") in hot.handled
+
+    assert not hot.up_to_date(ready)
+    hot.handled[ready.path] = ready.stamp
+    assert hot.scan(10) == []
+    os.remove(scan)
+    hot.scan(11)
+    assert ready.path not in hot.handled
+
+
+def test_watch_once_converts_a_folder(make_docx, tmp_path):
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    Image.new("RGB", (80, 60), "red").save(inbox / "a.jpg")
+    Image.new("RGBA", (60, 80), "blue").save(inbox / "b.png")
+    os.replace(make_docx("c.docx", 2), inbox / "c.docx")
+    (inbox / "broken.jpg").write_bytes(b"\xff\xd8 not really a jpeg")
+    out = tmp_path / "out"
+    metrics_path = tmp_path / "metrics.json"
+
+    metrics = watch([str(inbox)], str(out), workers=2, settle=0, poll=0.05,
+                    metrics_path=str(metrics_path), once=True)
+
+    assert (metrics.converted, metrics.failed, metrics.pages) == (3, 1, 3)
+    assert sorted(os.listdir(out)) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert page_texts(str(out / "c.pdf"))[0].startswith("Report")
+    assert json.loads(metrics_path.read_text())["converted"] == 3
+
+    # A restart skips files whose PDF is newer; a changed file is converted again
+    stamps = {name: os.stat(out / name).st_mtime_ns for name in os.listdir(out)}
+    Image.new("RGB", (80, 60), "green").save(inbox / "a.jpg")
+    os.utime(inbox / "a.jpg", ns=(stamps["a.pdf"] + 10**9,) * 2)
+    again = watch([str(inbox)], str(out), workers=1, settle=0, poll=0.05, once=True,
+                  archive_dir=str(tmp_path / "done"))
+
+    assert (again.converted, again.failed) == (1, 1)
+    assert os.stat(out / "b.pdf").st_mtime_ns == stamps["b.pdf"]
+    assert os.stat(out / "a.pdf").st_mtime_ns != stamps["a.pdf"]
+    assert sorted(os.listdir(tmp_path / "done")) == ["a.jpg", "failed"]
+    assert os.listdir(tmp_path / "done" / "failed") == ["broken.jpg"]
+    assert sorted(os.listdir(inbox)) == ["b.png", "c.docx"]
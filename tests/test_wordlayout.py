@@ -0,0 +1,43 @@
+import zipfile
+
+from mypdf import layout, wordlayout
+from mypdf.wordlayout import DocxStream
+
+
+def test_blocks_come_in_body_order_and_are_dropped_after_use(make_docx):
+    stream = DocxStream(make_docx("report.docx", 3, table=True))
+    blocks = stream.blocks()
+
+    heading = next(blocks)
+    assert heading.text == "Report"
+    assert stream.styles[heading._p.style] == "Heading 1"
+    first = next(blocks)
+    assert first.text.startswith("Paragraph 1")
+    assert heading._p.getparent() is None  # Laid out, so freed
+    table = next(blocks)
+    assert [cell.text for cell in table.rows[2].cells] == ["cell 20", "cell 21"]
+    assert [block.text[:11] for block in blocks] == ["Paragraph 2", "Paragraph 3"]
+
+
+def test_first_page_is_laid_out_before_the_body_is_read(make_docx, monkeypatch):
+    docx = make_docx("long.docx", 1500)
+    with zipfile.ZipFile(docx) as archive:
+        body_size = archive.getinfo("word/document.xml").file_size
+    monkeypatch.setattr(wordlayout, "READ_CHUNK", 4096)
+    read = []
+    original = zipfile.ZipExtFile.read
+
+    def counting_read(self, n=-1):
+        data = original(self, n)
+        if self.name == "word/document.xml":
+            read.append(len(data))
+        return data
+    monkeypatch.setattr(zipfile.ZipExtFile, "read", counting_read)
+
+    document = layout.DocumentLayout(docx)
+    assert document.page(0)
+    assert sum(read) < body_size / 20
+    assert not document.complete
+
+    assert document.page_count() > 50
+    assert sum(read) == body_size